@@ -5,7 +5,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from notifications.poller import start_poller, stop_poller
+from notifications.buffer import flush_notifications
+from cooktest.likes import start_like_pipeline, stop_like_pipeline
+from cooktest.derivatives import stop_derivative_pipeline
+from faq.index import start_faq_index, stop_faq_index
 from badges.automation import start_badge_automation, stop_badge_automation
+from core.schema import bootstrap_schema
 
 from auth import router as auth_router
 from core import settings
@@ -28,13 +33,29 @@ from badge_title import router as badge_title_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 요청 경로에서는 DDL을 실행하지 않는다. 모듈별로 등록된 스키마를 여기서 한 번만 맞춘다
+    try:
+        applied = bootstrap_schema()
+        if applied:
+            print("[lifespan] applied schema steps:", ", ".join(applied))
+    except Exception as e:
+        # 일부 테이블/컬럼이 빠진 스키마로 요청을 받지 않도록 기동을 중단한다
+        print("[lifespan] schema bootstrap failed:", e)
+        raise
     start_badge_automation()
+    start_like_pipeline()
+    start_faq_index()
     await start_poller()
     try:
         yield
     finally:
-        await stop_poller()
         stop_badge_automation()
+        stop_like_pipeline()
+        stop_derivative_pipeline()
+        stop_faq_index()
+        # 스케줄러와 좋아요 파이프라인이 멈춘 뒤 버퍼에 남은 알림을 저장한다
+        flush_notifications()
+        await stop_poller()
 
 def create_app() -> FastAPI:
     app = FastAPI(title="CookUS API", version="1.0", lifespan=lifespan)
@@ -45,6 +66,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*", "Authorization"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     app.include_router(health_router)
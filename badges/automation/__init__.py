@@ -1,10 +1,11 @@
 """Badge automation package.
 
 Provides background monitors that detect user activity and awards badges,
-plus helper functions to start/stop the shared scheduler.
+plus helper functions to start/stop the shared scheduler. Only the process
+holding the `scheduler_lease` row runs the jobs (see `leader.py`).
 """
 
-from .runtime import start_badge_automation, stop_badge_automation
+from .runtime import badge_automation_status, start_badge_automation, stop_badge_automation
 
-__all__ = ["start_badge_automation", "stop_badge_automation"]
+__all__ = ["badge_automation_status", "start_badge_automation", "stop_badge_automation"]
 
@@ -2,7 +2,7 @@ import logging
 from typing import Optional
 
 from core.database import get_conn
-from notifications.service import notify
+from notifications.service import notify_buffered, notify_many
 
 log = logging.getLogger(__name__)
 
@@ -112,7 +112,7 @@ def award_badge(user_id: str, badge_id: int, conn=None, event_id: Optional[int]
         (user_id, badge_id, event_id),
       )
 
-      notify(
+      notify_buffered(
         user_id=user_id,
         title="새 배지를 획득했어요!",
         body=f"'{badge_name}' 배지를 획득했습니다.",
@@ -125,21 +125,65 @@ def award_badge(user_id: str, badge_id: int, conn=None, event_id: Optional[int]
     _close_conn(conn, owns_conn)
 
 
-def handle_user_event(user_id: str, event_type: str, conn=None, event_id: Optional[int] = None):
+def award_badges(awards, conn=None):
+  """Insert many badge awards with one statement and one notification batch.
+
+  Each award is a dict with user_id, badge_id, name_ko and optional event_id.
+  Callers are expected to have filtered out non-repeatable duplicates already.
+  """
+  if not awards:
+    return 0
+  conn, owns_conn = _ensure_conn(conn)
+  try:
+    with conn.cursor() as cur:
+      values = ", ".join(["(%s, %s, NOW(), 0, %s, 0)"] * len(awards))
+      params = []
+      for award in awards:
+        params.extend([award["user_id"], award["badge_id"], award.get("event_id")])
+      cur.execute(
+        f"""
+        INSERT INTO user_badges (user_id, badge_id, awarded_at, is_active, event_id, is_displayed)
+        VALUES {values}
+        """,
+        tuple(params),
+      )
+
+    notify_many(
+      [
+        {
+          "user_id": award["user_id"],
+          "title": "새 배지를 획득했어요!",
+          "body": f"'{award.get('name_ko') or '배지'}' 배지를 획득했습니다.",
+          "link_url": "/me/badges",
+          "type": "badge",
+          "related_id": award["badge_id"],
+        }
+        for award in awards
+      ],
+      conn=conn,
+    )
+    return len(awards)
+  finally:
+    _close_conn(conn, owns_conn)
+
+
+def handle_user_event(user_id: str, event_type: str, conn=None, event_id: Optional[int] = None) -> int:
+  """Advance every badge of the event's category; return how many badges were awarded."""
   conn, owns_conn = _ensure_conn(conn)
   try:
     if not user_id:
       log.warning("handle_user_event called with empty user_id for event %s (event_id=%s)", event_type, event_id)
-      return
+      return 0
     db_category = EVENT_CATEGORY_MAP.get(event_type, event_type)
     with conn.cursor() as cur:
       cur.execute("SELECT badge_id FROM badge_info WHERE category=%s", (db_category,))
       badges = cur.fetchall()
       if not badges:
         log.debug("No badges configured for category '%s' (event_type=%s)", db_category, event_type)
-        return
+        return 0
 
     log.debug("User %s triggered event %s mapped to %s (%d badges)", user_id, event_type, db_category, len(badges))
+    awarded_count = 0
     for badge in badges:
       progress = update_badge_process(user_id, badge["badge_id"], 1, conn, event_id)
       log.debug(
@@ -160,5 +204,8 @@ def handle_user_event(user_id: str, event_type: str, conn=None, event_id: Option
           event_id,
           awarded,
         )
+        if awarded:
+          awarded_count += 1
+    return awarded_count
   finally:
     _close_conn(conn, owns_conn)
@@ -1,8 +1,13 @@
 import logging
 import os
+import threading
+import time
+from typing import Any, List, Optional, Sequence
 
 from core.database import get_conn
-from .engine import handle_user_event, award_badge, update_badge_process
+from fridge.events import commit_offset, prune_changes, read_changes
+from .engine import handle_user_event, award_badge, award_badges, update_badge_process
+from .metrics import JobRun, record_run
 
 _base_logger = logging.getLogger("uvicorn.error")
 log = _base_logger.getChild("badges.automation.jobs")
@@ -10,20 +15,37 @@ log = _base_logger.getChild("badges.automation.jobs")
 CHECK_INTERVAL = int(os.getenv("BADGE_CHECK_INTERVAL", "10"))
 POPULAR_LIKE_THRESHOLD = int(os.getenv("LIKE_THRESHOLD", "50"))
 RANK_AGGREGATION_INTERVAL_HOURS = int(os.getenv("BADGE_RANK_INTERVAL_HOURS", "12"))
+RANK_PLANNER_INTERVAL = int(os.getenv("BADGE_RANK_PLANNER_INTERVAL", "300"))
+RANK_DUE_GRACE_SECONDS = int(os.getenv("BADGE_RANK_DUE_GRACE", "5"))
+# check_new_fridge_items follows fridge_change_event from its own offset (at-least-once;
+# read_changes holds back events behind an id hole until FRIDGE_CHANGE_SETTLE_SEC)
+FRIDGE_CHANGE_CONSUMER = "badges.check_new_fridge_items"
+FRIDGE_CHANGE_BATCH = int(os.getenv("BADGE_FRIDGE_CHANGE_BATCH", "500"))
+FRIDGE_CHANGE_RETENTION_DAYS = int(os.getenv("FRIDGE_CHANGE_RETENTION_DAYS", "7"))
 
 
 def _run_job(name, worker):
   log.debug("Running badge job '%s'", name)
+  run = JobRun()
+  started = time.perf_counter()
   try:
-    worker()
+    worker(run)
   except Exception:
+    record_run(name, started, False, run)
     log.exception("Badge automation job '%s' failed", name)
   else:
-    log.debug("Finished badge job '%s'", name)
+    record_run(name, started, True, run)
+    log.debug(
+      "Finished badge job '%s' (rows=%d, events=%d, awarded=%d)",
+      name,
+      run.rows_scanned,
+      run.events_handled,
+      run.badges_awarded,
+    )
 
 
 def check_new_boards():
-  def worker():
+  def worker(run):
     with get_conn() as conn, conn.cursor() as cur:
       cur.execute(
         """
@@ -34,15 +56,17 @@ def check_new_boards():
         (CHECK_INTERVAL,),
       )
       rows = cur.fetchall()
+      run.rows_scanned += len(rows)
       if rows:
         log.info("check_new_boards: detected %d new posts", len(rows))
       for row in rows:
-        handle_user_event(row["user_id"], "contest", conn)
+        run.badges_awarded += handle_user_event(row["user_id"], "contest", conn)
+        run.events_handled += 1
   _run_job("check_new_boards", worker)
 
 
 def check_recipe_recommendations():
-  def worker():
+  def worker(run):
     with get_conn() as conn, conn.cursor() as cur:
       cur.execute(
         """
@@ -53,15 +77,17 @@ def check_recipe_recommendations():
         (CHECK_INTERVAL,),
       )
       rows = cur.fetchall()
+      run.rows_scanned += len(rows)
       if rows:
         log.info("check_recipe_recommendations: detected %d recommendations", len(rows))
       for row in rows:
-        handle_user_event(row["user_id"], "recipe", conn)
+        run.badges_awarded += handle_user_event(row["user_id"], "recipe", conn)
+        run.events_handled += 1
   _run_job("check_recipe_recommendations", worker)
 
 
 def check_cooked_recipes():
-  def worker():
+  def worker(run):
     with get_conn() as conn, conn.cursor() as cur:
       cur.execute(
         """
@@ -72,6 +98,7 @@ def check_cooked_recipes():
         """,
       )
       rows = cur.fetchall()
+      run.rows_scanned += len(rows)
       if not rows:
         return
       log.info("check_cooked_recipes: evaluated cooked progress for %d users", len(rows))
@@ -97,68 +124,70 @@ def check_cooked_recipes():
             (user_id, badge["badge_id"]),
           )
           process = cur.fetchone()
+          run.rows_scanned += 1
           previous_value = process["current_value"] if process else 0
           increment = total_cooked - previous_value
           if increment <= 0:
             continue
+          run.events_handled += 1
           progress = update_badge_process(user_id, badge["badge_id"], increment, conn)
-          if progress["completed"]:
-            award_badge(user_id, badge["badge_id"], conn)
+          if progress["completed"] and award_badge(user_id, badge["badge_id"], conn):
+            run.badges_awarded += 1
   _run_job("check_cooked_recipes", worker)
 
 
 def check_new_fridge_items():
-  def worker():
+  def worker(run):
     with get_conn() as conn, conn.cursor() as cur:
-      cur.execute(
-        """
-        SELECT id AS user_id, COUNT(*) AS new_items
-        FROM fridge_item
-        WHERE stored_at >= NOW() - INTERVAL %s SECOND
-        GROUP BY id
-        """,
-        (CHECK_INTERVAL,),
-      )
-      rows = cur.fetchall()
-      if rows:
-        log.info("check_new_fridge_items: detected %d new fridge items", len(rows))
-      if not rows:
-        return
-
-      cur.execute("SELECT badge_id FROM badge_info WHERE category='fridge'")
-      fridge_badges = cur.fetchall()
-      if not fridge_badges:
-        log.debug("No fridge badges configured; skipping")
+      changes = read_changes(cur, FRIDGE_CHANGE_CONSUMER, FRIDGE_CHANGE_BATCH)
+      run.rows_scanned += len(changes)
+      if not changes:
         return
 
-      for row in rows:
-        user_id = row["user_id"]
-        increment = row["new_items"]
-        for badge in fridge_badges:
-          progress = update_badge_process(user_id, badge["badge_id"], increment, conn)
-          if progress["completed"]:
-            award_badge(user_id, badge["badge_id"], conn)
+      new_items = {}
+      for change in changes:
+        if change.added:
+          new_items[change.user_id] = new_items.get(change.user_id, 0) + len(change.added)
+      if new_items:
+        log.info("check_new_fridge_items: %d users added fridge items", len(new_items))
+        cur.execute("SELECT badge_id FROM badge_info WHERE category='fridge'")
+        fridge_badges = cur.fetchall()
+        if not fridge_badges:
+          log.debug("No fridge badges configured; skipping")
+        for user_id, increment in new_items.items():
+          run.events_handled += 1
+          for badge in fridge_badges:
+            progress = update_badge_process(user_id, badge["badge_id"], increment, conn)
+            if progress["completed"] and award_badge(user_id, badge["badge_id"], conn):
+              run.badges_awarded += 1
+      commit_offset(cur, FRIDGE_CHANGE_CONSUMER, changes[-1].event_id)
   _run_job("check_new_fridge_items", worker)
 
 
+def prune_fridge_changes():
+  def worker(run):
+    run.rows_scanned += prune_changes(FRIDGE_CHANGE_RETENTION_DAYS)
+  _run_job("prune_fridge_changes", worker)
+
+
 def check_goal_progress():
-  def worker():
+  def worker(run):
     with get_conn() as conn, conn.cursor() as cur:
       cur.execute(
         """
-        SELECT id AS user_id, COUNT(*) AS cooked_count
-        FROM selected_recipe
-        WHERE action = 1
-        GROUP BY id
+        SELECT user_id, SUM(cooked_count) AS cooked_count
+        FROM user_daily_cook_stats
+        GROUP BY user_id
         """,
       )
       rows = cur.fetchall()
+      run.rows_scanned += len(rows)
       if not rows:
         return
 
       for row in rows:
         user_id = row["user_id"]
-        cooked_count = row["cooked_count"]
+        cooked_count = int(row["cooked_count"] or 0)
 
         cur.execute("SELECT last_goal FROM goal_state_cache WHERE user_id=%s", (user_id,))
         cached = cur.fetchone()
@@ -175,7 +204,8 @@ def check_goal_progress():
 
         last_goal = cached["last_goal"]
         if cooked_count > last_goal:
-          handle_user_event(user_id, "goal", conn)
+          run.badges_awarded += handle_user_event(user_id, "goal", conn)
+          run.events_handled += 1
           cur.execute(
             """
             UPDATE goal_state_cache
@@ -188,7 +218,7 @@ def check_goal_progress():
 
 
 def check_popular_boards():
-  def worker():
+  def worker(run):
     with get_conn() as conn, conn.cursor() as cur:
       cur.execute(
         """
@@ -199,6 +229,7 @@ def check_popular_boards():
         (CHECK_INTERVAL,),
       )
       liked_rows = cur.fetchall()
+      run.rows_scanned += len(liked_rows)
       if not liked_rows:
         return
       log.info("check_popular_boards: evaluating %d liked posts", len(liked_rows))
@@ -219,7 +250,8 @@ def check_popular_boards():
         if board.get("is_popular"):
           continue
         if board["like_count"] >= POPULAR_LIKE_THRESHOLD:
-          handle_user_event(board["user_id"], "likes", conn)
+          run.badges_awarded += handle_user_event(board["user_id"], "likes", conn)
+          run.events_handled += 1
           cur.execute(
             "UPDATE board SET is_popular=1 WHERE content_id=%s",
             (content_id,),
@@ -227,67 +259,118 @@ def check_popular_boards():
   _run_job("check_popular_boards", worker)
 
 
-def aggregate_event_results():
-  def worker():
-    with get_conn() as conn, conn.cursor() as cur:
+PENDING_EVENTS_SQL = """
+SELECT e.event_id
+FROM event e
+LEFT JOIN event_result er ON er.event_id = e.event_id
+WHERE e.end_date < NOW()
+  AND er.event_id IS NULL
+"""
+
+_aggregation_lock = threading.Lock()
+
+
+def _placeholders(values):
+  return ",".join(["%s"] * len(values))
+
+
+def next_pending_event_end(after=None):
+  """Return the earliest end_date of an event that still needs ranking, if any.
+
+  Events without posts never produce results, so they are ignored here to keep
+  the planner from re-triggering on them forever.
+  """
+  sql = """
+    SELECT MIN(e.end_date) AS next_end
+    FROM event e
+    LEFT JOIN event_result er ON er.event_id = e.event_id
+    WHERE er.event_id IS NULL
+      AND EXISTS (SELECT 1 FROM board b WHERE b.event_id = e.event_id)
+  """
+  params: List[Any] = []
+  if after is not None:
+    sql += " AND e.end_date > %s"
+    params.append(after)
+  with get_conn() as conn, conn.cursor() as cur:
+    cur.execute(sql, tuple(params))
+    row = cur.fetchone()
+  return row["next_end"] if row else None
+
+
+def aggregate_event_results(event_ids: Optional[Sequence[int]] = None):
+  def worker(run):
+    # The periodic sweep and the end_date-triggered run may overlap; event_result
+    # has no unique key, so serialise them inside the process.
+    with _aggregation_lock, get_conn() as conn, conn.cursor() as cur:
+      sql = PENDING_EVENTS_SQL
+      params: List[Any] = []
+      if event_ids:
+        sql += f" AND e.event_id IN ({_placeholders(event_ids)})"
+        params.extend(event_ids)
+      cur.execute(sql, tuple(params))
+      pending = [row["event_id"] for row in cur.fetchall()]
+      run.rows_scanned += len(pending)
+      if not pending:
+        return
+      log.info("aggregate_event_results: %d finished events to aggregate", len(pending))
+
+      in_events = _placeholders(pending)
       cur.execute(
-        """
-        SELECT e.event_id
-        FROM event e
-        WHERE e.end_date < NOW()
-          AND e.event_id NOT IN (SELECT DISTINCT event_id FROM event_result)
+        f"""
+        INSERT INTO event_result (event_id, content_id, id, rank, like_count)
+        SELECT *
+        FROM (
+          SELECT
+            board.event_id,
+            board.content_id,
+            board.id,
+            ROW_NUMBER() OVER (PARTITION BY board.event_id ORDER BY board.like_count DESC, board.created_at ASC) AS rank,
+            board.like_count
+          FROM board
+          WHERE board.event_id IN ({in_events})
+        ) ranked
+        WHERE ranked.rank <= 5
         """,
+        tuple(pending),
       )
-      events = cur.fetchall()
-      if not events:
-        return
-      log.info("aggregate_event_results: %d finished events to aggregate", len(events))
 
       cur.execute(
-        """
-        SELECT badge_id, target_value
-        FROM badge_info
-        WHERE category='ranks'
+        f"""
+        SELECT er.event_id, er.id AS user_id, b.badge_id, b.name_ko, COALESCE(b.repeatable, 0) AS repeatable
+        FROM event_result er
+        JOIN badge_info b ON b.category='ranks' AND er.rank <= b.target_value
+        WHERE er.event_id IN ({in_events})
+          AND (
+            COALESCE(b.repeatable, 0) = 1
+            OR NOT EXISTS (
+              SELECT 1 FROM user_badges ub
+              WHERE ub.user_id = er.id AND ub.badge_id = b.badge_id
+            )
+          )
+        ORDER BY er.event_id, er.rank
         """,
+        tuple(pending),
+      )
+      candidates = cur.fetchall()
+      run.rows_scanned += len(candidates)
+      run.events_handled += len(pending)
+
+      awards = []
+      seen = set()
+      for row in candidates:
+        key = (row["user_id"], row["badge_id"])
+        # A non-repeatable badge may be won in several events of the same batch.
+        if not row["repeatable"] and key in seen:
+          continue
+        seen.add(key)
+        awards.append(row)
+      awarded = award_badges(awards, conn)
+      run.badges_awarded += awarded
+      log.info(
+        "aggregate_event_results: ranked %d events, awarded %d rank badges",
+        len(pending),
+        awarded,
       )
-      rank_badges = cur.fetchall()
-
-      for event in events:
-        event_id = event["event_id"]
-        cur.execute(
-          """
-          INSERT INTO event_result (event_id, content_id, id, rank, like_count)
-          SELECT *
-          FROM (
-            SELECT
-              board.event_id,
-              board.content_id,
-              board.id,
-              ROW_NUMBER() OVER (PARTITION BY board.event_id ORDER BY board.like_count DESC, board.created_at ASC) AS rank,
-              board.like_count
-            FROM board
-            WHERE board.event_id=%s
-          ) ranked
-          WHERE ranked.rank <= 5
-          """,
-          (event_id,),
-        )
-
-        cur.execute(
-          """
-          SELECT id AS user_id, rank
-          FROM event_result
-          WHERE event_id=%s
-          """,
-          (event_id,),
-        )
-        winners = cur.fetchall()
-        for winner in winners:
-          user_id = winner["user_id"]
-          rank = winner["rank"]
-          for badge in rank_badges:
-            if rank <= badge["target_value"]:
-              award_badge(user_id, badge["badge_id"], conn, event_id=event_id)
   _run_job("aggregate_event_results", worker)
 
 
@@ -295,6 +378,7 @@ JOB_DEFINITIONS = [
   ("check_new_boards", check_new_boards, CHECK_INTERVAL),
   ("check_cooked_recipes", check_cooked_recipes, CHECK_INTERVAL),
   ("check_new_fridge_items", check_new_fridge_items, CHECK_INTERVAL),
+  ("prune_fridge_changes", prune_fridge_changes, 3600),
   ("check_goal_progress", check_goal_progress, 15),
   ("check_popular_boards", check_popular_boards, 20),
   ("check_recipe_recommendations", check_recipe_recommendations, CHECK_INTERVAL),
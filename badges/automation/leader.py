@@ -0,0 +1,160 @@
+import logging
+import os
+import socket
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from core.database import get_conn
+from core.schema import register_schema
+
+_base_logger = logging.getLogger("uvicorn.error")
+log = _base_logger.getChild("badges.automation.leader")
+
+LEASE_NAME = os.getenv("BADGE_LEASE_NAME", "badge-automation")
+LEASE_TTL_SECONDS = int(os.getenv("BADGE_LEASE_TTL", "30"))
+LEASE_HEARTBEAT_SECONDS = int(os.getenv("BADGE_LEASE_HEARTBEAT", "10"))
+
+LEASE_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS scheduler_lease (
+  name VARCHAR(64) NOT NULL PRIMARY KEY,
+  holder VARCHAR(255) NOT NULL,
+  acquired_at DATETIME NOT NULL,
+  heartbeat_at DATETIME NOT NULL,
+  expires_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# MySQL evaluates ON DUPLICATE KEY assignments left to right, so once `holder`
+# has been taken over the later columns already see the new holder.
+ACQUIRE_SQL = """
+INSERT INTO scheduler_lease (name, holder, acquired_at, heartbeat_at, expires_at)
+VALUES (%s, %s, NOW(), NOW(), NOW() + INTERVAL %s SECOND)
+ON DUPLICATE KEY UPDATE
+  acquired_at = IF(holder <> VALUES(holder) AND expires_at < NOW(), NOW(), acquired_at),
+  holder = IF(holder = VALUES(holder) OR expires_at < NOW(), VALUES(holder), holder),
+  heartbeat_at = IF(holder = VALUES(holder), NOW(), heartbeat_at),
+  expires_at = IF(holder = VALUES(holder), VALUES(expires_at), expires_at)
+"""
+
+
+register_schema("scheduler_lease", LEASE_TABLE_DDL)
+
+
+def _default_identity() -> str:
+  return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseElector:
+  """Elect a single scheduler leader across worker processes.
+
+  Every process heartbeats a row in `scheduler_lease`. The holder renews its
+  lease on each beat; any other process takes the row over once the lease has
+  expired, so a crashed leader is replaced within `ttl` seconds.
+  """
+
+  def __init__(
+    self,
+    name: str = LEASE_NAME,
+    ttl: int = LEASE_TTL_SECONDS,
+    heartbeat: int = LEASE_HEARTBEAT_SECONDS,
+    identity: Optional[str] = None,
+  ):
+    self.name = name
+    self.ttl = max(ttl, heartbeat * 2)
+    self.heartbeat = heartbeat
+    self.identity = identity or _default_identity()
+    self.is_leader = False
+    self.holder: Optional[str] = None
+    self.expires_at: Optional[datetime] = None
+    self.last_heartbeat: Optional[datetime] = None
+    self._on_elected: Optional[Callable[[], None]] = None
+    self._on_demoted: Optional[Callable[[], None]] = None
+    self._stop = threading.Event()
+    self._thread: Optional[threading.Thread] = None
+
+  def start(self, on_elected: Callable[[], None], on_demoted: Callable[[], None]) -> None:
+    if self._thread:
+      return
+    self._on_elected = on_elected
+    self._on_demoted = on_demoted
+    self._stop.clear()
+    self._thread = threading.Thread(target=self._loop, name=f"lease-{self.name}", daemon=True)
+    self._thread.start()
+    log.info("Lease elector started for '%s' as %s (ttl=%ss)", self.name, self.identity, self.ttl)
+
+  def stop(self) -> None:
+    if not self._thread:
+      return
+    self._stop.set()
+    self._thread.join(timeout=self.heartbeat + 5)
+    self._thread = None
+    if self.is_leader:
+      self._set_leader(False)
+      self._release()
+
+  def status(self) -> Dict[str, Any]:
+    return {
+      "lease": self.name,
+      "identity": self.identity,
+      "is_leader": self.is_leader,
+      "holder": self.holder,
+      "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+      "last_heartbeat": self.last_heartbeat.isoformat() if self.last_heartbeat else None,
+    }
+
+  def _loop(self) -> None:
+    while not self._stop.is_set():
+      try:
+        self._beat()
+      except Exception:
+        log.exception("Lease heartbeat for '%s' failed", self.name)
+        # Without a confirmed renewal we can no longer assume we are the only
+        # runner, so step down until the database answers again.
+        if self.is_leader:
+          self._set_leader(False)
+      self._stop.wait(self.heartbeat)
+
+  def _beat(self) -> None:
+    with get_conn() as conn, conn.cursor() as cur:
+      cur.execute(ACQUIRE_SQL, (self.name, self.identity, self.ttl))
+      cur.execute(
+        "SELECT holder, expires_at FROM scheduler_lease WHERE name=%s",
+        (self.name,),
+      )
+      row = cur.fetchone() or {}
+    self.holder = row.get("holder")
+    self.expires_at = row.get("expires_at")
+    self.last_heartbeat = datetime.now()
+    self._set_leader(self.holder == self.identity)
+
+  def _set_leader(self, leader: bool) -> None:
+    if leader == self.is_leader:
+      return
+    self.is_leader = leader
+    if leader:
+      log.info("Acquired lease '%s' as %s", self.name, self.identity)
+      callback = self._on_elected
+    else:
+      log.info("Lost lease '%s' (holder=%s)", self.name, self.holder)
+      callback = self._on_demoted
+    if callback:
+      try:
+        callback()
+      except Exception:
+        log.exception("Lease transition callback failed for '%s'", self.name)
+
+  def _release(self) -> None:
+    try:
+      with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+          """
+          UPDATE scheduler_lease
+          SET expires_at = NOW() - INTERVAL 1 SECOND
+          WHERE name=%s AND holder=%s
+          """,
+          (self.name, self.identity),
+        )
+      log.info("Released lease '%s'", self.name)
+    except Exception:
+      log.exception("Failed to release lease '%s'", self.name)
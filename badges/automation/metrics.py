@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+
+from core.metrics import metrics
+
+JOB_DURATION = metrics.histogram(
+  "badge_job_duration_seconds",
+  "Wall time of one badge automation job run.",
+  ["job"],
+)
+JOB_RUNS = metrics.counter("badge_job_runs_total", "Badge automation job runs by outcome.", ["job", "status"])
+JOB_ROWS = metrics.counter("badge_job_rows_scanned_total", "Rows read by badge automation jobs.", ["job"])
+JOB_EVENTS = metrics.counter("badge_job_events_handled_total", "User events handled by badge automation jobs.", ["job"])
+JOB_AWARDS = metrics.counter("badge_job_badges_awarded_total", "Badges awarded by badge automation jobs.", ["job"])
+JOB_MISSED = metrics.counter("badge_job_missed_total", "Runs APScheduler reported as misfired.", ["job"])
+JOB_SKIPPED = metrics.counter(
+  "badge_job_skipped_total",
+  "Runs APScheduler skipped because the previous run was still going (max_instances).",
+  ["job"],
+)
+
+_last_runs: Dict[str, Dict[str, Any]] = {}
+_last_lock = threading.Lock()
+
+
+class JobRun:
+  """Counters a job worker fills in while it runs."""
+
+  __slots__ = ("rows_scanned", "events_handled", "badges_awarded")
+
+  def __init__(self):
+    self.rows_scanned = 0
+    self.events_handled = 0
+    self.badges_awarded = 0
+
+
+def record_run(job: str, started: float, ok: bool, run: JobRun) -> None:
+  duration = time.perf_counter() - started
+  JOB_DURATION.observe(duration, job=job)
+  JOB_RUNS.inc(job=job, status="ok" if ok else "error")
+  JOB_ROWS.inc(run.rows_scanned, job=job)
+  JOB_EVENTS.inc(run.events_handled, job=job)
+  JOB_AWARDS.inc(run.badges_awarded, job=job)
+  with _last_lock:
+    _last_runs[job] = {
+      "finished_at": datetime.now().isoformat(timespec="seconds"),
+      "duration_seconds": round(duration, 4),
+      "status": "ok" if ok else "error",
+      "rows_scanned": run.rows_scanned,
+      "events_handled": run.events_handled,
+      "badges_awarded": run.badges_awarded,
+    }
+
+
+def scheduler_listener(job_names: Dict[str, str]):
+  """Build an APScheduler listener that counts misfires and max_instances skips."""
+
+  def listener(event) -> None:
+    job = job_names.get(event.job_id, event.job_id)
+    if event.code == EVENT_JOB_MISSED:
+      JOB_MISSED.inc(job=job)
+    elif event.code == EVENT_JOB_MAX_INSTANCES:
+      JOB_SKIPPED.inc(job=job)
+
+  return listener
+
+
+LISTENER_MASK = EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+
+
+def jobs_snapshot() -> Dict[str, Any]:
+  """JSON-friendly per-job summary for the admin view."""
+  with _last_lock:
+    last_runs = dict(_last_runs)
+  jobs = set(last_runs)
+  for counter in (JOB_MISSED, JOB_SKIPPED):
+    jobs.update(key[0] for key in counter.label_values())
+
+  out: Dict[str, Any] = {}
+  for job in sorted(jobs):
+    out[job] = {
+      "runs": {
+        "ok": int(JOB_RUNS.value(job=job, status="ok")),
+        "error": int(JOB_RUNS.value(job=job, status="error")),
+      },
+      "duration_seconds": JOB_DURATION.snapshot(job=job),
+      "rows_scanned": int(JOB_ROWS.value(job=job)),
+      "events_handled": int(JOB_EVENTS.value(job=job)),
+      "badges_awarded": int(JOB_AWARDS.value(job=job)),
+      "missed": int(JOB_MISSED.value(job=job)),
+      "skipped": int(JOB_SKIPPED.value(job=job)),
+      "last_run": last_runs.get(job),
+    }
+  return out
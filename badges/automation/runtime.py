@@ -1,28 +1,39 @@
 import logging
-from typing import Optional
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from .jobs import (
   JOB_DEFINITIONS,
   aggregate_event_results,
+  next_pending_event_end,
   CHECK_INTERVAL,
   RANK_AGGREGATION_INTERVAL_HOURS,
+  RANK_DUE_GRACE_SECONDS,
+  RANK_PLANNER_INTERVAL,
 )
+from .leader import LeaseElector
+from .metrics import LISTENER_MASK, scheduler_listener
 
 _base_logger = logging.getLogger("uvicorn.error")
 log = _base_logger.getChild("badges.automation.runtime")
 
 _scheduler: Optional[BackgroundScheduler] = None
+_elector: Optional[LeaseElector] = None
+_lock = threading.Lock()
 
 
-def start_badge_automation():
-  global _scheduler
-  if _scheduler:
-    log.info("Badge automation scheduler already running.")
-    return _scheduler
-
+def _build_scheduler() -> BackgroundScheduler:
   scheduler = BackgroundScheduler()
+  job_names = {f"badge-{name}": name for name, _, _ in JOB_DEFINITIONS}
+  job_names.update({
+    "badge-rank-aggregation": "aggregate_event_results",
+    "badge-rank-aggregation-due": "aggregate_event_results",
+    "badge-rank-planner": "rank_planner",
+  })
+  scheduler.add_listener(scheduler_listener(job_names), LISTENER_MASK)
   for name, job, seconds in JOB_DEFINITIONS:
     log.info("Registering badge job '%s' (interval=%ss)", name, seconds)
     scheduler.add_job(job, "interval", seconds=seconds, max_instances=1, id=f"badge-{name}")
@@ -39,22 +50,111 @@ def start_badge_automation():
     id="badge-rank-aggregation",
   )
 
-  scheduler.start()
-  _scheduler = scheduler
-  log.info(
-    "Badge automation scheduler started (check_interval=%ss, rank_interval=%sh)",
-    CHECK_INTERVAL,
-    RANK_AGGREGATION_INTERVAL_HOURS,
+  log.info("Registering badge job 'rank-planner' (interval=%ss)", RANK_PLANNER_INTERVAL)
+  scheduler.add_job(
+    _plan_rank_aggregation,
+    "interval",
+    seconds=RANK_PLANNER_INTERVAL,
+    args=[scheduler],
+    max_instances=1,
+    next_run_time=datetime.now(),
+    id="badge-rank-planner",
   )
   return scheduler
 
 
-def stop_badge_automation():
+def _plan_rank_aggregation(scheduler: BackgroundScheduler, after: Optional[datetime] = None):
+  """Schedule a one-off aggregation right after the next pending event ends.
+
+  The interval job above stays as a safety sweep; this keeps ranks and rank
+  badges from waiting up to RANK_AGGREGATION_INTERVAL_HOURS after a contest.
+  """
+  try:
+    next_end = next_pending_event_end(after)
+  except Exception:
+    log.exception("Failed to look up the next event end for rank aggregation")
+    return
+  if not next_end:
+    return
+  run_at = max(
+    next_end + timedelta(seconds=RANK_DUE_GRACE_SECONDS),
+    datetime.now() + timedelta(seconds=1),
+  )
+  scheduler.add_job(
+    _run_due_rank_aggregation,
+    "date",
+    run_date=run_at,
+    args=[scheduler],
+    misfire_grace_time=None,
+    replace_existing=True,
+    id="badge-rank-aggregation-due",
+  )
+  log.debug("Rank aggregation planned at %s (event end %s)", run_at, next_end)
+
+
+def _run_due_rank_aggregation(scheduler: BackgroundScheduler):
+  started = datetime.now()
+  aggregate_event_results()
+  # Only look ahead here; overdue leftovers are retried by the planner interval.
+  _plan_rank_aggregation(scheduler, after=started)
+
+
+def _start_scheduler():
+  global _scheduler
+  with _lock:
+    if _scheduler:
+      log.info("Badge automation scheduler already running.")
+      return _scheduler
+
+    scheduler = _build_scheduler()
+    scheduler.start()
+    _scheduler = scheduler
+    log.info(
+      "Badge automation scheduler started (check_interval=%ss, rank_interval=%sh)",
+      CHECK_INTERVAL,
+      RANK_AGGREGATION_INTERVAL_HOURS,
+    )
+    return scheduler
+
+
+def _stop_scheduler():
   global _scheduler
-  if not _scheduler:
+  with _lock:
+    if not _scheduler:
+      return
+    try:
+      _scheduler.shutdown(wait=False)
+      log.info("Badge automation scheduler stopped.")
+    finally:
+      _scheduler = None
+
+
+def start_badge_automation():
+  """Join the leader election; the scheduler only runs while this process holds the lease."""
+  global _elector
+  if _elector:
+    log.info("Badge automation elector already running.")
+    return _elector
+
+  elector = LeaseElector()
+  elector.start(on_elected=_start_scheduler, on_demoted=_stop_scheduler)
+  _elector = elector
+  return elector
+
+
+def stop_badge_automation():
+  global _elector
+  if not _elector:
+    _stop_scheduler()
     return
   try:
-    _scheduler.shutdown(wait=False)
-    log.info("Badge automation scheduler stopped.")
+    _elector.stop()
   finally:
-    _scheduler = None
+    _elector = None
+    _stop_scheduler()
+
+
+def badge_automation_status() -> Dict[str, Any]:
+  status: Dict[str, Any] = _elector.status() if _elector else {"is_leader": False, "holder": None}
+  status["scheduler_running"] = _scheduler is not None
+  return status
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Path
 
 from core import get_current_user
-from notifications.service import notify
+from notifications.service import notify_buffered
 from .schemas import BadgeOverview, EarnedBadge, LockedBadge, Progress
 from .repository import fetch_overview, own_badge, deactivate_all, activate_one, award_if_absent
 
@@ -68,7 +68,7 @@ def award_badge(
 ):
     awarded = award_if_absent(user_id, badge_id)
     if awarded:
-        notify(
+        notify_buffered(
             user_id=user_id,
             title="새 배지를 획득했어요!",
             body=f"{badge_id} 배지를 획득했습니다.",
@@ -0,0 +1,353 @@
+"""Thumbnail and WebP/AVIF derivatives for CookTest post images.
+
+Photos uploaded through `/events/{id}/presigned-urls` are full camera
+resolution. After `create_post` references `uploads/{event_id}/...` objects,
+the post is queued on a small worker pool that reads each original from the
+object store, writes a thumbnail plus WebP (and AVIF when Pillow supports it)
+renditions under `derived/{event_id}/`, and records their URLs in
+`board.img_variants` — a JSON list aligned with the post's images. Feeds then
+serve thumbnails and the detail view keeps the original.
+
+Requires Pillow; without it posts simply keep their originals. The object store
+is the shared S3 client by default, or a directory when
+COOKTEST_LOCAL_STORE_DIR is set (local development and tests).
+
+Posts whose derivatives were lost (worker restart, missing Pillow) can be
+processed later:
+
+    python -m cooktest.derivatives backfill [--event EVENT_ID] [--chunk 500] [--after CONTENT_ID]
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Protocol
+
+from core.database import get_conn
+from core.metrics import metrics
+from core.schema import column_exists, register_schema
+
+from .feed_cache import feed_cache
+from .storage import get_presigner
+
+try:
+    from PIL import Image, ImageOps, features as pil_features
+except Exception:
+    Image = None
+    ImageOps = None
+    pil_features = None
+
+log = logging.getLogger(__name__)
+
+DERIVATIVE_WORKERS = int(os.getenv("COOKTEST_DERIVATIVE_WORKERS", "2"))
+THUMB_SIZE = int(os.getenv("COOKTEST_THUMB_SIZE", "400"))
+DISPLAY_SIZE = int(os.getenv("COOKTEST_DISPLAY_SIZE", "1600"))
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+UPLOAD_PREFIX = "uploads/"
+DERIVED_PREFIX = "derived/"
+
+DERIVATIVE_JOBS = metrics.counter(
+    "cooktest_derivative_jobs_total",
+    "Post image derivative jobs by outcome (ok/error/skipped).",
+    ["status"],
+)
+DERIVATIVE_SECONDS = metrics.histogram(
+    "cooktest_derivative_seconds",
+    "Time to render and store all derivatives of one image.",
+)
+
+
+class ObjectStore(Protocol):
+    def get(self, key: str) -> bytes: ...
+
+    def put(self, key: str, data: bytes, content_type: str) -> None: ...
+
+    def url(self, key: str) -> str: ...
+
+    def key_for_url(self, url: str) -> Optional[str]: ...
+
+
+class S3ObjectStore:
+    """Reads and writes through the process-wide presigner's S3 client."""
+
+    def __init__(self, presigner=None):
+        self.presigner = presigner or get_presigner()
+
+    def get(self, key: str) -> bytes:
+        obj = self.presigner.client.get_object(Bucket=self.presigner.bucket, Key=key)
+        return obj["Body"].read()
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        self.presigner.client.put_object(
+            Bucket=self.presigner.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type,
+            CacheControl="public, max-age=31536000, immutable",
+        )
+
+    def url(self, key: str) -> str:
+        return self.presigner.public_url(key)
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        base = self.presigner.public_url("")
+        return url[len(base):] if url.startswith(base) else None
+
+
+class LocalObjectStore:
+    """Directory-backed stand-in for S3: key `a/b.jpg` lives at `{root}/a/b.jpg`."""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"key escapes the store root: {key}")
+        return path
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        prefix = self.base_url + "/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+
+def store_from_env() -> ObjectStore:
+    root = os.getenv("COOKTEST_LOCAL_STORE_DIR")
+    if root:
+        return LocalObjectStore(root, os.getenv("COOKTEST_LOCAL_STORE_URL") or "http://localhost:8000/local-store")
+    return S3ObjectStore()
+
+
+def avif_supported() -> bool:
+    try:
+        return bool(pil_features and pil_features.check("avif"))
+    except Exception:
+        return False
+
+
+def _encode(img, max_side: int, fmt: str, quality: int) -> bytes:
+    out = img.copy()
+    out.thumbnail((max_side, max_side))
+    buf = io.BytesIO()
+    out.save(buf, format=fmt, quality=quality)
+    return buf.getvalue()
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """Encode one original into {"thumb": webp, "webp": webp[, "avif": avif]}."""
+    with Image.open(io.BytesIO(data)) as src:
+        # Phone photos carry their rotation in EXIF; bake it in before EXIF is dropped
+        img = ImageOps.exif_transpose(src).convert("RGB")
+    variants = {
+        "thumb": _encode(img, THUMB_SIZE, "WEBP", WEBP_QUALITY),
+        "webp": _encode(img, DISPLAY_SIZE, "WEBP", WEBP_QUALITY),
+    }
+    if avif_supported():
+        variants["avif"] = _encode(img, DISPLAY_SIZE, "AVIF", AVIF_QUALITY)
+    return variants
+
+
+def derived_key(key: str, name: str) -> str:
+    """`uploads/7/abc.jpg` -> `derived/7/abc_thumb.webp`."""
+    stem = key[len(UPLOAD_PREFIX):].rsplit(".", 1)[0]
+    ext = "avif" if name == "avif" else "webp"
+    return f"{DERIVED_PREFIX}{stem}_{name}.{ext}"
+
+
+class DerivativePipeline:
+    def __init__(self, store: Optional[ObjectStore] = None, workers: int = DERIVATIVE_WORKERS):
+        self._store = store
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def store(self) -> ObjectStore:
+        if self._store is None:
+            self._store = store_from_env()
+        return self._store
+
+    def set_store(self, store: Optional[ObjectStore]) -> None:
+        self._store = store
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None
+
+    def submit(self, post_id: int, event_id: int, img_urls: List[str]) -> Optional[Future]:
+        """Queue a post's images; returns None when nothing needs processing."""
+        if not self.enabled or not img_urls:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cooktest-derivatives")
+            return self._executor.submit(self._run, post_id, event_id, list(img_urls))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def _run(self, post_id: int, event_id: int, img_urls: List[str]) -> None:
+        try:
+            self.process_post(post_id, event_id, img_urls)
+        except Exception:
+            DERIVATIVE_JOBS.inc(status="error")
+            log.exception("Failed to build image derivatives for post %s", post_id)
+
+    def process_image(self, event_id: int, url: str) -> Optional[Dict[str, str]]:
+        """Derivatives of one image as {name: url}; None for images this pipeline does not own."""
+        store = self.store
+        key = store.key_for_url(url)
+        if not key or not key.startswith(f"{UPLOAD_PREFIX}{event_id}/"):
+            DERIVATIVE_JOBS.inc(status="skipped")
+            return None
+        started = time.perf_counter()
+        rendered = render_variants(store.get(key))
+        out: Dict[str, str] = {}
+        for name, data in rendered.items():
+            target = derived_key(key, name)
+            store.put(target, data, "image/avif" if name == "avif" else "image/webp")
+            out[name] = store.url(target)
+        DERIVATIVE_SECONDS.observe(time.perf_counter() - started)
+        DERIVATIVE_JOBS.inc(status="ok")
+        return out
+
+    def process_post(self, post_id: int, event_id: int, img_urls: List[str]) -> List[Optional[Dict[str, str]]]:
+        """Build and store a post's derivatives.
+
+        Posts with nothing to build (no image under this event's uploads
+        prefix) still get `[null, ...]` written, so the backfill does not pick
+        them up again. A failure raises and leaves img_variants NULL for a retry.
+        """
+        variants = [self.process_image(event_id, url) for url in img_urls]
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                "UPDATE board SET img_variants=%s WHERE content_id=%s AND event_id=%s",
+                (json.dumps(variants), post_id, event_id),
+            )
+        if any(variants):
+            feed_cache.invalidate_event(event_id)
+        return variants
+
+
+derivative_pipeline = DerivativePipeline()
+
+
+def _add_img_variants_column(cur) -> None:
+    if not column_exists(cur, "board", "img_variants"):
+        cur.execute("ALTER TABLE board ADD COLUMN img_variants JSON NULL AFTER img_url")
+
+
+register_schema("board_img_variants", _add_img_variants_column)
+
+
+def parse_variants(raw: Any) -> List[Optional[Dict[str, str]]]:
+    if isinstance(raw, (bytes, str)):
+        try:
+            raw = json.loads(raw)
+        except Exception:
+            return []
+    if not isinstance(raw, list):
+        return []
+    return [v if isinstance(v, dict) else None for v in raw]
+
+
+def stop_derivative_pipeline() -> None:
+    """Let queued posts finish before the process exits."""
+    derivative_pipeline.shutdown(wait=True)
+
+
+def backfill(event_id: Optional[int] = None, chunk_size: int = 500, after: int = 0) -> Dict[str, int]:
+    """Synchronously build derivatives for posts that have images but no img_variants.
+
+    Walks board in content_id order past `after`, so posts that keep failing
+    are retried on the next run but never hold this one back.
+    """
+    from .router import _parse_imgs
+
+    chunk_size = max(1, chunk_size)
+    where = ["content_id > %s", "img_url IS NOT NULL", "img_url <> ''", "img_variants IS NULL"]
+    if event_id is not None:
+        where.append("event_id=%s")
+    stats = {"posts": 0, "processed": 0, "skipped": 0, "failed": 0, "last_id": after}
+    last_id = after
+    while True:
+        params: List[Any] = [last_id]
+        if event_id is not None:
+            params.append(event_id)
+        params.append(chunk_size)
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT content_id, event_id, img_url FROM board
+                WHERE {" AND ".join(where)}
+                ORDER BY content_id
+                LIMIT %s
+                """,
+                tuple(params),
+            )
+            rows = cur.fetchall() or []
+        if not rows:
+            break
+        last_id = int(rows[-1]["content_id"])
+        stats["posts"] += len(rows)
+        for r in rows:
+            try:
+                variants = derivative_pipeline.process_post(
+                    int(r["content_id"]), int(r["event_id"]), _parse_imgs(r["img_url"])
+                )
+            except Exception:
+                log.exception("Failed to build image derivatives for post %s", r["content_id"])
+                stats["failed"] += 1
+                continue
+            stats["processed" if any(variants) else "skipped"] += 1
+        stats["last_id"] = last_id
+        if len(rows) < chunk_size:
+            break
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m cooktest.derivatives")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("backfill", help="build thumbnails/WebP/AVIF for posts without img_variants")
+    cmd.add_argument("--event", type=int, default=None, help="only this event")
+    cmd.add_argument("--chunk", type=int, default=500, help="posts per query")
+    cmd.add_argument("--after", type=int, default=0, help="resume after this content_id")
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        if not derivative_pipeline.enabled:
+            parser.error("Pillow is not installed")
+        stats = backfill(args.event, args.chunk, args.after)
+        print(
+            f"posts={stats['posts']} processed={stats['processed']} skipped={stats['skipped']} "
+            f"failed={stats['failed']} last_id={stats['last_id']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Read-through cache for the CookTest tab's hottest reads.
+
+Holds the event list and the first (default-size) page of each event's feed
+per sort order, already serialized to JSON bytes with `img_urls` parsed, so a
+cache hit for an anonymous viewer is a plain byte copy. Signed-in viewers get
+the cached rows with `liked_by_me` overlaid by one board_likes lookup.
+
+Entries are dropped when a post is created, updated or deleted, and when a
+like_count flush touches a post of the event. COOKTEST_FEED_CACHE_TTL bounds
+staleness from writes handled by other workers.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from core.database import get_conn
+from core.metrics import metrics
+
+from .likes import like_counter
+
+FEED_CACHE_TTL = float(os.getenv("COOKTEST_FEED_CACHE_TTL", "30"))
+
+CACHE_REQUESTS = metrics.counter(
+    "cooktest_feed_cache_requests_total",
+    "CookTest feed cache lookups by kind (events/feed) and result (hit/miss).",
+    ["kind", "result"],
+)
+
+
+def serialize(value: Any) -> bytes:
+    """Encode like FastAPI's default JSON response (datetimes as ISO strings)."""
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass
+class FeedPage:
+    rows: List[Dict[str, Any]]
+    body: bytes
+    next_cursor: Optional[str]
+    expires_at: float
+
+
+class FeedCache:
+    def __init__(self, ttl: float = FEED_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._events: Optional[Tuple[bytes, float]] = None
+        self._pages: Dict[Tuple[int, str], FeedPage] = {}
+        # Bumped on every invalidation so a load that raced with a write is not stored
+        self._version = 0
+
+    def events(self, load: Callable[[], List[Dict[str, Any]]]) -> bytes:
+        now = time.monotonic()
+        with self._lock:
+            if self._events and self._events[1] > now:
+                CACHE_REQUESTS.inc(kind="events", result="hit")
+                return self._events[0]
+            version = self._version
+        CACHE_REQUESTS.inc(kind="events", result="miss")
+        body = serialize(load())
+        with self._lock:
+            if version == self._version:
+                self._events = (body, now + self.ttl)
+        return body
+
+    def first_page(
+        self,
+        event_id: int,
+        sort: str,
+        load: Callable[[], Tuple[List[Dict[str, Any]], Optional[str]]],
+    ) -> FeedPage:
+        key = (event_id, sort)
+        now = time.monotonic()
+        with self._lock:
+            page = self._pages.get(key)
+            if page and page.expires_at > now:
+                CACHE_REQUESTS.inc(kind="feed", result="hit")
+                return page
+            version = self._version
+        CACHE_REQUESTS.inc(kind="feed", result="miss")
+        rows, next_cursor = load()
+        page = FeedPage(rows=rows, body=serialize(rows), next_cursor=next_cursor, expires_at=now + self.ttl)
+        with self._lock:
+            if version == self._version:
+                self._pages[key] = page
+        return page
+
+    def invalidate_event(self, event_id: int, events_list: bool = False) -> None:
+        """Drop an event's cached feed pages (and the event list when its post count changed)."""
+        with self._lock:
+            self._version += 1
+            for key in [k for k in self._pages if k[0] == event_id]:
+                self._pages.pop(key, None)
+            if events_list:
+                self._events = None
+
+    def invalidate_posts(self, content_ids: Iterable[int]) -> None:
+        ids = list(content_ids)
+        if not ids:
+            return
+        placeholders = ", ".join(["%s"] * len(ids))
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"SELECT DISTINCT event_id FROM board WHERE content_id IN ({placeholders})",
+                tuple(ids),
+            )
+            event_ids = [r["event_id"] for r in cur.fetchall() or []]
+        for event_id in event_ids:
+            self.invalidate_event(int(event_id))
+
+
+feed_cache = FeedCache()
+
+# Flushed like_count deltas change `likes` and the "top" order of the posts' events
+like_counter.add_listener(feed_cache.invalidate_posts)
@@ -0,0 +1,205 @@
+"""Write-behind like counting for board posts.
+
+`board_likes` rows are still written synchronously by the like endpoints, but
+the denormalized `board.like_count` is no longer bumped per click: deltas are
+coalesced in memory and a background thread applies them every
+COOKTEST_LIKE_FLUSH_SEC with one UPDATE for all touched posts. Like
+notifications are collapsed the same way into one "N people liked" notice per
+post and window.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.database import get_conn
+from core.metrics import metrics
+from notifications.service import notify_many
+
+log = logging.getLogger(__name__)
+
+LIKE_FLUSH_SEC = float(os.getenv("COOKTEST_LIKE_FLUSH_SEC", "1"))
+LIKE_NOTIFY_WINDOW_SEC = float(os.getenv("COOKTEST_LIKE_NOTIFY_WINDOW", "60"))
+
+LIKE_FLUSHES = metrics.counter(
+    "cooktest_like_flush_total",
+    "like_count flushes to the board table by outcome.",
+    ["status"],
+)
+LIKE_POSTS_FLUSHED = metrics.counter(
+    "cooktest_like_posts_flushed_total",
+    "Posts whose like_count was updated by a flush.",
+)
+
+
+class LikeCounter:
+    """In-memory like_count deltas per content_id, flushed in one batched UPDATE."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas: Dict[int, int] = {}
+        self._listeners: List[Callable[[List[int]], None]] = []
+
+    def add_listener(self, listener: Callable[[List[int]], None]) -> None:
+        """Call `listener(content_ids)` after every successful flush."""
+        self._listeners.append(listener)
+
+    def add(self, content_id: int, delta: int) -> None:
+        with self._lock:
+            value = self._deltas.get(content_id, 0) + delta
+            if value:
+                self._deltas[content_id] = value
+            else:
+                self._deltas.pop(content_id, None)
+
+    def pending(self, content_id: int) -> int:
+        with self._lock:
+            return self._deltas.get(content_id, 0)
+
+    def pending_posts(self) -> int:
+        return len(self._deltas)
+
+    def flush(self) -> List[int]:
+        """Apply pending deltas; return the content_ids that were updated."""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        if not deltas:
+            return []
+        # Fixed content_id order keeps concurrent flushes from different workers deadlock-free
+        items = sorted(deltas.items())
+        cases = " ".join(["WHEN %s THEN %s"] * len(items))
+        params: List[int] = []
+        for content_id, delta in items:
+            params.extend([content_id, delta])
+        params.extend(content_id for content_id, _ in items)
+        placeholders = ", ".join(["%s"] * len(items))
+        try:
+            with get_conn() as conn, conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    UPDATE board
+                    SET like_count = GREATEST(0, CAST(like_count AS SIGNED) + CASE content_id {cases} ELSE 0 END)
+                    WHERE content_id IN ({placeholders})
+                    """,
+                    tuple(params),
+                )
+        except Exception:
+            LIKE_FLUSHES.inc(status="error")
+            log.exception("Failed to flush like_count for %d posts; will retry", len(items))
+            for content_id, delta in items:
+                self.add(content_id, delta)
+            return []
+        LIKE_FLUSHES.inc(status="ok")
+        LIKE_POSTS_FLUSHED.inc(len(items))
+        flushed = [content_id for content_id, _ in items]
+        for listener in list(self._listeners):
+            try:
+                listener(flushed)
+            except Exception:
+                log.exception("like flush listener failed")
+        return flushed
+
+
+class LikeNotifier:
+    """Collapse like notifications per post into one notice per window."""
+
+    def __init__(self, window_sec: float = LIKE_NOTIFY_WINDOW_SEC):
+        self.window = window_sec
+        self._lock = threading.Lock()
+        # content_id -> (owner_id, likers in order, window start)
+        self._pending: Dict[int, Tuple[str, List[str], float]] = {}
+
+    def liked(self, content_id: int, owner_id: str, liker_id: str) -> None:
+        with self._lock:
+            owner, likers, started = self._pending.get(content_id, (owner_id, [], time.monotonic()))
+            if liker_id not in likers:
+                likers.append(liker_id)
+            self._pending[content_id] = (owner, likers, started)
+
+    def unliked(self, content_id: int, liker_id: str) -> None:
+        with self._lock:
+            entry = self._pending.get(content_id)
+            if not entry or liker_id not in entry[1]:
+                return
+            entry[1].remove(liker_id)
+            if not entry[1]:
+                self._pending.pop(content_id, None)
+
+    def flush(self, force: bool = False) -> int:
+        """Send every notice whose window has closed (all of them when force); return how many."""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                (content_id, entry) for content_id, entry in self._pending.items()
+                if force or now - entry[2] >= self.window
+            ]
+            for content_id, _ in due:
+                self._pending.pop(content_id, None)
+        if not due:
+            return 0
+        rows = []
+        for content_id, (owner_id, likers, _) in due:
+            if len(likers) == 1:
+                body = f"{likers[0]}님이 게시글에 좋아요를 눌렀어요."
+            else:
+                body = f"{likers[0]}님 외 {len(likers) - 1}명이 게시글에 좋아요를 눌렀어요."
+            rows.append({
+                "user_id": owner_id,
+                "title": "새 좋아요",
+                "body": body,
+                "link_url": f"/boards/{content_id}",
+                "type": "like",
+                "related_id": content_id,
+            })
+        try:
+            notify_many(rows)
+        except Exception:
+            log.exception("Failed to send %d collapsed like notifications", len(rows))
+            return 0
+        return len(rows)
+
+
+like_counter = LikeCounter()
+like_notifier = LikeNotifier()
+
+metrics.gauge(
+    "cooktest_like_pending_posts",
+    "Posts with like_count deltas not yet flushed to the board table.",
+).set_function(like_counter.pending_posts)
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def flush_likes(force: bool = False) -> None:
+    like_counter.flush()
+    like_notifier.flush(force=force)
+
+
+def _loop() -> None:
+    while not _stop.wait(LIKE_FLUSH_SEC):
+        try:
+            flush_likes()
+        except Exception:
+            log.exception("Like flush loop failed")
+
+
+def start_like_pipeline() -> None:
+    global _thread
+    if _thread:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="cooktest-like-flush", daemon=True)
+    _thread.start()
+
+
+def stop_like_pipeline() -> None:
+    """Stop the flush thread and write out every pending delta and notice."""
+    global _thread
+    if _thread:
+        _stop.set()
+        _thread.join(timeout=LIKE_FLUSH_SEC + 5)
+        _thread = None
+    flush_likes(force=True)
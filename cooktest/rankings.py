@@ -0,0 +1,123 @@
+"""Ranking snapshots behind `sort=top` feed cursors.
+
+like_count changes while a client pages (the like pipeline flushes every
+COOKTEST_LIKE_FLUSH_SEC), so a (like_count, content_id) keyset can repeat or
+skip posts. Instead, the first `top` page stores the event's post ids in
+ranking order as a snapshot, and its cursor is (snapshot_id, offset): every
+later page slices the same id list, so each post appears exactly once per
+pagination. Likes shown on the rows stay current; only the order is pinned.
+Posts deleted since the snapshot are left out, posts created after it appear
+on the next first page.
+
+Snapshots hold at most FEED_RANK_SNAPSHOT_MAX ids, live FEED_RANK_SNAPSHOT_TTL
+seconds (an older cursor gets 410 and the client reloads the first page) and
+are pruned when new ones are written.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from core.database import get_conn
+from core.schema import register_schema
+
+FEED_RANK_SNAPSHOT_MAX = int(os.getenv("COOKTEST_RANK_SNAPSHOT_MAX", "5000"))
+FEED_RANK_SNAPSHOT_TTL = int(os.getenv("COOKTEST_RANK_SNAPSHOT_TTL", "3600"))
+FEED_RANK_CACHE_SIZE = 256
+
+FEED_RANK_SNAPSHOT_DDL = """
+CREATE TABLE IF NOT EXISTS feed_rank_snapshot (
+  snapshot_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  event_id BIGINT NOT NULL,
+  scope VARCHAR(100) NOT NULL,
+  post_ids MEDIUMTEXT NOT NULL,
+  created_at DATETIME NOT NULL,
+  KEY idx_feed_rank_snapshot_created (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+register_schema("feed_rank_snapshot", FEED_RANK_SNAPSHOT_DDL)
+
+
+class SnapshotExpired(LookupError):
+    pass
+
+
+@dataclass(frozen=True)
+class RankSnapshot:
+    snapshot_id: int
+    event_id: int
+    # '' for the public feed, 'mine:<user>' / 'liked:<user>' for filtered views
+    scope: str
+    post_ids: Tuple[int, ...]
+
+
+def snapshot_scope(view: Optional[str], viewer: Optional[str]) -> str:
+    return f"{view}:{viewer}" if view in ("mine", "liked") else ""
+
+
+class RankSnapshots:
+    """Writes snapshots and keeps recently used ones in memory (they never change once written)."""
+
+    def __init__(self, cache_size: int = FEED_RANK_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # snapshot_id -> (snapshot, monotonic expiry)
+        self._cache: "OrderedDict[int, Tuple[RankSnapshot, float]]" = OrderedDict()
+
+    def _remember(self, snapshot: RankSnapshot, ttl: float = FEED_RANK_SNAPSHOT_TTL) -> None:
+        with self._lock:
+            self._cache[snapshot.snapshot_id] = (snapshot, time.monotonic() + ttl)
+            self._cache.move_to_end(snapshot.snapshot_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def create(self, event_id: int, scope: str, post_ids: Sequence[int]) -> RankSnapshot:
+        ids = tuple(int(i) for i in post_ids[:FEED_RANK_SNAPSHOT_MAX])
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM feed_rank_snapshot WHERE created_at < NOW() - INTERVAL %s SECOND LIMIT 1000",
+                (FEED_RANK_SNAPSHOT_TTL,),
+            )
+            cur.execute(
+                """
+                INSERT INTO feed_rank_snapshot (event_id, scope, post_ids, created_at)
+                VALUES (%s, %s, %s, NOW())
+                """,
+                (event_id, scope, json.dumps(ids)),
+            )
+            snapshot = RankSnapshot(int(cur.lastrowid), event_id, scope, ids)
+        self._remember(snapshot)
+        return snapshot
+
+    def get(self, snapshot_id: int, event_id: int, scope: str) -> RankSnapshot:
+        """The snapshot a cursor points at; ValueError when it belongs to another feed, SnapshotExpired when gone."""
+        with self._lock:
+            cached = self._cache.get(snapshot_id)
+        snapshot = cached[0] if cached and cached[1] > time.monotonic() else None
+        if snapshot is None:
+            with get_conn() as conn, conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT event_id, scope, post_ids, TIMESTAMPDIFF(SECOND, created_at, NOW()) AS age_sec
+                    FROM feed_rank_snapshot
+                    WHERE snapshot_id=%s AND created_at >= NOW() - INTERVAL %s SECOND
+                    """,
+                    (snapshot_id, FEED_RANK_SNAPSHOT_TTL),
+                )
+                row = cur.fetchone()
+            if not row:
+                raise SnapshotExpired(snapshot_id)
+            ids: List[int] = json.loads(row["post_ids"])
+            snapshot = RankSnapshot(snapshot_id, int(row["event_id"]), str(row["scope"]), tuple(ids))
+            self._remember(snapshot, FEED_RANK_SNAPSHOT_TTL - int(row["age_sec"] or 0))
+        if snapshot.event_id != event_id or snapshot.scope != scope:
+            raise ValueError("cursor belongs to another feed")
+        return snapshot
+
+
+rank_snapshots = RankSnapshots()
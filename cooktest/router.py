@@ -1,22 +1,22 @@
-﻿from typing import Any, Dict, List, Optional
+﻿from typing import Any, Dict, List, Optional, Set, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from core import get_conn, get_current_user
+from core.pagination import decode_cursor, encode_cursor
+from core.schema import index_exists, register_schema
 from core.security import bearer, token_service
-from notifications.service import notify
+from .derivatives import derivative_pipeline, parse_variants
+from .feed_cache import feed_cache
+from .likes import like_counter, like_notifier
+from .rankings import FEED_RANK_SNAPSHOT_MAX, SnapshotExpired, rank_snapshots, snapshot_scope
+from .storage import MAX_BATCH, PRESIGN_EXPIRES_SEC, StorageUnavailable, get_presigner
 import os
 import uuid
 from datetime import datetime
 import json
 import re
 from pymysql.err import ProgrammingError
-try:
-    import boto3
-    from botocore.config import Config as BotoConfig
-except Exception:
-    boto3 = None
-    BotoConfig = None
 
 
 router = APIRouter()
@@ -40,6 +40,24 @@ def _parse_imgs(raw: Any) -> List[str]:
     return []
 
 
+def _with_imgs(row: Dict[str, Any], thumbnails: bool = False) -> Dict[str, Any]:
+    """Add `img_urls` (list) and `img_url` (first or null) parsed from the img_url column.
+
+    `img_variants` is aligned with `img_urls` ({thumb, webp[, avif]} or null per
+    image). Feed rows pass thumbnails=True to get thumbnail URLs in `img_urls`
+    wherever one has been generated; the detail view keeps the originals.
+    """
+    imgs = _parse_imgs(row.get("img_url"))
+    variants = parse_variants(row.get("img_variants"))
+    variants = [variants[i] if i < len(variants) else None for i in range(len(imgs))]
+    if thumbnails:
+        imgs = [v["thumb"] if v and v.get("thumb") else url for url, v in zip(imgs, variants)]
+    row["img_urls"] = imgs
+    row["img_variants"] = variants
+    row["img_url"] = imgs[0] if imgs else None
+    return row
+
+
 def _user_id_variants(raw: str) -> List[str]:
     base = (raw or "").strip()
     if not base:
@@ -76,10 +94,13 @@ def list_events() -> List[Dict[str, Any]]:
         ORDER BY e.start_date DESC
         """
     )
-    with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(sql)
-        rows = cur.fetchall()
-    return rows
+
+    def load() -> List[Dict[str, Any]]:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(sql)
+            return cur.fetchall()
+
+    return Response(content=feed_cache.events(load), media_type="application/json")
 
 
 @router.get("/events/{event_id}")
@@ -117,60 +138,221 @@ def _get_optional_user(request: Request) -> Optional[str]:
     return None
 
 
+FEED_PAGE_SIZE = int(os.getenv("COOKTEST_FEED_PAGE_SIZE", "30"))
+FEED_MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# sort -> (sort column, response field holding its value) for keyset sorts; `top` pages over rank snapshots
+FEED_SORTS = {
+    "latest": ("b.created_at", "created_at"),
+}
+
+
 @router.get("/events/{event_id}/posts")
-def list_posts(event_id: int, request: Request, view: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Return posts for an event in feed format expected by the frontend.
+def list_posts(
+    event_id: int,
+    request: Request,
+    response: Response,
+    view: Optional[str] = None,
+    sort: str = Query(default="latest", pattern="^(latest|top)$"),
+    cursor: Optional[str] = Query(default=None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(default=FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+) -> List[Dict[str, Any]]:
+    """Return one page of an event's posts in feed format expected by the frontend.
+
+    Pages are keyset-ordered by (created_at, content_id) for `sort=latest`,
+    newest first. `sort=top` pages over a most-liked-first ranking snapshot
+    taken with the first page, so likes arriving while a client pages never
+    repeat or skip a post (an expired snapshot cursor gets 410). When more
+    posts exist the token for the next page is returned in the X-Next-Cursor
+    header. Each row carries `liked_by_me` for the signed-in viewer (0 when
+    anonymous), plus `img_urls` (list) and `img_url` (first or null).
+    """
+    try:
+        after = decode_cursor(cursor, 2)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+    viewer = _get_optional_user(request)
+    if view in ("mine", "liked") and not viewer:
+        raise HTTPException(status_code=401, detail="Login required")
+
+    if view is None and after is None and limit == FEED_PAGE_SIZE:
+        # Default first page: served from feed_cache, liked_by_me overlaid per viewer
+        page = feed_cache.first_page(
+            event_id, sort, lambda: _query_feed(event_id, sort, None, FEED_PAGE_SIZE, None, None)
+        )
+        headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else {}
+        if not viewer or not page.rows:
+            return Response(content=page.body, media_type="application/json", headers=headers)
+        response.headers.update(headers)
+        liked = _liked_post_ids(viewer, [r["post_id"] for r in page.rows])
+        return [dict(r, liked_by_me=1 if r["post_id"] in liked else 0) for r in page.rows]
+
+    rows, next_cursor = _query_feed(event_id, sort, after, limit, viewer, view)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
 
-    Supports multiple images stored as JSON array in `img_url` column. Adds both
-    `img_urls` (list) and `img_url` (first or null) to each row for compatibility.
+def _query_feed(
+    event_id: int,
+    sort: str,
+    after: Optional[List[Any]],
+    limit: int,
+    viewer: Optional[str],
+    view: Optional[str],
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of an event's feed and the cursor of the next page (None on the last page).
+
+    `latest` is a keyset over (created_at, content_id); `top` pages over a
+    ranking snapshot (cooktest.rankings) with (snapshot_id, offset) cursors.
     """
-    sql = (
-        """
-        SELECT
-          content_id AS post_id,
-          event_id,
-          id,
-          content_title,
-          content_text,
-          img_url,
-          like_count AS likes,
-          created_at
-        FROM board
-        WHERE event_id=%s
-        """
+    if sort == "top":
+        return _query_top_feed(event_id, after, limit, viewer, view)
+
+    sort_col, sort_field = FEED_SORTS[sort]
+    extra: List[str] = []
+    extra_params: List[Any] = []
+    if after:
+        extra.append(f"({sort_col} < %s OR ({sort_col} = %s AND b.content_id < %s))")
+        extra_params.extend([after[0], after[0], after[1]])
+    rows = _select_feed_rows(
+        event_id, viewer, view, extra, extra_params, f"ORDER BY {sort_col} DESC, b.content_id DESC", limit + 1
     )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[sort_field], last["post_id"])
+    return [_with_imgs(r, thumbnails=True) for r in rows], next_cursor
+
+
+def _query_top_feed(
+    event_id: int,
+    after: Optional[List[Any]],
+    limit: int,
+    viewer: Optional[str],
+    view: Optional[str],
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    scope = snapshot_scope(view, viewer)
+    if after:
+        try:
+            snapshot = rank_snapshots.get(int(after[0]), event_id, scope)
+            offset = max(0, int(after[1]))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="invalid cursor")
+        except SnapshotExpired:
+            raise HTTPException(status_code=410, detail="cursor expired; reload the first page")
+    else:
+        ranked = _select_feed_ids(event_id, viewer, view, "ORDER BY b.like_count DESC, b.content_id DESC")
+        snapshot = rank_snapshots.create(event_id, scope, ranked)
+        offset = 0
+
+    page_ids = list(snapshot.post_ids[offset:offset + limit])
+    rows: List[Dict[str, Any]] = []
+    if page_ids:
+        placeholders = ", ".join(["%s"] * len(page_ids))
+        found = _select_feed_rows(event_id, viewer, view, [f"b.content_id IN ({placeholders})"], page_ids, "", None)
+        by_id = {int(r["post_id"]): r for r in found}
+        # Snapshot order; posts deleted since the snapshot are simply missing
+        rows = [by_id[i] for i in page_ids if i in by_id]
+
+    next_offset = offset + limit
+    next_cursor = encode_cursor(snapshot.snapshot_id, next_offset) if next_offset < len(snapshot.post_ids) else None
+    return [_with_imgs(r, thumbnails=True) for r in rows], next_cursor
+
+
+def _feed_filter(
+    event_id: int, viewer: Optional[str], view: Optional[str]
+) -> Tuple[str, str, List[str], List[Any]]:
+    """(like_select, like_join, where, params) shared by the feed queries."""
+    params: List[Any] = []
+    if view == "liked":
+        like_join = "JOIN board_likes bl ON bl.content_id = b.content_id AND bl.id=%s"
+        like_select = "1 AS liked_by_me"
+        params.append(viewer)
+    elif viewer:
+        like_join = "LEFT JOIN board_likes bl ON bl.content_id = b.content_id AND bl.id=%s"
+        like_select = "CASE WHEN bl.id IS NULL THEN 0 ELSE 1 END AS liked_by_me"
+        params.append(viewer)
+    else:
+        like_join = ""
+        like_select = "0 AS liked_by_me"
+
+    where = ["b.event_id=%s"]
+    params.append(event_id)
+    if view == "mine":
+        where.append("b.id=%s")
+        params.append(viewer)
+    return like_select, like_join, where, params
+
+
+def _select_feed_ids(event_id: int, viewer: Optional[str], view: Optional[str], order_by: str) -> List[int]:
+    _, like_join, where, params = _feed_filter(event_id, viewer, view)
+    params.append(FEED_RANK_SNAPSHOT_MAX)
+    sql = f"""
+        SELECT b.content_id
+        FROM board b
+        {like_join}
+        WHERE {" AND ".join(where)}
+        {order_by}
+        LIMIT %s
+    """
     with get_conn() as conn, conn.cursor() as cur:
-        params: List[Any] = [event_id]
-        if view == "mine":
-            current_user = _get_optional_user(request)
-            if not current_user:
-                raise HTTPException(status_code=401, detail="Login required")
-            sql += " AND id=%s"
-            params.append(current_user)
-        elif view == "liked":
-            current_user = _get_optional_user(request)
-            if not current_user:
-                raise HTTPException(status_code=401, detail="Login required")
-            sql += " AND content_id IN (SELECT content_id FROM board_likes WHERE id=%s)"
-            params.append(current_user)
-        sql += " ORDER BY created_at DESC"
         cur.execute(sql, tuple(params))
-        rows = cur.fetchall()
-    out: List[Dict[str, Any]] = []
-    for r in rows:
-        raw = r.get("img_url")
-        imgs: List[str] = []
-        if isinstance(raw, str) and raw.strip().startswith("["):
-            try:
-                imgs = json.loads(raw)
-            except Exception:
-                imgs = []
-        elif isinstance(raw, str) and raw.strip():
-            imgs = [raw.strip()]
-        r["img_urls"] = imgs
-        r["img_url"] = imgs[0] if imgs else None
-        out.append(r)
-    return out
+        return [int(r["content_id"]) for r in cur.fetchall() or []]
+
+
+def _select_feed_rows(
+    event_id: int,
+    viewer: Optional[str],
+    view: Optional[str],
+    extra_where: List[str],
+    extra_params: List[Any],
+    order_by: str,
+    limit: Optional[int],
+) -> List[Dict[str, Any]]:
+    like_select, like_join, where, params = _feed_filter(event_id, viewer, view)
+    where = where + extra_where
+    params.extend(extra_params)
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT %s"
+        params.append(limit)
+
+    sql = f"""
+        SELECT
+          b.content_id AS post_id,
+          b.event_id,
+          b.id,
+          b.content_title,
+          b.content_text,
+          b.img_url,
+          b.img_variants,
+          b.like_count AS likes,
+          b.created_at,
+          {like_select}
+        FROM board b
+        {like_join}
+        WHERE {" AND ".join(where)}
+        {order_by}
+        {limit_sql}
+    """
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return list(cur.fetchall() or [])
+
+
+def _liked_post_ids(viewer: str, post_ids: List[int]) -> Set[int]:
+    placeholders = ", ".join(["%s"] * len(post_ids))
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            f"SELECT content_id FROM board_likes WHERE id=%s AND content_id IN ({placeholders})",
+            (viewer, *post_ids),
+        )
+        return {int(r["content_id"]) for r in cur.fetchall() or []}
 
 
 @router.get("/events/{event_id}/posts/{post_id}")
@@ -185,6 +367,7 @@ def get_post(event_id: int, post_id: int) -> Dict[str, Any]:
           content_title,
           content_text,
           img_url,
+          img_variants,
           like_count AS likes,
           created_at
         FROM board
@@ -196,18 +379,7 @@ def get_post(event_id: int, post_id: int) -> Dict[str, Any]:
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Post not found")
-        raw = row.get("img_url")
-        imgs: List[str] = []
-        if isinstance(raw, str) and raw.strip().startswith("["):
-            try:
-                imgs = json.loads(raw)
-            except Exception:
-                imgs = []
-        elif isinstance(raw, str) and raw.strip():
-            imgs = [raw.strip()]
-        row["img_urls"] = imgs
-        row["img_url"] = imgs[0] if imgs else None
-        return row
+        return _with_imgs(row)
 
 
 @router.post("/events/{event_id}/posts")
@@ -248,6 +420,7 @@ def create_post(
               content_title,
               content_text,
               img_url,
+              img_variants,
               like_count AS likes,
               created_at
             FROM board
@@ -255,18 +428,11 @@ def create_post(
             """
         )
         row = cur.fetchone()
-        raw = row.get("img_url")
-        imgs: List[str] = []
-        if isinstance(raw, str) and raw.strip().startswith("["):
-            try:
-                imgs = json.loads(raw)
-            except Exception:
-                imgs = []
-        elif isinstance(raw, str) and raw.strip():
-            imgs = [raw.strip()]
-        row["img_urls"] = imgs
-        row["img_url"] = imgs[0] if imgs else None
-        return row
+    feed_cache.invalidate_event(event_id, events_list=True)
+    post = _with_imgs(row)
+    # Thumbnail/WebP/AVIF renditions are built off the request path and land in board.img_variants
+    derivative_pipeline.submit(post["post_id"], event_id, post["img_urls"])
+    return post
 
 
 @router.put("/events/{event_id}/posts/{post_id}")
@@ -307,6 +473,7 @@ def update_post(
               content_title,
               content_text,
               img_url,
+              img_variants,
               like_count AS likes,
               created_at
             FROM board
@@ -317,18 +484,8 @@ def update_post(
         updated = cur.fetchone()
         if not updated:
             raise HTTPException(status_code=404, detail="Post not found")
-        raw = updated.get("img_url")
-        imgs: List[str] = []
-        if isinstance(raw, str) and raw.strip().startswith("["):
-            try:
-                imgs = json.loads(raw)
-            except Exception:
-                imgs = []
-        elif isinstance(raw, str) and raw.strip():
-            imgs = [raw.strip()]
-        updated["img_urls"] = imgs
-        updated["img_url"] = imgs[0] if imgs else None
-        return updated
+    feed_cache.invalidate_event(event_id)
+    return _with_imgs(updated)
 
 
 @router.delete("/events/{event_id}/posts/{post_id}")
@@ -351,27 +508,40 @@ def delete_post(
         cur.execute("DELETE FROM board WHERE content_id=%s AND event_id=%s", (post_id, event_id))
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Post not found")
+    feed_cache.invalidate_event(event_id, events_list=True)
     return {"status": "deleted"}
 
 
-def _ensure_likes_table(cur) -> None:
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS board_likes (
-          content_id INT NOT NULL,
-          id VARCHAR(255) NOT NULL,
-          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-          PRIMARY KEY (content_id, id),
-          INDEX (content_id)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """
-    )
+BOARD_LIKES_DDL = """
+CREATE TABLE IF NOT EXISTS board_likes (
+  content_id INT NOT NULL,
+  id VARCHAR(255) NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (content_id, id),
+  INDEX (content_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Keyset indexes for the event feed's two sort orders
+BOARD_FEED_INDEXES = {
+    "idx_board_event_created": "(event_id, created_at, content_id)",
+    "idx_board_event_likes": "(event_id, like_count, content_id)",
+}
+
+
+def _ensure_board_feed_indexes(cur) -> None:
+    for name, columns in BOARD_FEED_INDEXES.items():
+        if not index_exists(cur, "board", name):
+            cur.execute(f"ALTER TABLE board ADD INDEX {name} {columns}")
+
+
+register_schema("board_likes", BOARD_LIKES_DDL)
+register_schema("board_feed_indexes", _ensure_board_feed_indexes)
 
 
 @router.get("/events/{event_id}/likes/me", dependencies=[Depends(get_current_user)])
 def get_my_likes(event_id: int, current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
     with get_conn() as conn, conn.cursor() as cur:
-        _ensure_likes_table(cur)
         cur.execute(
             """
             SELECT bl.content_id AS post_id
@@ -409,6 +579,7 @@ def list_user_cooktest_posts(id: str, request: Request) -> Dict[str, Any]:
               b.content_title,
               b.content_text,
               b.img_url,
+              b.img_variants,
               b.like_count AS likes,
               b.created_at,
               e.event_name,
@@ -429,6 +600,7 @@ def list_user_cooktest_posts(id: str, request: Request) -> Dict[str, Any]:
               b.content_title,
               b.content_text,
               b.img_url,
+              b.img_variants,
               b.like_count AS likes,
               b.created_at,
               e.event_name,
@@ -449,10 +621,7 @@ def list_user_cooktest_posts(id: str, request: Request) -> Dict[str, Any]:
         rows = cur.fetchall()
         posts: List[Dict[str, Any]] = []
         for row in rows:
-            imgs = _parse_imgs(row.get("img_url"))
-            row["img_urls"] = imgs
-            row["img_url"] = imgs[0] if imgs else row.get("img_url")
-            posts.append(row)
+            posts.append(_with_imgs(row, thumbnails=True))
 
         cur.execute(
             """
@@ -475,9 +644,13 @@ def list_user_cooktest_posts(id: str, request: Request) -> Dict[str, Any]:
 
 @router.post("/posts/{post_id}/like", dependencies=[Depends(get_current_user)])
 def like_post(post_id: int, current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
+    """Record the like now; board.like_count and the owner notification are written behind (see cooktest.likes)."""
     uid = current_user
     with get_conn() as conn, conn.cursor() as cur:
-        _ensure_likes_table(cur)
+        cur.execute("SELECT id, like_count AS likes FROM board WHERE content_id=%s", (post_id,))
+        row = cur.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Post not found")
         cur.execute(
             """
             INSERT IGNORE INTO board_likes (content_id, id)
@@ -486,108 +659,92 @@ def like_post(post_id: int, current_user: str = Depends(get_current_user)) -> Di
             (post_id, uid),
         )
         new_like = (cur.rowcount == 1)
-        if new_like:
-            cur.execute(
-                "UPDATE board SET like_count = like_count + 1 WHERE content_id=%s",
-                (post_id,),
-            )
-        cur.execute("SELECT id, like_count AS likes FROM board WHERE content_id=%s", (post_id,))
-        row = cur.fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="Post not found")
-        owner_id, like_count = row["id"], row["likes"]
-    # Notify on every new like (except self-like)
-    if new_like and str(uid) != str(owner_id):
-        notify(
-            user_id=str(owner_id),
-            title="새 좋아요",
-            body=f"{uid}님이 게시글에 좋아요를 눌렀어요.",
-            link_url=f"/boards/{post_id}",
-            type="like",
-            related_id=post_id,
-        )
-    return {"likes": like_count, "liked": True}
+    owner_id = row["id"]
+    if new_like:
+        like_counter.add(post_id, 1)
+        # Self-likes are counted but not notified
+        if str(uid) != str(owner_id):
+            like_notifier.liked(post_id, str(owner_id), str(uid))
+    return {"likes": max(0, int(row["likes"] or 0) + like_counter.pending(post_id)), "liked": True}
 
 
 @router.delete("/posts/{post_id}/like", dependencies=[Depends(get_current_user)]) 
 def unlike_post(post_id: int, current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
     uid = current_user
     with get_conn() as conn, conn.cursor() as cur:
-        _ensure_likes_table(cur)
-        cur.execute(
-            "DELETE FROM board_likes WHERE content_id=%s AND id=%s",
-            (post_id, uid),
-        )
-        if cur.rowcount == 1:
-            cur.execute(
-                """
-                UPDATE board
-                SET like_count = CASE WHEN like_count > 0 THEN like_count - 1 ELSE 0 END
-                WHERE content_id=%s
-                """,
-                (post_id,),
-            )
         cur.execute("SELECT like_count AS likes FROM board WHERE content_id=%s", (post_id,))
         row = cur.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Post not found")
-        return {"likes": row["likes"], "liked": False}
+        cur.execute(
+            "DELETE FROM board_likes WHERE content_id=%s AND id=%s",
+            (post_id, uid),
+        )
+        removed = (cur.rowcount == 1)
+    if removed:
+        like_counter.add(post_id, -1)
+        like_notifier.unliked(post_id, str(uid))
+    return {"likes": max(0, int(row["likes"] or 0) + like_counter.pending(post_id)), "liked": False}
 
 
 # -------- S3 Presigned Uploads --------
 
 @router.post("/events/{event_id}/presigned-urls")
 def generate_presigned_urls(event_id: int, body: Dict[str, Any], current_user: str = Depends(get_current_user)) -> Dict[str, Any]:
-    """Generate S3 presigned PUT URLs for images and return their final file URLs.
+    """Generate S3 presigned upload targets for images and return their final file URLs.
 
-    Request body: { "file_exts": ["jpg", "png", ...] }
-    Returns: { upload_list: [ { upload_url, file_url, file_name } ], expires_in }
-    """
-    if boto3 is None:
-        raise HTTPException(status_code=500, detail="boto3 not available on server")
+    Request body: { "file_exts": ["jpg", "png", ...], "method": "put" | "post" }
+    Returns: { upload_list: [ { upload_url, file_url, file_name[, fields] } ], expires_in }
 
+    With method "post" each item also carries the form `fields` of a presigned
+    POST policy, which lets S3 enforce the content type and size limit.
+    """
     file_exts = body.get("file_exts") or []
     if not isinstance(file_exts, list) or not all(isinstance(x, str) for x in file_exts):
         raise HTTPException(status_code=400, detail="file_exts must be a string array")
     if len(file_exts) == 0:
         raise HTTPException(status_code=400, detail="no files requested")
-    if len(file_exts) > 7:
-        raise HTTPException(status_code=400, detail="Up to 7 files allowed")
-
-    region = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "ap-northeast-2"
-    bucket = os.getenv("AWS_S3_BUCKET") or os.getenv("S3_BUCKET")
-    if not bucket:
-        raise HTTPException(status_code=500, detail="S3 bucket not configured")
-
-    # Use region-specific S3 endpoint to avoid 301 redirects that break CORS preflight
-    s3 = boto3.client(
-        "s3",
-        region_name=region,
-        endpoint_url=f"https://s3.{region}.amazonaws.com",
-        config=BotoConfig(signature_version="s3v4", s3={"addressing_style": "virtual"}),
-    )
+    if len(file_exts) > MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"Up to {MAX_BATCH} files allowed")
+    method = str(body.get("method") or "put").lower()
+    if method not in ("put", "post"):
+        raise HTTPException(status_code=400, detail="method must be put or post")
 
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
-    upload_list: List[Dict[str, str]] = []
+    items: List[Tuple[str, str]] = []
     for ext in file_exts:
         ext = ext.strip(".").lower()
         if ext not in ("jpg", "jpeg", "png"):
             raise HTTPException(status_code=400, detail=f"Unsupported extension {ext}")
         file_name = f"{current_user}_{event_id}_{now}_{uuid.uuid4()}.{ext}"
-        key = f"uploads/{event_id}/{file_name}"
-        try:
-            url = s3.generate_presigned_url(
-                ClientMethod="put_object",
-                Params={
-                    "Bucket": bucket,
-                    "Key": key,
-                    "ContentType": ("image/png" if ext == "png" else "image/jpeg"),
-                },
-                ExpiresIn=300,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Presign failed: {e}")
-        file_url = f"https://{bucket}.s3.{region}.amazonaws.com/{key}"
-        upload_list.append({"upload_url": url, "file_url": file_url, "file_name": file_name})
-
-    return {"status": "ready", "event_id": event_id, "user_id": current_user, "upload_list": upload_list, "expires_in": 300}
+        items.append((f"uploads/{event_id}/{file_name}", "image/png" if ext == "png" else "image/jpeg"))
+
+    presigner = get_presigner()
+    try:
+        if method == "post":
+            signed = presigner.presign_posts(items, expires_in=PRESIGN_EXPIRES_SEC)
+        else:
+            signed = presigner.presign_puts(items, expires_in=PRESIGN_EXPIRES_SEC)
+    except StorageUnavailable as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Presign failed: {e}")
+
+    upload_list: List[Dict[str, Any]] = []
+    for item in signed:
+        entry = {
+            "upload_url": item["upload_url"],
+            "file_url": item["file_url"],
+            "file_name": item["key"].rsplit("/", 1)[-1],
+        }
+        if "fields" in item:
+            entry["fields"] = item["fields"]
+        upload_list.append(entry)
+
+    return {
+        "status": "ready",
+        "event_id": event_id,
+        "user_id": current_user,
+        "upload_list": upload_list,
+        "expires_in": PRESIGN_EXPIRES_SEC,
+    }
@@ -0,0 +1,170 @@
+"""Process-wide S3 presigner for CookTest uploads.
+
+Building a boto3 client resolves credentials, loads the botocore service model
+and sets up the endpoint — tens of milliseconds per call — so the client is
+created once, lazily, and shared. botocore clients are thread-safe, and
+credentials coming from the default chain (instance/task role, SSO, assumed
+role) are refreshable, so the shared client keeps signing with fresh keys.
+Presigning itself is a local HMAC computation; a batch of up to 7 keys makes
+no network calls.
+
+AWS_S3_ENDPOINT_URL points the presigner at an S3 stand-in (moto server,
+MinIO, LocalStack); AWS_S3_PUBLIC_BASE_URL overrides the base of the returned
+file URLs.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+except Exception:
+    boto3 = None
+    BotoConfig = None
+
+PRESIGN_EXPIRES_SEC = int(os.getenv("COOKTEST_PRESIGN_EXPIRES", "300"))
+UPLOAD_MAX_BYTES = int(os.getenv("COOKTEST_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+MAX_BATCH = 7
+
+
+class StorageUnavailable(RuntimeError):
+    """boto3 is missing or the bucket is not configured."""
+
+
+class S3Presigner:
+    def __init__(
+        self,
+        bucket: Optional[str],
+        region: str,
+        endpoint_url: Optional[str] = None,
+        public_base_url: Optional[str] = None,
+        client: Any = None,
+    ):
+        self.bucket = bucket
+        self.region = region
+        # Use region-specific S3 endpoint to avoid 301 redirects that break CORS preflight
+        self.endpoint_url = endpoint_url or f"https://s3.{region}.amazonaws.com"
+        self.public_base_url = (public_base_url or "").rstrip("/") or None
+        self._client = client
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "S3Presigner":
+        return cls(
+            bucket=os.getenv("AWS_S3_BUCKET") or os.getenv("S3_BUCKET"),
+            region=os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION") or "ap-northeast-2",
+            endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL") or None,
+            public_base_url=os.getenv("AWS_S3_PUBLIC_BASE_URL") or None,
+        )
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self):
+        if boto3 is None:
+            raise StorageUnavailable("boto3 not available on server")
+        # A private session: boto3's default session is not safe to share across threads while creating clients
+        session = boto3.session.Session()
+        return session.client(
+            "s3",
+            region_name=self.region,
+            endpoint_url=self.endpoint_url,
+            config=BotoConfig(signature_version="s3v4", s3={"addressing_style": "virtual"}),
+        )
+
+    def reset(self) -> None:
+        """Drop the shared client, e.g. after static credentials in the environment were rotated."""
+        with self._lock:
+            self._client = None
+
+    def _require_bucket(self) -> str:
+        if not self.bucket:
+            raise StorageUnavailable("S3 bucket not configured")
+        return self.bucket
+
+    def public_url(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    def presign_puts(
+        self,
+        items: Sequence[Tuple[str, str]],
+        expires_in: int = PRESIGN_EXPIRES_SEC,
+    ) -> List[Dict[str, str]]:
+        """Presigned PUT URLs for (key, content_type) pairs, computed locally."""
+        if len(items) > MAX_BATCH:
+            raise ValueError(f"Up to {MAX_BATCH} files allowed")
+        bucket = self._require_bucket()
+        client = self.client
+        return [
+            {
+                "key": key,
+                "upload_url": client.generate_presigned_url(
+                    ClientMethod="put_object",
+                    Params={"Bucket": bucket, "Key": key, "ContentType": content_type},
+                    ExpiresIn=expires_in,
+                ),
+                "file_url": self.public_url(key),
+            }
+            for key, content_type in items
+        ]
+
+    def presign_posts(
+        self,
+        items: Sequence[Tuple[str, str]],
+        expires_in: int = PRESIGN_EXPIRES_SEC,
+        max_bytes: int = UPLOAD_MAX_BYTES,
+    ) -> List[Dict[str, Any]]:
+        """Presigned POST policies for (key, content_type) pairs.
+
+        Unlike a presigned PUT, the policy pins the content type and caps the
+        upload size (content-length-range) on the S3 side.
+        """
+        if len(items) > MAX_BATCH:
+            raise ValueError(f"Up to {MAX_BATCH} files allowed")
+        bucket = self._require_bucket()
+        client = self.client
+        out: List[Dict[str, Any]] = []
+        for key, content_type in items:
+            post = client.generate_presigned_post(
+                Bucket=bucket,
+                Key=key,
+                Fields={"Content-Type": content_type},
+                Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+                ExpiresIn=expires_in,
+            )
+            out.append({
+                "key": key,
+                "upload_url": post["url"],
+                "fields": post["fields"],
+                "file_url": self.public_url(key),
+            })
+        return out
+
+
+_presigner: Optional[S3Presigner] = None
+_presigner_lock = threading.Lock()
+
+
+def get_presigner() -> S3Presigner:
+    global _presigner
+    if _presigner is None:
+        with _presigner_lock:
+            if _presigner is None:
+                _presigner = S3Presigner.from_env()
+    return _presigner
+
+
+def set_presigner(presigner: Optional[S3Presigner]) -> None:
+    """Swap the process-wide presigner (tests point it at a moto/MinIO endpoint)."""
+    global _presigner
+    with _presigner_lock:
+        _presigner = presigner
@@ -0,0 +1,230 @@
+"""Minimal in-process metrics registry with Prometheus text exposition."""
+
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def label_values(self) -> List[LabelValues]:
+        with self._lock:
+            return list(self._values)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Compute the (unlabelled) value lazily at scrape time."""
+        self._callback = fn
+
+    def value(self, **labels: str) -> float:
+        if self._callback is not None:
+            return float(self._callback())
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                return [f"{self.name} {_format_value(float(self._callback()))}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def snapshot(self, **labels: str) -> Dict[str, object]:
+        """Return count/sum and bucket-interpolated quantiles for one label set."""
+        key = self._key(labels)
+        with self._lock:
+            counts = list(self._counts.get(key, [0] * len(self.buckets)))
+            total_sum = self._sums.get(key, 0.0)
+        total = sum(counts)
+        return {
+            "count": total,
+            "sum": round(total_sum, 6),
+            "avg": round(total_sum / total, 6) if total else None,
+            "p50": self._quantile(counts, total, 0.5),
+            "p95": self._quantile(counts, total, 0.95),
+            "p99": self._quantile(counts, total, 0.99),
+        }
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                if bound == float("inf"):
+                    return lower
+                return round(lower + (bound - lower) * ((rank - seen) / count), 6)
+            seen += count
+            if bound != float("inf"):
+                lower = bound
+        return lower
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v), self._sums.get(k, 0.0)) for k, v in self._counts.items()]
+        lines: List[str] = []
+        for key, counts, total_sum in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Get-or-create registry so modules can declare metrics at import time."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,25 @@
+"""Opaque keyset-pagination cursors shared by list endpoints."""
+
+import base64
+import json
+from typing import Any, List, Optional
+
+
+def encode_cursor(*values: Any) -> str:
+    """Pack the sort-key values of the last row into a URL-safe token."""
+    raw = json.dumps(list(values), default=str, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[List[Any]]:
+    """Unpack a token made by encode_cursor; raise ValueError if it is malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("invalid cursor")
+    return values
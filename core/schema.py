@@ -0,0 +1,162 @@
+"""Startup schema bootstrap.
+
+Modules that own tables register their DDL with `register_schema()` at import
+time instead of running `CREATE TABLE IF NOT EXISTS` from request handlers.
+`bootstrap_schema()` runs once per process from app.lifespan: it applies each
+registered step whose version is newer than the one recorded in
+`schema_versions`, under a MySQL named lock so workers starting together do
+not race. Bump a step's version to ship a change to it once per deploy.
+
+A failing step is logged and skipped so independent steps still apply; the
+run then raises `SchemaBootstrapError` naming the failed steps, and app.lifespan
+refuses to start on a partial schema.
+"""
+
+import importlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+from core.database import get_conn
+
+log = logging.getLogger(__name__)
+
+# Modules whose import registers schema steps; imported by bootstrap_schema()
+# so the registry does not depend on router import order.
+SCHEMA_MODULES = (
+    "badges.automation.leader",
+    "cooktest.derivatives",
+    "cooktest.rankings",
+    "cooktest.router",
+    "faq.service",
+    "fridge.events",
+    "fridge.service",
+    "ingredients.catalog",
+    "recommendations.core.ingredient_index",
+    "recommendations.core.repository",
+    "recommendations.selected_date",
+    "stats.rollup",
+)
+
+SCHEMA_LOCK_NAME = "cookus_schema_bootstrap"
+SCHEMA_LOCK_TIMEOUT = 60
+
+SCHEMA_VERSIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_versions (
+  name VARCHAR(128) NOT NULL PRIMARY KEY,
+  version INT NOT NULL,
+  applied_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+Apply = Callable[[Any], None]
+
+
+class SchemaBootstrapError(RuntimeError):
+    def __init__(self, failed: List[str]):
+        super().__init__(f"schema steps failed: {', '.join(failed)}")
+        self.failed = failed
+
+
+@dataclass
+class SchemaStep:
+    name: str
+    version: int
+    apply: Apply
+
+
+_steps: Dict[str, SchemaStep] = {}
+_lock = threading.Lock()
+_bootstrapped = False
+
+
+def register_schema(name: str, ddl: Union[str, Sequence[str], Apply], version: int = 1) -> None:
+    """Register DDL (one statement, a list of statements, or a function taking a cursor) under `name`."""
+    if callable(ddl):
+        apply = ddl
+    else:
+        statements = [ddl] if isinstance(ddl, str) else list(ddl)
+
+        def apply(cur) -> None:
+            for statement in statements:
+                cur.execute(statement)
+
+    with _lock:
+        _steps[name] = SchemaStep(name=name, version=version, apply=apply)
+
+
+def registered_steps() -> List[SchemaStep]:
+    with _lock:
+        return list(_steps.values())
+
+
+def column_exists(cur, table: str, column: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (table, column),
+    )
+    return cur.fetchone() is not None
+
+
+def index_exists(cur, table: str, index: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+        """,
+        (table, index),
+    )
+    return cur.fetchone() is not None
+
+
+def bootstrap_schema(force: bool = False) -> List[str]:
+    """Apply pending schema steps; return the names applied. A no-op after the first successful run.
+
+    Raises SchemaBootstrapError after trying every step if any of them failed.
+    """
+    global _bootstrapped
+    if _bootstrapped and not force:
+        return []
+    for module in SCHEMA_MODULES:
+        importlib.import_module(module)
+
+    applied: List[str] = []
+    failed: List[str] = []
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute("SELECT GET_LOCK(%s, %s) AS got", (SCHEMA_LOCK_NAME, SCHEMA_LOCK_TIMEOUT))
+        if not (cur.fetchone() or {}).get("got"):
+            raise RuntimeError("timed out waiting for the schema bootstrap lock")
+        try:
+            cur.execute(SCHEMA_VERSIONS_DDL)
+            cur.execute("SELECT name, version FROM schema_versions")
+            current = {r["name"]: int(r["version"]) for r in cur.fetchall() or []}
+            for step in sorted(registered_steps(), key=lambda s: s.name):
+                if current.get(step.name, 0) >= step.version:
+                    continue
+                log.info("Applying schema step %s v%s", step.name, step.version)
+                try:
+                    step.apply(cur)
+                except Exception:
+                    log.exception("Schema step %s v%s failed", step.name, step.version)
+                    failed.append(step.name)
+                    continue
+                cur.execute(
+                    """
+                    INSERT INTO schema_versions (name, version, applied_at)
+                    VALUES (%s, %s, NOW())
+                    ON DUPLICATE KEY UPDATE version = VALUES(version), applied_at = VALUES(applied_at)
+                    """,
+                    (step.name, step.version),
+                )
+                applied.append(step.name)
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (SCHEMA_LOCK_NAME,))
+    if failed:
+        raise SchemaBootstrapError(failed)
+    _bootstrapped = True
+    return applied
@@ -52,6 +52,14 @@ class Settings:
 
     code_ttl_minutes: int = field(default_factory=lambda: int(os.getenv("CODE_TTL_MIN", "10")))
 
+    # /health/jobs and /metrics: a static bearer token for scrapers, or a signed-in admin user id
+    ops_token: str = field(default_factory=lambda: os.getenv("OPS_TOKEN", ""))
+
+    @property
+    def admin_user_ids(self) -> List[str]:
+        raw = os.getenv("ADMIN_USER_IDS", "")
+        return [user_id.strip() for user_id in raw.split(",") if user_id.strip()]
+
     @property
     def cors_origins(self) -> List[str]:
         default_origins = ["http://localhost:5173", "http://127.0.0.1:5173", "http://43.203.1.85"]
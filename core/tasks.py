@@ -2,7 +2,7 @@
 import asyncio
 from datetime import datetime, time
 from core.database import get_conn
-from notifications.service import notify
+from notifications.service import notify_many
 from notifications.repository import exists_today_supplement_notice
 
 SLOTS = {
@@ -37,6 +37,8 @@ async def supplement_reminder_worker(poll_seconds: int = 60):
                     cur.execute(sql, tuple(active_slots))
                     rows = cur.fetchall()
 
+                # 한 번의 스윕에서 나온 알림은 모아서 INSERT 한 번으로 저장
+                pending = []
                 for r in rows:
                     plan_id = int(r["plan_id"])
                     uid = r["user_id"]
@@ -44,14 +46,15 @@ async def supplement_reminder_worker(poll_seconds: int = 60):
                     time_slot = r["time_slot"]
 
                     if not exists_today_supplement_notice(uid, plan_id):
-                        notify(
-                            user_id=uid,
-                            title="영양제 알림",
-                            body=f"{time_slot}에 복용할 '{supplement_name}' 먹을 시간이에요!",
-                            link_url="/my/supplements",
-                            type="supplement",
-                            related_id=plan_id,
-                        )
+                        pending.append({
+                            "user_id": uid,
+                            "title": "영양제 알림",
+                            "body": f"{time_slot}에 복용할 '{supplement_name}' 먹을 시간이에요!",
+                            "link_url": "/my/supplements",
+                            "type": "supplement",
+                            "related_id": plan_id,
+                        })
+                notify_many(pending)
         except Exception as e:
             print("[supplement_reminder_worker] error:", e)
 
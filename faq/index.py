@@ -0,0 +1,203 @@
+"""In-memory FAQ index.
+
+Visible FAQ rows are loaded once into a snapshot holding the rows in
+`created_at DESC` order, the sorted category list, per-category row lists,
+and an n-gram posting index (syllable unigrams and bigrams) over the
+question, answer and category. Searches and category listings are answered
+from the snapshot only.
+
+A background thread probes `COUNT(*)` and `MAX(updated_at)` every
+FAQ_INDEX_PROBE_SEC and reloads the snapshot when either changed. `updated_at`
+is `ON UPDATE CURRENT_TIMESTAMP`, so edits and visibility toggles move it, and
+the count catches deletes.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.database import get_conn
+
+log = logging.getLogger(__name__)
+
+FAQ_INDEX_PROBE_SEC = float(os.getenv("FAQ_INDEX_PROBE_SEC", "30"))
+
+# Relevance weight of a query term found in each field
+FIELD_WEIGHTS = (("question", 3), ("category", 2), ("answer", 1))
+# Extra weight when the whole query, spaces removed, appears in the question
+PHRASE_BONUS = 2
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+Probe = Tuple[int, Any]
+
+
+def search_key(text: Any) -> str:
+    """Lowercased, punctuation and whitespace removed, so '비밀 번호' matches '비밀번호'."""
+    return _NON_WORD_RE.sub("", str(text or "")).lower()
+
+
+def query_terms(query: str) -> List[str]:
+    terms: List[str] = []
+    for word in _NON_WORD_RE.split(str(query).lower()):
+        if word and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def ngrams(key: str) -> Set[str]:
+    """Syllable unigrams and bigrams; a term is looked up by its bigrams, or its unigram when one syllable long."""
+    grams = set(key)
+    grams.update(key[i:i + 2] for i in range(len(key) - 1))
+    return grams
+
+
+def _term_grams(term: str) -> Set[str]:
+    if len(term) == 1:
+        return {term}
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+
+class FaqSnapshot:
+    """One load of the visible FAQ rows; never mutated once built."""
+
+    def __init__(self, rows: List[Dict[str, Any]], probe: Probe):
+        self.probe = probe
+        self.rows = rows
+        self.keys: List[Dict[str, str]] = [
+            {field: search_key(row.get(field)) for field, _ in FIELD_WEIGHTS} for row in rows
+        ]
+        self.postings: Dict[str, Set[int]] = {}
+        for position, keys in enumerate(self.keys):
+            for key in keys.values():
+                for gram in ngrams(key):
+                    self.postings.setdefault(gram, set()).add(position)
+        self.by_category: Dict[str, List[int]] = {}
+        for position, row in enumerate(rows):
+            category = row.get("category")
+            if category:
+                self.by_category.setdefault(category, []).append(position)
+        self.categories: List[str] = sorted(self.by_category)
+
+    def _candidates(self, term: str) -> Set[int]:
+        postings = [self.postings.get(gram, set()) for gram in _term_grams(term)]
+        if not postings:
+            return set()
+        return set.intersection(*postings)
+
+    def search(self, query: str, category: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        if category:
+            allowed: Optional[Set[int]] = set(self.by_category.get(category, ()))
+        else:
+            allowed = None
+
+        terms = query_terms(query) if query else []
+        if not terms:
+            positions = self.by_category.get(category, []) if category else range(len(self.rows))
+            return [self.rows[p] for p in positions[:limit]]
+
+        matched: Dict[int, int] = {}
+        scores: Dict[int, int] = {}
+        for term in terms:
+            for position in self._candidates(term):
+                if allowed is not None and position not in allowed:
+                    continue
+                keys = self.keys[position]
+                # Grams only narrow the candidates; the term must still occur as a substring
+                weight = max((w for field, w in FIELD_WEIGHTS if term in keys[field]), default=0)
+                if weight:
+                    matched[position] = matched.get(position, 0) + 1
+                    scores[position] = scores.get(position, 0) + weight
+
+        phrase = "".join(terms)
+        if len(terms) > 1:
+            for position in matched:
+                if phrase in self.keys[position]["question"]:
+                    scores[position] += PHRASE_BONUS
+
+        # Rows matching more terms first, then by weight; position keeps created_at DESC among ties
+        ranked = sorted(matched, key=lambda p: (-matched[p], -scores[p], p))
+        return [self.rows[p] for p in ranked[:limit]]
+
+
+class FaqIndex:
+    def __init__(self, probe_interval: float = FAQ_INDEX_PROBE_SEC):
+        self.probe_interval = probe_interval
+        self._snapshot: Optional[FaqSnapshot] = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _probe(self, cur) -> Probe:
+        cur.execute("SELECT COUNT(*) AS n, MAX(updated_at) AS updated_at FROM faq")
+        row = cur.fetchone() or {}
+        return int(row.get("n") or 0), row.get("updated_at")
+
+    def _load(self, cur, probe: Probe) -> FaqSnapshot:
+        cur.execute(
+            """
+            SELECT faq_id, question, answer, category, created_at, updated_at, is_visible
+            FROM faq
+            WHERE is_visible=1
+            ORDER BY created_at DESC, faq_id DESC
+            """
+        )
+        return FaqSnapshot(list(cur.fetchall() or []), probe)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload when the probe changed (or always with `force`); returns whether a new snapshot was installed."""
+        with self._load_lock:
+            with get_conn() as conn, conn.cursor() as cur:
+                probe = self._probe(cur)
+                current = self._snapshot
+                if not force and current is not None and current.probe == probe:
+                    return False
+                snapshot = self._load(cur, probe)
+            self._snapshot = snapshot
+        log.info("FAQ index loaded: %d rows, %d categories", len(snapshot.rows), len(snapshot.categories))
+        return True
+
+    def snapshot(self) -> FaqSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Only before the first load (refresher not started or its first load failed)
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.probe_interval):
+            try:
+                self.refresh()
+            except Exception:
+                log.exception("FAQ index refresh failed")
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        try:
+            self.refresh()
+        except Exception:
+            log.exception("Initial FAQ index load failed")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="faq-index", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+faq_index = FaqIndex()
+
+
+def start_faq_index() -> None:
+    faq_index.start()
+
+
+def stop_faq_index() -> None:
+    faq_index.stop()
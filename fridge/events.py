@@ -0,0 +1,194 @@
+"""Fridge change events.
+
+Every `FridgeService.save_items` call that changes a user's fridge bumps
+`fridge_version.version`, stores a content hash of the resulting items, and
+appends one row to `fridge_change_event` with the delta (added, removed and
+re-quantified items) in the same transaction.
+
+Two ways to follow changes:
+
+- in-process listeners (`add_fridge_listener`) run after the commit, for caches
+  living in the same worker;
+- durable consumers (`read_changes` / `commit_offset`) page the event table
+  past their own offset in `fridge_change_offset`, for jobs such as the badge
+  automation that may run in another process.
+
+event_ids are allocated at INSERT but become visible at COMMIT, so a higher id
+can be read before a lower one from a slower transaction. `read_changes`
+therefore stops at the first hole in the id sequence until the event after it
+is FRIDGE_CHANGE_SETTLE_SEC old; by then the hole is a rolled-back insert
+rather than an uncommitted one, and the offset may move past it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from core.database import get_conn
+from core.schema import register_schema
+
+log = logging.getLogger(__name__)
+
+FRIDGE_CHANGE_SETTLE_SEC = int(os.getenv("FRIDGE_CHANGE_SETTLE_SEC", "30"))
+
+FRIDGE_CHANGE_EVENT_DDL = """
+CREATE TABLE IF NOT EXISTS fridge_change_event (
+  event_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  user_id VARCHAR(64) NOT NULL,
+  version BIGINT UNSIGNED NOT NULL,
+  content_hash CHAR(64) NOT NULL,
+  delta JSON NOT NULL,
+  created_at DATETIME NOT NULL,
+  KEY idx_fridge_change_created (created_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+FRIDGE_CHANGE_OFFSET_DDL = """
+CREATE TABLE IF NOT EXISTS fridge_change_offset (
+  consumer VARCHAR(64) NOT NULL PRIMARY KEY,
+  last_event_id BIGINT UNSIGNED NOT NULL,
+  updated_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+register_schema("fridge_change_event", [FRIDGE_CHANGE_EVENT_DDL, FRIDGE_CHANGE_OFFSET_DDL])
+
+
+@dataclass
+class FridgeChange:
+    user_id: str
+    version: int
+    content_hash: str
+    # stored name -> quantity
+    added: Dict[str, int] = field(default_factory=dict)
+    changed: Dict[str, int] = field(default_factory=dict)
+    removed: List[str] = field(default_factory=list)
+    event_id: Optional[int] = None
+
+    def delta(self) -> Dict[str, object]:
+        return {"added": self.added, "changed": self.changed, "removed": self.removed}
+
+
+def fridge_hash(items: Dict[str, int]) -> str:
+    """Order-independent SHA-256 of a fridge's {stored name: quantity}."""
+    digest = hashlib.sha256()
+    for name in sorted(items):
+        digest.update(f"{name}\t{items[name]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def diff_items(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, object]:
+    return {
+        "added": {name: q for name, q in after.items() if name not in before},
+        "changed": {name: q for name, q in after.items() if name in before and before[name] != q},
+        "removed": sorted(name for name in before if name not in after),
+    }
+
+
+def record_change(cur, change: FridgeChange) -> int:
+    """Append the change on `cur` (inside the writer's transaction); return its event_id."""
+    cur.execute(
+        """
+        INSERT INTO fridge_change_event (user_id, version, content_hash, delta, created_at)
+        VALUES (%s, %s, %s, %s, NOW())
+        """,
+        (change.user_id, change.version, change.content_hash, json.dumps(change.delta(), ensure_ascii=False)),
+    )
+    change.event_id = int(cur.lastrowid)
+    return change.event_id
+
+
+_listeners: List[Callable[[FridgeChange], None]] = []
+_listeners_lock = threading.Lock()
+
+
+def add_fridge_listener(listener: Callable[[FridgeChange], None]) -> None:
+    """Call `listener(change)` in this process after every committed fridge change."""
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def publish(change: FridgeChange) -> None:
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(change)
+        except Exception:
+            log.exception("fridge change listener failed")
+
+
+def _from_row(row: Dict[str, object]) -> FridgeChange:
+    delta = row.get("delta") or {}
+    if isinstance(delta, (bytes, str)):
+        delta = json.loads(delta)
+    return FridgeChange(
+        user_id=str(row["user_id"]),
+        version=int(row["version"]),
+        content_hash=str(row["content_hash"]),
+        added={str(k): int(v) for k, v in (delta.get("added") or {}).items()},
+        changed={str(k): int(v) for k, v in (delta.get("changed") or {}).items()},
+        removed=[str(x) for x in delta.get("removed") or []],
+        event_id=int(row["event_id"]),
+    )
+
+
+def read_changes(cur, consumer: str, limit: int = 500) -> List[FridgeChange]:
+    """Events after `consumer`'s committed offset, oldest first, up to the first unsettled hole.
+
+    Committing the last returned event_id never skips an event that was still
+    in flight. A consumer seen for the first time starts at the current end
+    of the stream instead of replaying history.
+    """
+    cur.execute("SELECT last_event_id FROM fridge_change_offset WHERE consumer=%s", (consumer,))
+    row = cur.fetchone()
+    if row is None:
+        cur.execute("SELECT COALESCE(MAX(event_id), 0) AS last_event_id FROM fridge_change_event")
+        commit_offset(cur, consumer, int((cur.fetchone() or {}).get("last_event_id") or 0))
+        return []
+    expected = int(row["last_event_id"]) + 1
+    cur.execute(
+        """
+        SELECT event_id, user_id, version, content_hash, delta,
+               TIMESTAMPDIFF(SECOND, created_at, NOW()) AS age_sec
+        FROM fridge_change_event
+        WHERE event_id >= %s
+        ORDER BY event_id
+        LIMIT %s
+        """,
+        (expected, limit),
+    )
+    changes: List[FridgeChange] = []
+    for r in cur.fetchall() or []:
+        event_id = int(r["event_id"])
+        if event_id != expected and int(r["age_sec"] or 0) < FRIDGE_CHANGE_SETTLE_SEC:
+            # A lower id may still be uncommitted; read again once this event has settled
+            break
+        changes.append(_from_row(r))
+        expected = event_id + 1
+    return changes
+
+
+def commit_offset(cur, consumer: str, event_id: int) -> None:
+    cur.execute(
+        """
+        INSERT INTO fridge_change_offset (consumer, last_event_id, updated_at)
+        VALUES (%s, %s, NOW())
+        ON DUPLICATE KEY UPDATE last_event_id = GREATEST(last_event_id, VALUES(last_event_id)), updated_at = NOW()
+        """,
+        (consumer, event_id),
+    )
+
+
+def prune_changes(retention_days: int = 7) -> int:
+    """Delete events older than the retention window; return how many."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM fridge_change_event WHERE created_at < NOW() - INTERVAL %s DAY",
+            (retention_days,),
+        )
+        return cur.rowcount
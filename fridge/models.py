@@ -7,6 +7,7 @@ class SaveItem(BaseModel):
     name: str
     quantity: int = Field(1, ge=1)
     unit: Optional[str] = None
+    ingredient_id: Optional[int] = None
 
 
 class SaveFridgeIn(BaseModel):
@@ -1,31 +1,206 @@
-import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from core import get_conn
+from core.schema import column_exists, register_schema
+from ingredients.catalog import catalog, ensure_ingredient_id
 
+from .units import compose_name, split_unit
+
+from .events import FridgeChange, diff_items, fridge_hash, publish, record_change
 from .models import SaveFridgeIn
 
+FRIDGE_ITEM_UNIQUE = "uq_fridge_item_user_name"
+FRIDGE_ITEM_UNIQUE_COLUMNS = ("id", "ingredient_name", "unit")
+FRIDGE_ITEM_INGREDIENT_FK = "fk_fridge_item_ingredient"
 
-class FridgeService:
-    """Manage fridge items per user."""
+FRIDGE_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS fridge_version (
+  id VARCHAR(64) NOT NULL PRIMARY KEY,
+  version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  content_hash CHAR(64) NULL,
+  updated_at DATETIME NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
 
-    @staticmethod
-    def _split_unit(raw_name: str) -> List[Any]:
-        m = re.search(r"\(([^)]+)\)\s*$", str(raw_name))
-        if m:
-            base = re.sub(r"\([^)]*\)\s*$", "", str(raw_name)).strip()
-            return [base, m.group(1).strip()]
-        return [str(raw_name).strip(), None]
+# (id, ingredient_name, unit) groups with more than one row, and the row each one keeps
+_DUPLICATE_GROUPS = """
+SELECT id, ingredient_name, unit, MIN(fridge_id) AS keep_id,
+       SUM(quantity) AS quantity, MAX(stored_at) AS stored_at
+FROM fridge_item
+GROUP BY id, ingredient_name, unit
+HAVING COUNT(*) > 1
+"""
 
-    @staticmethod
-    def _compose_name(name: str, unit: Optional[str]) -> str:
-        return name + (f"({unit})" if unit else "")
+
+def _unique_key_columns(cur) -> List[str]:
+    cur.execute(
+        """
+        SELECT column_name AS name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'fridge_item' AND index_name = %s
+        ORDER BY seq_in_index
+        """,
+        (FRIDGE_ITEM_UNIQUE,),
+    )
+    return [r["name"] for r in cur.fetchall() or []]
+
+
+def _foreign_key_exists(cur, name: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM information_schema.table_constraints
+        WHERE table_schema = DATABASE() AND table_name = 'fridge_item'
+          AND constraint_name = %s AND constraint_type = 'FOREIGN KEY'
+        """,
+        (name,),
+    )
+    return cur.fetchone() is not None
+
+
+def _migrate_fridge_item(cur) -> None:
+    """unit and ingredient_id columns, the (id, ingredient_name, unit) unique key and the ingredient FK.
+
+    Rows written before this keep `name(unit)` in ingredient_name until
+    `python -m fridge.units migrate` splits them; `save_items` also splits the
+    saving user's rows on the way, so upserts never miss a legacy row.
+    """
+    ensure_ingredient_id(cur)
+    if not column_exists(cur, "fridge_item", "unit"):
+        cur.execute(
+            """
+            ALTER TABLE fridge_item
+              ADD COLUMN unit VARCHAR(32) NOT NULL DEFAULT '' AFTER ingredient_name,
+              ADD COLUMN ingredient_id INT UNSIGNED NULL AFTER unit,
+              ADD INDEX idx_fridge_item_ingredient (ingredient_id, id)
+            """
+        )
+    columns = _unique_key_columns(cur)
+    if tuple(columns) != FRIDGE_ITEM_UNIQUE_COLUMNS:
+        # Older writes could race into duplicate rows; fold them into one before the key goes on
+        cur.execute(
+            f"""
+            UPDATE fridge_item f
+            JOIN ({_DUPLICATE_GROUPS}) d ON f.fridge_id = d.keep_id
+            SET f.quantity = d.quantity, f.stored_at = d.stored_at
+            """
+        )
+        cur.execute(
+            f"""
+            DELETE f FROM fridge_item f
+            JOIN ({_DUPLICATE_GROUPS}) d
+              ON f.id = d.id AND f.ingredient_name = d.ingredient_name AND f.unit = d.unit
+             AND f.fridge_id <> d.keep_id
+            """
+        )
+        drop = f"DROP INDEX {FRIDGE_ITEM_UNIQUE}, " if columns else ""
+        cur.execute(
+            f"ALTER TABLE fridge_item {drop}ADD UNIQUE KEY {FRIDGE_ITEM_UNIQUE} ({', '.join(FRIDGE_ITEM_UNIQUE_COLUMNS)})"
+        )
+    if not _foreign_key_exists(cur, FRIDGE_ITEM_INGREDIENT_FK):
+        cur.execute(
+            f"""
+            ALTER TABLE fridge_item
+              ADD CONSTRAINT {FRIDGE_ITEM_INGREDIENT_FK} FOREIGN KEY (ingredient_id)
+              REFERENCES ingredient (ingredient_id) ON DELETE SET NULL
+            """
+        )
+
+
+register_schema("fridge_item_unique_name", _migrate_fridge_item, version=2)
+
+
+def _ensure_fridge_version(cur) -> None:
+    cur.execute(FRIDGE_VERSION_DDL)
+    if not column_exists(cur, "fridge_version", "content_hash"):
+        cur.execute("ALTER TABLE fridge_version ADD COLUMN content_hash CHAR(64) NULL AFTER version")
+
+
+register_schema("fridge_version", _ensure_fridge_version, version=2)
+
+
+def bump_fridge_version(cur, user_id: str, content_hash: str) -> int:
+    """Increment the user's fridge version on `cur` (inside the caller's transaction); return it."""
+    cur.execute(
+        """
+        INSERT INTO fridge_version (id, version, content_hash, updated_at) VALUES (%s, 1, %s, NOW())
+        ON DUPLICATE KEY UPDATE version = version + 1, content_hash = VALUES(content_hash), updated_at = NOW()
+        """,
+        (user_id, content_hash),
+    )
+    return _read_version(cur, user_id)
+
+
+def _read_version(cur, user_id: str) -> int:
+    cur.execute("SELECT version FROM fridge_version WHERE id=%s", (user_id,))
+    row = cur.fetchone()
+    return int(row["version"]) if row else 0
+
+
+def get_fridge_version(user_id: str) -> int:
+    """Current fridge version (0 for a user who never saved); caches key on it."""
+    with get_conn() as conn, conn.cursor() as cur:
+        return _read_version(cur, user_id)
+
+
+ItemKey = Tuple[str, str]
+
+
+def _display(items: Dict[ItemKey, int]) -> Dict[str, int]:
+    """{(name, unit): quantity} as {"name(unit)": quantity}, the form hashes and change events use."""
+    out: Dict[str, int] = {}
+    for (name, unit), quantity in items.items():
+        key = compose_name(name, unit)
+        out[key] = out.get(key, 0) + quantity
+    return out
+
+
+def _split_legacy_rows(cur, existing: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rewrite the user's unsplit `name(unit)` rows in place (rows already locked by the caller).
+
+    A legacy row whose split form also exists is folded into that row and
+    deleted. Returns the rows as stored afterwards, with `ingredient_name`
+    and `unit` split.
+    """
+    rows: Dict[ItemKey, Dict[str, Any]] = {}
+    legacy: List[Tuple[Dict[str, Any], ItemKey]] = []
+    for row in existing:
+        name, unit = row["ingredient_name"], row["unit"] or ""
+        if not unit:
+            name, parsed = split_unit(name)
+            if parsed:
+                legacy.append((row, (name, parsed)))
+                continue
+        rows[(name, unit)] = dict(row, unit=unit)
+    for row, (name, unit) in legacy:
+        quantity = int(row["quantity"] or 0)
+        target = rows.get((name, unit))
+        if target is not None:
+            cur.execute(
+                "UPDATE fridge_item SET quantity = quantity + %s WHERE fridge_id=%s",
+                (quantity, target["fridge_id"]),
+            )
+            cur.execute("DELETE FROM fridge_item WHERE fridge_id=%s", (row["fridge_id"],))
+            target["quantity"] = int(target["quantity"] or 0) + quantity
+        else:
+            cur.execute(
+                """
+                UPDATE fridge_item
+                SET ingredient_name=%s, unit=%s, ingredient_id=COALESCE(ingredient_id, %s)
+                WHERE fridge_id=%s
+                """,
+                (name, unit, catalog.resolve(name), row["fridge_id"]),
+            )
+            rows[(name, unit)] = dict(row, ingredient_name=name, unit=unit)
+    return list(rows.values())
+
+
+class FridgeService:
+    """Manage fridge items per user."""
 
     def list_items(self, user_id: str) -> List[Dict[str, Any]]:
         with get_conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT ingredient_name AS name_raw, quantity AS qty, stored_at
+                SELECT ingredient_name, unit, ingredient_id, quantity AS qty, stored_at
                 FROM fridge_item
                 WHERE id=%s
                 ORDER BY stored_at DESC
@@ -36,66 +211,122 @@ class FridgeService:
 
         output: List[Dict[str, Any]] = []
         for row in rows:
-            base, unit = self._split_unit(row["name_raw"])
+            base, unit = row["ingredient_name"], row["unit"] or None
+            if unit is None:
+                # Not yet split by `python -m fridge.units migrate`
+                base, unit = split_unit(base)
             qty = row["qty"]
             output.append(
                 {
                     "name": base,
                     "quantity": int(qty) if qty is not None else 0,
                     "unit": unit,
+                    "ingredient_id": row["ingredient_id"],
                 }
             )
         return output
 
+    @staticmethod
+    def _collapse(payload: SaveFridgeIn) -> Tuple[Dict[ItemKey, int], Dict[ItemKey, Optional[int]]]:
+        """Payload quantities and ingredient ids keyed by (name, unit).
+
+        Repeats add up (merge) or the last one wins (replace). An item without
+        a valid ingredient_id is resolved by name through the catalog.
+        """
+        items: Dict[ItemKey, int] = {}
+        ids: Dict[ItemKey, Optional[int]] = {}
+        for item in payload.items:
+            name, unit = item.name.strip(), (item.unit or "").strip()
+            if not unit:
+                name, unit = split_unit(name)
+            key = (name, unit or "")
+            quantity = int(item.quantity)
+            if payload.mode == "merge":
+                items[key] = items.get(key, 0) + quantity
+            else:
+                items[key] = quantity
+            ingredient_id = item.ingredient_id
+            if ingredient_id is None or catalog.name_of(ingredient_id) is None:
+                ingredient_id = catalog.resolve(name)
+            ids[key] = ingredient_id
+        return items, ids
+
     def save_items(self, user_id: str, payload: SaveFridgeIn) -> Dict[str, Any]:
+        """Upsert the payload in one statement, optionally purge the rest, and version the result.
+
+        `merge` adds to existing quantities, `replace` overwrites them. With
+        purgeMissing, rows not in the payload are deleted by primary key
+        (existing (name, unit) pairs minus payload pairs). When the fridge
+        content actually changed, its version is bumped, the content hash
+        stored and a change event recorded in the same transaction;
+        listeners are notified after the commit. The user's legacy
+        `name(unit)` rows are split first so the upsert lands on them.
+        """
+        items, ids = self._collapse(payload)
+        if payload.mode == "merge":
+            on_duplicate = "quantity = quantity + VALUES(quantity)"
+        else:
+            on_duplicate = "quantity = VALUES(quantity)"
+        on_duplicate += ", ingredient_id = VALUES(ingredient_id), stored_at = VALUES(stored_at)"
+
+        change: Optional[FridgeChange] = None
         with get_conn() as conn, conn.cursor() as cur:
-            if payload.purgeMissing:
-                names_payload = [self._compose_name(it.name, it.unit) for it in payload.items]
-                if names_payload:
-                    placeholders = ",".join(["%s"] * len(names_payload))
+            conn.begin()
+            try:
+                cur.execute(
+                    "SELECT fridge_id, ingredient_name, unit, quantity FROM fridge_item WHERE id=%s FOR UPDATE",
+                    (user_id,),
+                )
+                existing = _split_legacy_rows(cur, cur.fetchall() or [])
+                before = {(r["ingredient_name"], r["unit"] or ""): int(r["quantity"] or 0) for r in existing}
+                after = {} if payload.purgeMissing else dict(before)
+                for key, quantity in items.items():
+                    after[key] = before.get(key, 0) + quantity if payload.mode == "merge" else quantity
+
+                if payload.purgeMissing:
+                    stale = [
+                        r["fridge_id"] for r in existing
+                        if (r["ingredient_name"], r["unit"] or "") not in items
+                    ]
+                    if stale:
+                        placeholders = ",".join(["%s"] * len(stale))
+                        cur.execute(f"DELETE FROM fridge_item WHERE fridge_id IN ({placeholders})", tuple(stale))
+
+                if items:
+                    values = ", ".join(["(UUID(), %s, %s, %s, %s, %s, NOW())"] * len(items))
+                    params: List[Any] = []
+                    for (name, unit), quantity in items.items():
+                        params.extend([user_id, name, unit, ids[(name, unit)], quantity])
                     cur.execute(
                         f"""
-                        DELETE FROM fridge_item
-                        WHERE id=%s AND ingredient_name NOT IN ({placeholders})
+                        INSERT INTO fridge_item (fridge_id, id, ingredient_name, unit, ingredient_id, quantity, stored_at)
+                        VALUES {values}
+                        ON DUPLICATE KEY UPDATE {on_duplicate}
                         """,
-                        (user_id, *names_payload),
+                        tuple(params),
                     )
-                else:
-                    cur.execute("DELETE FROM fridge_item WHERE id=%s", (user_id,))
-
-            for item in payload.items:
-                name = self._compose_name(item.name, item.unit)
-                quantity = int(item.quantity)
-                cur.execute("SELECT quantity FROM fridge_item WHERE id=%s AND ingredient_name=%s", (user_id, name))
-                existing = cur.fetchone()
-                if existing:
-                    if payload.mode == "merge":
-                        cur.execute(
-                            """
-                            UPDATE fridge_item
-                            SET quantity=quantity+%s, stored_at=NOW()
-                            WHERE id=%s AND ingredient_name=%s
-                            """,
-                            (quantity, user_id, name),
-                        )
-                    else:
-                        cur.execute(
-                            """
-                            UPDATE fridge_item
-                            SET quantity=%s, stored_at=NOW()
-                            WHERE id=%s AND ingredient_name=%s
-                            """,
-                            (quantity, user_id, name),
-                        )
-                else:
-                    cur.execute(
-                        """
-                        INSERT INTO fridge_item (fridge_id, id, ingredient_name, quantity, stored_at)
-                        VALUES (UUID(), %s, %s, %s, NOW())
-                        """,
-                        (user_id, name, quantity),
+
+                before_view, after_view = _display(before), _display(after)
+                delta = diff_items(before_view, after_view)
+                if any(delta.values()):
+                    content_hash = fridge_hash(after_view)
+                    change = FridgeChange(
+                        user_id=user_id,
+                        version=bump_fridge_version(cur, user_id, content_hash),
+                        content_hash=content_hash,
+                        **delta,
                     )
-        return {"ok": True}
+                    record_change(cur, change)
+                    version = change.version
+                else:
+                    version = _read_version(cur, user_id)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        if change:
+            publish(change)
+        return {"ok": True, "version": version}
 
 
 fridge_service = FridgeService()
@@ -0,0 +1,130 @@
+"""Split `name(unit)` fridge rows into ingredient_name + unit and link them to ingredient ids.
+
+Fridge items used to be stored with the unit folded into the name
+('양파(개)'), and every reader split it back with regexes. New writes store
+the unit and the canonical `ingredient_id` in their own columns; this module
+converts the rows written before that. `FridgeService.save_items` already
+splits a user's legacy rows when that user saves; this catches everyone else.
+
+Run once per environment after the schema bootstrap (safe to re-run):
+
+    python -m fridge.units migrate [--chunk 1000] [--sleep 0.05]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymysql.err import IntegrityError
+
+from core import get_conn
+from ingredients.catalog import catalog
+
+_UNIT_RE = re.compile(r"^(.*?)\s*\(([^)]+)\)\s*$")
+
+
+def split_unit(raw_name: str) -> Tuple[str, Optional[str]]:
+    """'양파(개)' -> ('양파', '개'); names without a trailing '(...)' have no unit."""
+    text = str(raw_name).strip()
+    m = _UNIT_RE.match(text)
+    if m and m.group(1).strip():
+        return m.group(1).strip(), m.group(2).strip()
+    return text, None
+
+
+def compose_name(name: str, unit: Optional[str]) -> str:
+    return name + (f"({unit})" if unit else "")
+
+
+def _migrate_row(cur, row: Dict[str, Any], name: str, unit: str, ingredient_id: Optional[int]) -> str:
+    try:
+        cur.execute(
+            "UPDATE fridge_item SET ingredient_name=%s, unit=%s, ingredient_id=%s WHERE fridge_id=%s",
+            (name, unit, ingredient_id, row["fridge_id"]),
+        )
+        return "updated"
+    except IntegrityError as exc:
+        if not exc.args or exc.args[0] != 1062:
+            raise
+    # The split form already exists (written by the new code path): fold the legacy row into it
+    cur.execute(
+        """
+        UPDATE fridge_item
+        SET quantity = quantity + %s, ingredient_id = COALESCE(ingredient_id, %s)
+        WHERE id=%s AND ingredient_name=%s AND unit=%s
+        """,
+        (int(row["quantity"] or 0), ingredient_id, row["id"], name, unit),
+    )
+    cur.execute("DELETE FROM fridge_item WHERE fridge_id=%s", (row["fridge_id"],))
+    return "merged"
+
+
+def migrate_units(chunk_size: int = 1000, sleep_sec: float = 0.0) -> Dict[str, int]:
+    """Walk fridge_item in fridge_id order, splitting legacy names and filling ingredient_id."""
+    chunk_size = max(1, chunk_size)
+    stats = {"scanned": 0, "updated": 0, "merged": 0, "unresolved": 0}
+    last_id = ""
+    while True:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT fridge_id, id, ingredient_name, unit, ingredient_id, quantity
+                FROM fridge_item
+                WHERE fridge_id > %s
+                ORDER BY fridge_id
+                LIMIT %s
+                """,
+                (last_id, chunk_size),
+            )
+            rows = cur.fetchall() or []
+            if not rows:
+                break
+            last_id = rows[-1]["fridge_id"]
+            stats["scanned"] += len(rows)
+
+            conn.begin()
+            try:
+                for row in rows:
+                    name, unit = row["ingredient_name"], row["unit"] or ""
+                    if not unit:
+                        name, parsed = split_unit(name)
+                        unit = parsed or ""
+                    ingredient_id = row["ingredient_id"] or catalog.resolve(name)
+                    if ingredient_id is None:
+                        stats["unresolved"] += 1
+                    if (name, unit, ingredient_id) == (row["ingredient_name"], row["unit"] or "", row["ingredient_id"]):
+                        continue
+                    stats[_migrate_row(cur, row, name, unit, ingredient_id)] += 1
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        if len(rows) < chunk_size:
+            break
+        if sleep_sec > 0:
+            # Leave room for foreground traffic between chunks
+            time.sleep(sleep_sec)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m fridge.units")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("migrate", help="split name(unit) rows and fill fridge_item.ingredient_id")
+    cmd.add_argument("--chunk", type=int, default=1000, help="rows per transaction")
+    cmd.add_argument("--sleep", type=float, default=0.0, help="seconds to pause between chunks")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        stats = migrate_units(args.chunk, args.sleep)
+        print(
+            f"scanned={stats['scanned']} updated={stats['updated']} "
+            f"merged={stats['merged']} unresolved={stats['unresolved']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
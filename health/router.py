@@ -1,9 +1,40 @@
-from fastapi import APIRouter
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from badges.automation import badge_automation_status
+from badges.automation.metrics import jobs_snapshot
+from core.metrics import metrics
+from core.security import bearer, get_current_user
+from core.settings import settings
 
 
 router = APIRouter(tags=["health"])
 
 
+def require_ops_access(request: Request, _=Depends(bearer)) -> None:
+    """Allow OPS_TOKEN as a bearer token, or a signed-in user listed in ADMIN_USER_IDS."""
+    auth = request.headers.get("Authorization", "").strip()
+    token = auth.split(None, 1)[1].strip() if auth.lower().startswith("bearer ") else auth
+    if settings.ops_token and token and secrets.compare_digest(token, settings.ops_token):
+        return
+    user_id = get_current_user(request)
+    if user_id not in settings.admin_user_ids:
+        raise HTTPException(status_code=403, detail="Admin only")
+
+
 @router.get("/health")
 def health():
-    return {"ok": True}
+    return {"ok": True, "badge_automation": badge_automation_status()}
+
+
+@router.get("/health/jobs", dependencies=[Depends(require_ops_access)])
+def health_jobs():
+    """Badge automation job stats; only the lease holder has non-empty numbers."""
+    return {"badge_automation": badge_automation_status(), "jobs": jobs_snapshot()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_ops_access)])
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
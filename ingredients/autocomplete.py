@@ -0,0 +1,203 @@
+"""In-memory autocomplete over the `ingredient` table.
+
+Names are indexed as decomposed jamo strings in two sorted arrays:
+
+- `prefix`: each whole name, so a prefix query is one bisect range;
+- `infix`: every suffix starting after the first syllable (a suffix array
+  over short names), for matches inside a name.
+
+Queries made only of initial consonants ('ㄷㅈㄱㄱ', 'ㄷㄱ') go through the
+same two arrays built over each name's choseong string, then through an index
+of ordered choseong pairs for non-contiguous matches ('ㄷㄱ' -> '돼지고기').
+
+Ranking is exact > prefix > prefix ending mid-syllable ('달' for '닭') >
+infix > scattered initials, then shorter names first. The index is built once per process, rebuilt in the background after
+INGREDIENT_CATALOG_TTL seconds (adds from other workers), and updated in place
+by `IngredientService.add`.
+"""
+
+import bisect
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.database import get_conn
+
+from .catalog import INGREDIENT_CATALOG_TTL
+from .hangul import choseong, decompose, is_choseong_query
+
+log = logging.getLogger(__name__)
+
+_SPACE_RE = re.compile(r"\s+")
+_RANGE_END = "\uffff"
+
+# Rank tiers, lower is better
+EXACT, PREFIX, JAMO_PREFIX, INFIX, SCATTERED = range(5)
+
+
+def search_key(text: str) -> str:
+    return _SPACE_RE.sub("", str(text)).lower()
+
+
+Entry = Tuple[str, int]
+
+
+class _Index:
+    """One immutable-by-convention snapshot; `add` inserts in place under the owner's lock."""
+
+    def __init__(self):
+        self.names: Dict[int, str] = {}
+        self.prefix: List[Entry] = []
+        self.infix: List[Entry] = []
+        self.cho_prefix: List[Entry] = []
+        self.cho_infix: List[Entry] = []
+        self.cho_pairs: Dict[str, Set[int]] = {}
+
+    def _entries(self, ingredient_id: int, name: str):
+        key = search_key(name)
+        cho = choseong(key)
+        yield self.prefix, (decompose(key), ingredient_id)
+        for i in range(1, len(key)):
+            yield self.infix, (decompose(key[i:]), ingredient_id)
+        if cho:
+            yield self.cho_prefix, (cho, ingredient_id)
+            for i in range(1, len(cho)):
+                yield self.cho_infix, (cho[i:], ingredient_id)
+
+    def _pairs(self, name: str) -> Set[str]:
+        cho = choseong(search_key(name))
+        return {cho[i] + cho[j] for i in range(len(cho)) for j in range(i + 1, len(cho))}
+
+    def add(self, ingredient_id: int, name: str, sort: bool = True) -> None:
+        if ingredient_id in self.names:
+            return
+        self.names[ingredient_id] = name
+        for array, entry in self._entries(ingredient_id, name):
+            if sort:
+                bisect.insort(array, entry)
+            else:
+                array.append(entry)
+        for pair in self._pairs(name):
+            self.cho_pairs.setdefault(pair, set()).add(ingredient_id)
+
+    @classmethod
+    def build(cls, rows: List[Tuple[int, str]]) -> "_Index":
+        index = cls()
+        for ingredient_id, name in rows:
+            index.add(ingredient_id, name, sort=False)
+        for array in (index.prefix, index.infix, index.cho_prefix, index.cho_infix):
+            array.sort()
+        return index
+
+
+def _range(array: List[Entry], key: str, cap: int) -> List[int]:
+    """Ids of up to `cap` entries whose string starts with `key`, in sorted order."""
+    lo = bisect.bisect_left(array, (key,))
+    hi = bisect.bisect_left(array, (key + _RANGE_END,), lo)
+    return [entry[1] for entry in array[lo:min(hi, lo + cap)]]
+
+
+class IngredientAutocomplete:
+    def __init__(self, ttl: float = INGREDIENT_CATALOG_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index: Optional[_Index] = None
+        self._built_at = 0.0
+        self._refreshing = False
+
+    def _rows(self) -> List[Tuple[int, str]]:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT ingredient_id, ingredient_name FROM ingredient")
+            return [(int(r["ingredient_id"]), str(r["ingredient_name"])) for r in cur.fetchall() or []]
+
+    def rebuild(self, rows: Optional[List[Tuple[int, str]]] = None) -> None:
+        """Build a fresh snapshot from `rows` (ingredient_id, name), or from the ingredient table."""
+        index = _Index.build(self._rows() if rows is None else rows)
+        with self._lock:
+            self._index = index
+            self._built_at = time.monotonic()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.rebuild()
+        except Exception:
+            log.exception("Failed to rebuild the ingredient autocomplete index")
+        finally:
+            self._refreshing = False
+
+    def _current(self) -> _Index:
+        index = self._index
+        if index is None:
+            self.rebuild()
+            return self._index
+        if time.monotonic() - self._built_at >= self.ttl and not self._refreshing:
+            # Keep answering from the current snapshot while the new one is built
+            self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, name="ingredient-autocomplete", daemon=True).start()
+        return index
+
+    def add(self, ingredient_id: int, name: str) -> None:
+        if self._index is None:
+            return
+        with self._lock:
+            self._index.add(ingredient_id, name)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, object]]:
+        """Ranked matches for a partial name, jamo prefix or initial-consonant query.
+
+        >>> ac = IngredientAutocomplete()
+        >>> ac.rebuild([(1, '닭고기'), (2, '달걀'), (3, '돼지고기'), (4, '소고기'), (5, '닭가슴살')])
+        >>> [r['name'] for r in ac.search('닭')]
+        ['닭고기', '닭가슴살', '달걀']
+        >>> [r['name'] for r in ac.search('고기')]
+        ['닭고기', '소고기', '돼지고기']
+        >>> [r['name'] for r in ac.search('ㄷㄱ')]
+        ['달걀', '닭고기', '닭가슴살', '돼지고기']
+        """
+        key = search_key(query)
+        if not key:
+            return []
+        index = self._current()
+        cap = max(limit * 4, 50)
+        ranked: Dict[int, int] = {}
+
+        def collect(ids: List[int], tier: int) -> None:
+            for ingredient_id in ids:
+                if ranked.get(ingredient_id, SCATTERED + 1) > tier:
+                    ranked[ingredient_id] = tier
+
+        if is_choseong_query(key):
+            collect(_range(index.cho_prefix, key, cap), PREFIX)
+            collect(_range(index.cho_infix, key, cap), INFIX)
+            if len(ranked) < limit and len(key) > 1:
+                candidates = set.intersection(
+                    *(index.cho_pairs.get(key[i] + key[i + 1], set()) for i in range(len(key) - 1))
+                )
+                collect([i for i in candidates if _is_subsequence(key, choseong(search_key(index.names[i])))], SCATTERED)
+        else:
+            jamo = decompose(key)
+            collect(_range(index.prefix, jamo, cap), PREFIX)
+            collect(_range(index.infix, jamo, cap), INFIX)
+
+        def rank(ingredient_id: int) -> Tuple[int, int, str]:
+            name = index.names[ingredient_id]
+            name_key = search_key(name)
+            tier = ranked[ingredient_id]
+            if name_key == key:
+                tier = EXACT
+            elif tier == PREFIX and not name_key.startswith(key) and not is_choseong_query(key):
+                tier = JAMO_PREFIX
+            return tier, len(name), name
+
+        best = sorted(ranked, key=rank)[:limit]
+        return [{"id": ingredient_id, "name": index.names[ingredient_id]} for ingredient_id in best]
+
+
+def _is_subsequence(needle: str, haystack: str) -> bool:
+    it = iter(haystack)
+    return all(ch in it for ch in needle)
+
+
+autocomplete = IngredientAutocomplete()
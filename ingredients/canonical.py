@@ -0,0 +1,176 @@
+"""Text rules behind ingredient canonicalization.
+
+`IngredientCatalog.resolve` tries, in order: the curated alias table, the
+exact dictionary name, the longest dictionary name the token ends with (the
+head noun of a Korean compound: '다진마늘' -> '마늘', '대파' -> '파'), and
+finally a fuzzy match. This module holds the pieces that do not touch the
+database: token clean-up and the fuzzy matcher.
+
+The examples double as regression checks:
+
+    python -m pytest --doctest-modules ingredients
+"""
+
+import re
+from typing import Dict, List, Optional, Set
+
+from .hangul import decompose
+
+_PAREN_RE = re.compile(r"\(([^)]*)\)")
+# Quantities and measure words trailing recipe tokens: '양파 1개', '소금 약간', '간장 2큰술'
+_AMOUNT_RE = re.compile(
+    r"\s*(?:[\d½¼¾/.~\-]+\s*\S*|약간|조금|적당량|적당히|소량|한줌|한꼬집|취향껏)\s*$"
+)
+_SPACE_RE = re.compile(r"\s+")
+
+FUZZY_MIN_SCORE = 0.5
+# Keys shorter than this many jamo get no edit budget: one jamo is the whole
+# difference between 물/무, 배추/부추, 오이/오리 and 살/쌀
+FUZZY_MIN_JAMO = 6
+
+# Prefixes that qualify a one-syllable head noun: '대파', '쪽파' -> 파, '통깨' -> 깨.
+# Without one, a one-syllable suffix is part of another word ('양파', '목살').
+# Generic heads (GENERIC_HEADS) follow the same rule: '소고기' is not just 고기.
+GENERIC_HEADS = frozenset({"고기", "가루", "기름", "소스", "양념", "육수", "채소", "야채"})
+HEAD_MODIFIERS = frozenset({
+    "대", "쪽", "실", "통", "생", "건", "국", "흰", "검은", "굵은", "다진", "냉동",
+})
+
+
+def lookup_key(text: str) -> str:
+    """Lookup form shared by dictionary names and tokens: whitespace removed, lowercased."""
+    return _SPACE_RE.sub("", text).lower()
+
+
+def candidate_forms(raw: str) -> List[str]:
+    """Lookup keys to try for one raw name or recipe token, most specific first.
+
+    >>> candidate_forms('돼지고기(목살)')
+    ['목살', '돼지고기']
+    >>> candidate_forms('양파 1개')
+    ['양파']
+    >>> candidate_forms('소금 약간')
+    ['소금']
+    """
+    text = str(raw).replace("/", " ").strip()
+    inner = [m.strip() for m in _PAREN_RE.findall(text) if m.strip()]
+    outer = _PAREN_RE.sub(" ", text).strip()
+    forms: List[str] = []
+    for form in inner + [outer]:
+        previous = None
+        while form and form != previous:
+            previous, form = form, _AMOUNT_RE.sub("", form).strip()
+        key = lookup_key(form)
+        if key and key not in forms:
+            forms.append(key)
+    return forms
+
+
+def _jamo_bigrams(key: str) -> Set[str]:
+    # Jamo rather than syllable bigrams: '된장' and '됀장' share no syllable bigram but most jamo ones
+    padded = f"^{decompose(key)}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance, or limit + 1 as soon as it is known to exceed `limit`.
+
+    >>> levenshtein('kitten', 'sitting', 5)
+    3
+    >>> levenshtein('kitten', 'sitting', 1)
+    2
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """Jamo-bigram candidates over dictionary keys, confirmed by jamo edit distance."""
+
+    def __init__(self, keys: Dict[str, int]):
+        self._keys: Dict[str, int] = {}
+        self._grams: Dict[str, int] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        for key, ingredient_id in keys.items():
+            self.add(key, ingredient_id)
+
+    def add(self, key: str, ingredient_id: int) -> None:
+        if key in self._keys:
+            return
+        self._keys[key] = ingredient_id
+        grams = _jamo_bigrams(key)
+        self._grams[key] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def head_noun(self, key: str) -> Optional[int]:
+        """Id of the longest dictionary key `key` ends with, covering at least half of it.
+
+        A one-syllable head, or a generic one such as 고기 or 가루, only counts
+        after a known modifier (HEAD_MODIFIERS).
+
+        >>> matcher = FuzzyMatcher({'파': 1, '마늘': 2, '살': 3, '깨': 4, '장': 5, '고기': 6, '가루': 7})
+        >>> matcher.head_noun('대파'), matcher.head_noun('다진마늘'), matcher.head_noun('통깨')
+        (1, 2, 4)
+        >>> matcher.head_noun('다진고기'), matcher.head_noun('굵은고춧가루')
+        (6, None)
+        >>> matcher.head_noun('양파'), matcher.head_noun('목살'), matcher.head_noun('고추장')
+        (None, None, None)
+        >>> matcher.head_noun('소고기'), matcher.head_noun('돼지고기'), matcher.head_noun('부침가루')
+        (None, None, None)
+        """
+        for start in range(1, len(key) // 2 + 1):
+            suffix = key[start:]
+            ingredient_id = self._keys.get(suffix)
+            if ingredient_id is None:
+                continue
+            if (len(suffix) >= 2 and suffix not in GENERIC_HEADS) or key[:start] in HEAD_MODIFIERS:
+                return ingredient_id
+        return None
+
+    def match(self, key: str) -> Optional[int]:
+        """Closest dictionary key within the jamo edit budget.
+
+        >>> matcher = FuzzyMatcher({'된장': 1, '고춧가루': 2, '양파': 3, '목살': 4})
+        >>> matcher.match('됀장'), matcher.match('고추가루')
+        (1, 2)
+        >>> matcher.match('파'), matcher.match('살')
+        (None, None)
+
+        Short keys must match exactly:
+
+        >>> matcher = FuzzyMatcher({'무': 1, '부추': 2, '오리': 3, '쌀': 4})
+        >>> matcher.match('물'), matcher.match('배추'), matcher.match('오이'), matcher.match('살')
+        (None, None, None, None)
+        """
+        grams = _jamo_bigrams(key)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        best: Optional[str] = None
+        best_rank = None
+        jamo = decompose(key)
+        for candidate, common in shared.items():
+            score = 2 * common / (len(grams) + self._grams[candidate])
+            if score < FUZZY_MIN_SCORE:
+                continue
+            other = decompose(candidate)
+            # One jamo edit for keys of FUZZY_MIN_JAMO or more: '된장' ~ '됀장', '고추가루' ~ '고춧가루'
+            limit = 1 if min(len(jamo), len(other)) >= FUZZY_MIN_JAMO else 0
+            distance = levenshtein(jamo, other, limit)
+            if distance > limit:
+                continue
+            rank = (distance, -score, len(candidate), candidate)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = candidate, rank
+        return self._keys[best] if best is not None else None
@@ -0,0 +1,236 @@
+"""Canonical ingredient ids.
+
+`ingredient` is the dictionary of ingredient names; `ingredient_id` is the key
+fridge items and the recipe ingredient index point at. The catalog keeps the
+dictionary and the curated `ingredient_alias` table in memory and maps any
+name a user types or a recipe lists to one id:
+
+    alias -> exact name -> head noun ('다진마늘' -> 마늘) -> fuzzy (jamo edit distance)
+
+each tried on the token's candidate forms ('돼지고기(목살)' -> 목살, 돼지고기;
+'양파 1개' -> 양파). Results are memoized per raw token, so the fridge write
+path, the recipe index build and the recommendation workflow pay for matching
+once per distinct token. The catalog is loaded lazily, reloaded after
+INGREDIENT_CATALOG_TTL seconds, and updated in place on `IngredientService.add`
+and alias changes.
+
+Aliases are managed with:
+
+    python -m ingredients.catalog alias ALIAS CANONICAL_NAME
+    python -m ingredients.catalog resolve TOKEN [TOKEN ...]
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.database import get_conn
+from core.schema import column_exists, register_schema
+
+from .canonical import FuzzyMatcher, candidate_forms, lookup_key
+
+INGREDIENT_CATALOG_TTL = float(os.getenv("INGREDIENT_CATALOG_TTL", "300"))
+RESOLVE_CACHE_MAX = int(os.getenv("INGREDIENT_RESOLVE_CACHE_MAX", "100000"))
+
+INGREDIENT_ALIAS_DDL = """
+CREATE TABLE IF NOT EXISTS ingredient_alias (
+  alias VARCHAR(100) NOT NULL PRIMARY KEY,
+  ingredient_id INT UNSIGNED NOT NULL,
+  created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  KEY idx_ingredient_alias_ingredient (ingredient_id),
+  CONSTRAINT fk_ingredient_alias_ingredient FOREIGN KEY (ingredient_id)
+    REFERENCES ingredient (ingredient_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def ensure_ingredient_id(cur) -> None:
+    if not column_exists(cur, "ingredient", "ingredient_id"):
+        cur.execute(
+            """
+            ALTER TABLE ingredient
+              ADD COLUMN ingredient_id INT UNSIGNED NOT NULL AUTO_INCREMENT FIRST,
+              ADD UNIQUE KEY uq_ingredient_id (ingredient_id)
+            """
+        )
+
+
+def _ensure_ingredient_alias(cur) -> None:
+    ensure_ingredient_id(cur)
+    cur.execute(INGREDIENT_ALIAS_DDL)
+
+
+register_schema("ingredient_id", ensure_ingredient_id)
+register_schema("ingredient_alias", _ensure_ingredient_alias)
+
+_MISSING = object()
+
+
+class IngredientCatalog:
+    def __init__(self, ttl: float = INGREDIENT_CATALOG_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._aliases: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._fuzzy = FuzzyMatcher({})
+        self._resolved: Dict[str, Optional[int]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def _rows(self) -> Tuple[List[Tuple[int, str]], List[Tuple[str, int]]]:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT ingredient_id, ingredient_name FROM ingredient")
+            names = [(int(r["ingredient_id"]), str(r["ingredient_name"])) for r in cur.fetchall() or []]
+            cur.execute("SELECT alias, ingredient_id FROM ingredient_alias")
+            aliases = [(str(r["alias"]), int(r["ingredient_id"])) for r in cur.fetchall() or []]
+        return names, aliases
+
+    @staticmethod
+    def _name_keys(name: str) -> List[str]:
+        """Dictionary keys for a name: as written and, for '돼지고기(목살)', without the parenthesis."""
+        forms = candidate_forms(name)
+        full = lookup_key(name)
+        return ([full] if full else []) + [f for f in forms[-1:] if f != full]
+
+    def _ensure_loaded(self) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        self.load_rows(*self._rows())
+
+    def load_rows(self, rows: List[Tuple[int, str]], alias_rows: List[Tuple[str, int]]) -> None:
+        """Install a dictionary snapshot: (ingredient_id, name) rows and (alias, ingredient_id) rows."""
+        ids: Dict[str, int] = {}
+        names: Dict[int, str] = {}
+        # Lowest id wins when two spellings share a key
+        for ingredient_id, name in sorted(rows):
+            names[ingredient_id] = name
+            for key in self._name_keys(name):
+                ids.setdefault(key, ingredient_id)
+        aliases = {lookup_key(alias): ingredient_id for alias, ingredient_id in alias_rows if lookup_key(alias)}
+        fuzzy = FuzzyMatcher(ids)
+        with self._lock:
+            self._ids, self._names, self._aliases, self._fuzzy = ids, names, aliases, fuzzy
+            self._resolved = {}
+            self._loaded_at = time.monotonic()
+
+    def reload(self) -> None:
+        self._loaded_at = None
+        self._ensure_loaded()
+
+    def note_added(self, ingredient_id: int, name: str) -> None:
+        with self._lock:
+            self._names[ingredient_id] = name
+            for key in self._name_keys(name):
+                if key not in self._ids:
+                    self._ids[key] = ingredient_id
+                    self._fuzzy.add(key, ingredient_id)
+            # Tokens that resolved to nothing (or to a looser match) may resolve to the new name now
+            self._resolved = {}
+
+    def _match(self, raw: str) -> Optional[int]:
+        forms = candidate_forms(raw)
+        for form in forms:
+            ingredient_id = self._aliases.get(form)
+            if ingredient_id is None:
+                ingredient_id = self._ids.get(form)
+            if ingredient_id is not None:
+                return ingredient_id
+        for form in forms:
+            ingredient_id = self._fuzzy.head_noun(form)
+            if ingredient_id is not None:
+                return ingredient_id
+        for form in forms:
+            ingredient_id = self._fuzzy.match(form)
+            if ingredient_id is not None:
+                return ingredient_id
+        return None
+
+    def resolve(self, name: str) -> Optional[int]:
+        """Canonical ingredient id for a name or recipe token; None when nothing is close enough.
+
+        >>> c = IngredientCatalog()
+        >>> c.load_rows([(1, '파'), (2, '양파'), (3, '목살'), (4, '돼지고기')], [('대파', 1)])
+        >>> [c.name_of(c.resolve(t)) for t in ['대파', '쪽파', '양파 1개', '돼지고기(목살)', '목살']]
+        ['파', '파', '양파', '목살', '목살']
+        >>> c.load_rows([(1, '파'), (3, '살')], [])
+        >>> c.resolve('양파 1개'), c.resolve('목살')
+        (None, None)
+        >>> c.load_rows([(1, '무'), (2, '부추'), (3, '오리'), (4, '쌀'), (5, '고기'), (6, '가루')], [])
+        >>> [c.resolve(t) for t in ['물', '물 2컵', '배추', '오이', '살', '소고기', '돼지고기', '부침가루']]
+        [None, None, None, None, None, None, None, None]
+        """
+        if not name:
+            return None
+        self._ensure_loaded()
+        raw = str(name)
+        cached = self._resolved.get(raw, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        ingredient_id = self._match(raw)
+        resolved = self._resolved
+        if len(resolved) >= RESOLVE_CACHE_MAX:
+            resolved.clear()
+        resolved[raw] = ingredient_id
+        return ingredient_id
+
+    def resolve_many(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        return {name: self.resolve(name) for name in names}
+
+    def name_of(self, ingredient_id: int) -> Optional[str]:
+        self._ensure_loaded()
+        return self._names.get(ingredient_id)
+
+    def add_alias(self, alias: str, canonical_name: str) -> int:
+        """Map `alias` to the ingredient named `canonical_name`; return its id."""
+        key = lookup_key(alias)
+        if not key:
+            raise ValueError("alias is empty")
+        self._ensure_loaded()
+        ingredient_id = self._ids.get(lookup_key(canonical_name))
+        if ingredient_id is None:
+            raise ValueError(f"unknown ingredient: {canonical_name}")
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO ingredient_alias (alias, ingredient_id) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE ingredient_id = VALUES(ingredient_id)
+                """,
+                (key, ingredient_id),
+            )
+        with self._lock:
+            self._aliases[key] = ingredient_id
+            self._resolved = {}
+        return ingredient_id
+
+
+catalog = IngredientCatalog()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m ingredients.catalog")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("alias", help="map an alias to a canonical ingredient name")
+    cmd.add_argument("alias")
+    cmd.add_argument("canonical")
+    cmd = sub.add_parser("resolve", help="show which ingredient each token resolves to")
+    cmd.add_argument("tokens", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "alias":
+        try:
+            ingredient_id = catalog.add_alias(args.alias, args.canonical)
+        except ValueError as exc:
+            parser.error(str(exc))
+        print(f"{args.alias} -> {args.canonical} ({ingredient_id})")
+    elif args.command == "resolve":
+        for token in args.tokens:
+            ingredient_id = catalog.resolve(token)
+            name = catalog.name_of(ingredient_id) if ingredient_id is not None else None
+            print(f"{token}\t{ingredient_id}\t{name or '-'}")
+
+
+if __name__ == "__main__":
+    main()
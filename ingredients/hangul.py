@@ -0,0 +1,76 @@
+"""Hangul decomposition helpers for ingredient search.
+
+Syllables are split into compatibility jamo, with compound vowels and final
+consonants spelled out as typed on a 2-set keyboard ('닭' -> 'ㄷㅏㄹㄱ',
+'돼' -> 'ㄷㅗㅐ'), so a query that ends mid-syllable is still a prefix of the
+decomposed name.
+"""
+
+from functools import lru_cache
+
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_LAST = 0xD7A3
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = [
+    "ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ",
+    "ㅗㅣ", "ㅛ", "ㅜ", "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ",
+]
+JONGSEONG = [
+    "", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ",
+    "ㄹㅂ", "ㄹㅅ", "ㄹㅌ", "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ",
+    "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+]
+
+# Standalone compatibility jamo typed as one key but written as two
+_COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ",
+    "ㄽ": "ㄹㅅ", "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+_CHOSEONG_SET = frozenset(CHOSEONG)
+
+
+def _is_syllable(ch: str) -> bool:
+    return _SYLLABLE_BASE <= ord(ch) <= _SYLLABLE_LAST
+
+
+@lru_cache(maxsize=65536)
+def decompose(text: str) -> str:
+    """Compatibility jamo of each syllable; other characters pass through unchanged.
+
+    >>> decompose('돼지고기')
+    'ㄷㅗㅐㅈㅣㄱㅗㄱㅣ'
+    >>> decompose('닭') == decompose('달') + 'ㄱ'
+    True
+    """
+    out = []
+    for ch in text:
+        if _is_syllable(ch):
+            index = ord(ch) - _SYLLABLE_BASE
+            cho, rest = divmod(index, 21 * 28)
+            jung, jong = divmod(rest, 28)
+            out.append(CHOSEONG[cho] + JUNGSEONG[jung] + JONGSEONG[jong])
+        else:
+            out.append(_COMPOUND_JAMO.get(ch, ch))
+    return "".join(out)
+
+
+@lru_cache(maxsize=65536)
+def choseong(text: str) -> str:
+    """Initial consonants of each syllable; other characters are dropped.
+
+    >>> choseong('돼지고기 2kg')
+    'ㄷㅈㄱㄱ'
+    """
+    return "".join(CHOSEONG[(ord(ch) - _SYLLABLE_BASE) // (21 * 28)] for ch in text if _is_syllable(ch))
+
+
+def is_choseong_query(text: str) -> bool:
+    """True for queries made only of initial consonants.
+
+    >>> is_choseong_query('ㄷㄱ'), is_choseong_query('ㄷ고'), is_choseong_query('')
+    (True, False, False)
+    """
+    return bool(text) and all(ch in _CHOSEONG_SET for ch in text)
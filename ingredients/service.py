@@ -2,31 +2,33 @@ from typing import Any, Dict, List
 
 from core import get_conn
 
+from .autocomplete import autocomplete
+from .catalog import catalog
+
 
 class IngredientService:
     def search(self, query: str) -> List[Dict[str, Any]]:
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                "SELECT ingredient_name FROM ingredient WHERE ingredient_name LIKE %s LIMIT 20",
-                (f"%{query}%",),
-            )
-            rows = cur.fetchall() or []
-        return [{"name": r["ingredient_name"]} for r in rows]
+        """Autocomplete from the in-memory index: prefix matches first, choseong queries (ㄷㄱ) supported."""
+        return autocomplete.search(query, limit=20)
 
     def add(self, name: str) -> Dict[str, Any]:
         clean = (name or "").strip()
         if not clean:
             raise ValueError("재료 이름을 입력해주세요.")
         with get_conn() as conn, conn.cursor() as cur:
+            # LAST_INSERT_ID(expr) hands back the existing row's id on a duplicate as well
             cur.execute(
                 """
                 INSERT INTO ingredient (ingredient_name)
                 VALUES (%s)
-                ON DUPLICATE KEY UPDATE ingredient_name=VALUES(ingredient_name)
+                ON DUPLICATE KEY UPDATE ingredient_id=LAST_INSERT_ID(ingredient_id)
                 """,
                 (clean,),
             )
-        return {"name": clean}
+            ingredient_id = int(cur.lastrowid)
+        catalog.note_added(ingredient_id, clean)
+        autocomplete.add(ingredient_id, clean)
+        return {"id": ingredient_id, "name": clean}
 
 
 ingredient_service = IngredientService()
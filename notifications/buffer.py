@@ -0,0 +1,105 @@
+# notifications/buffer.py
+"""
+짧은 시간 안에 쏟아지는 알림(배지 배치, 좋아요, 리마인더 스윕 등)을 모아
+multi-row INSERT 한 번으로 저장하는 버퍼.
+
+- add()는 바로 돌아오고, 첫 알림 후 window_sec가 지나거나 max_rows가 차면 flush된다.
+- 앱 종료 시 app.lifespan이 flush_notifications()를 불러 남은 알림을 저장한다.
+"""
+import atexit
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+Row = Dict[str, Any]
+
+BUFFER_WINDOW_MS = int(os.getenv("NOTIFY_BUFFER_WINDOW_MS", "200"))
+BUFFER_MAX_ROWS = int(os.getenv("NOTIFY_BUFFER_MAX", "500"))
+
+
+class NotificationBuffer:
+    def __init__(
+        self,
+        writer: Callable[[List[Row]], Any],
+        window_sec: float = BUFFER_WINDOW_MS / 1000.0,
+        max_rows: int = BUFFER_MAX_ROWS,
+    ):
+        self.writer = writer
+        self.window = max(0.0, window_sec)
+        self.max_rows = max(1, max_rows)
+        self._lock = threading.Lock()
+        self._rows: List[Row] = []
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+
+    def add(self, row: Row) -> None:
+        with self._lock:
+            if self._closed or self.window == 0:
+                batch = [row]
+            else:
+                self._rows.append(row)
+                if len(self._rows) < self.max_rows:
+                    if self._timer is None:
+                        self._timer = threading.Timer(self.window, self.flush)
+                        self._timer.daemon = True
+                        self._timer.start()
+                    return
+                batch = self._take()
+        self._write(batch)
+
+    def flush(self) -> int:
+        """모인 알림을 지금 저장하고 저장한 건수를 돌려준다."""
+        with self._lock:
+            batch = self._take()
+        return self._write(batch)
+
+    def close(self) -> int:
+        """남은 알림을 저장하고, 이후 add()는 버퍼 없이 바로 저장한다."""
+        with self._lock:
+            self._closed = True
+            batch = self._take()
+        return self._write(batch)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    def _take(self) -> List[Row]:
+        # lock을 잡은 상태에서만 호출
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._rows = self._rows, []
+        return batch
+
+    def _write(self, batch: List[Row]) -> int:
+        if not batch:
+            return 0
+        try:
+            self.writer(batch)
+            return len(batch)
+        except Exception as e:
+            print(f"[NotificationBuffer] failed to write {len(batch)} notifications:", e)
+            return 0
+
+
+_buffer: Optional[NotificationBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> NotificationBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                # service -> buffer 순환 import를 피하려고 여기서 가져온다
+                from notifications.service import notify_many
+
+                _buffer = NotificationBuffer(notify_many)
+                # lifespan 밖(스크립트 등)에서 쓰였을 때도 프로세스 종료 전에 남은 알림을 저장한다
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def flush_notifications() -> int:
+    return _buffer.flush() if _buffer is not None else 0
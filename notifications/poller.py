@@ -1,39 +1,143 @@
 # notifications/poller.py
 import asyncio
+import os
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, Callable, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 from core.database import get_conn
+from core.metrics import metrics
+from notifications.transport import NotificationTransport, build_transport
+from notifications.unread import unread_counter
 
 Row = Dict[str, Any]
-Subscriber = Callable[[Row], None]
+
+# 직접 발행(publish)과 DB 폴링으로 같은 알림이 두 번 들어오므로 최근 id를 기억해 중복을 거른다
+DELIVERED_ID_MEMORY = 10000
+
+POLL_BATCH_SIZE = int(os.getenv("NOTIFY_POLL_BATCH", "500"))
+# 동시에 INSERT된 알림은 id 순서와 커밋 순서가 다를 수 있어, 매 폴링마다 워터마크 직전 몇 건을 다시 본다
+# (이미 전달한 id는 _delivered에서 걸러진다)
+POLL_REWIND_IDS = int(os.getenv("NOTIFY_POLL_REWIND", "50"))
+
+ROWS_BEHIND = metrics.gauge(
+    "notification_poller_rows_behind",
+    "notification_id gap between the table head and the poller watermark at the start of the last poll.",
+)
+OLDEST_UNDELIVERED_AGE = metrics.gauge(
+    "notification_poller_oldest_undelivered_seconds",
+    "Age of the oldest not-yet-delivered row the last poll picked up (0 when it found nothing new).",
+)
+ROWS_POLLED = metrics.counter(
+    "notification_poller_rows_total",
+    "New rows delivered by the notification poller (rewound, already delivered rows are not counted).",
+)
+STREAM_DROPPED = metrics.counter(
+    "notification_stream_dropped_total",
+    "Rows not queued to a slow SSE client, by overflow policy.",
+    ["policy"],
+)
+
+STREAM_QUEUE_SIZE = int(os.getenv("NOTIFY_STREAM_QUEUE_SIZE", "100"))
+STREAM_OVERFLOW = (os.getenv("NOTIFY_STREAM_OVERFLOW") or "drop_oldest").strip().lower()
+
+
+class StreamQueue(asyncio.Queue):
+    """
+    SSE 연결 하나의 크기 제한 큐.
+
+    느린 클라이언트 때문에 메모리가 계속 늘지 않도록, 가득 차면 정책에 따라
+    - drop_oldest: 가장 오래된 알림을 버리고 새 알림을 넣는다
+    - disconnect: 연결을 끊게 표시한다 (클라이언트는 Last-Event-ID로 재개)
+    """
+
+    def __init__(self, maxsize: int = STREAM_QUEUE_SIZE, overflow: str = STREAM_OVERFLOW):
+        super().__init__(maxsize=max(1, maxsize))
+        self.overflow = overflow if overflow in ("drop_oldest", "disconnect") else "drop_oldest"
+        self.overflowed = False
+        self.dropped = 0
+
+    def offer(self, row: Row) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.put_nowait(row)
+            return
+        except asyncio.QueueFull:
+            pass
+        self.dropped += 1
+        STREAM_DROPPED.inc(policy=self.overflow)
+        if self.overflow == "disconnect":
+            self.overflowed = True
+            return
+        self.get_nowait()
+        self.put_nowait(row)
 
 
 class NotificationPoller:
     """
-    DB의 notifications 테이블을 주기적으로 스캔해서
-    새로 생긴 레코드를 구독자들에게 브로드캐스트하는 폴러.
+    새 알림을 해당 유저의 구독 큐로만 전달하는 팬아웃.
+
+    - notify()가 publish()로 넘겨주는 row는 즉시 전달된다 (같은 프로세스는 ms 단위).
+    - 다른 워커에서 저장된 row는 transport를 통해 들어온다.
+    - DB의 notifications 테이블을 주기적으로 스캔하는 폴링은 놓친 알림을 메우는 catch-up 경로다.
     """
-    def __init__(self, interval_sec: int = 5):
+    def __init__(
+        self,
+        interval_sec: int = 5,
+        transport: Optional[NotificationTransport] = None,
+        batch_size: int = POLL_BATCH_SIZE,
+    ):
         self.interval = interval_sec
+        self.batch_size = max(1, batch_size)
         self.task: Optional[asyncio.Task] = None
-        self.last_ts: Optional[datetime] = None
-        self.subscribers: List[Subscriber] = []
+        # notification_id 워터마크: 이 값 이하의 알림은 이미 처리했다
+        self.last_id: Optional[int] = None
+        self._boot_id = 0
+        # user_id -> 그 유저의 SSE 연결 큐들
+        self.subscribers: Dict[str, Set[StreamQueue]] = {}
+        self.transport = transport or build_transport()
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._delivered: "OrderedDict[int, None]" = OrderedDict()
 
     # --- 구독/해지 ---
-    def subscribe(self, fn: Subscriber) -> None:
-        if fn not in self.subscribers:
-            self.subscribers.append(fn)
+    def subscribe(self, user_id: str, queue: StreamQueue) -> None:
+        self.subscribers.setdefault(str(user_id), set()).add(queue)
+
+    def unsubscribe(self, user_id: str, queue: StreamQueue) -> None:
+        queues = self.subscribers.get(str(user_id))
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(str(user_id), None)
 
-    def unsubscribe(self, fn: Subscriber) -> None:
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in list(self.subscribers.values()))
+
+    # --- 직접 발행 ---
+    def publish(self, row: Row) -> None:
+        """
+        방금 INSERT된 알림 row를 이 프로세스의 구독자와 다른 워커로 보낸다.
+        notify()가 스레드풀/스케줄러 스레드에서 부르므로 스레드 안전해야 한다.
+        """
+        self._deliver_threadsafe(row)
         try:
-            self.subscribers.remove(fn)
-        except ValueError:
-            pass
+            self.transport.publish(row)
+        except Exception as e:
+            print("[NotificationPoller] transport publish error:", e)
+
+    def _deliver_threadsafe(self, row: Row) -> None:
+        loop = self._event_loop
+        if loop is None or loop.is_closed():
+            return  # 폴러가 안 떠 있는 프로세스(스크립트 등)에는 구독자도 없다
+        loop.call_soon_threadsafe(self._dispatch, [row], False)
 
     # --- 라이프사이클 ---
     async def start(self) -> None:
         if self.task:
             return
+        self._event_loop = asyncio.get_running_loop()
+        self.transport.start(self._deliver_threadsafe)
         self.task = asyncio.create_task(self._loop())
 
     async def stop(self) -> None:
@@ -44,42 +148,117 @@ class NotificationPoller:
             except asyncio.CancelledError:
                 pass
             self.task = None
+        self.transport.stop()
+        self._event_loop = None
 
     # --- 내부 루프 ---
     async def _loop(self) -> None:
         while True:
-            await asyncio.to_thread(self._check_once)
+            try:
+                await self._poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("[NotificationPoller] error:", e)
             await asyncio.sleep(self.interval)
 
-    def _check_once(self) -> None:
+    async def _poll_once(self) -> None:
         """
-        last_ts 이후로 생성된 notifications를 가져와
-        모든 구독자에게 순서대로 전달.
+        워터마크 이후의 알림을 batch_size 단위로 끝까지 따라잡는다.
+        DB 조회만 스레드에서 하고, asyncio.Queue 전달은 이벤트 루프에서 한다.
         """
+        if self.last_id is None:
+            # 부팅 시점 이전 알림은 재전송하지 않는다 (초기 목록은 /me/notifications가 담당)
+            self.last_id = self._boot_id = await asyncio.to_thread(self._fetch_head_id)
+            return
+
+        head_id = await asyncio.to_thread(self._fetch_head_id)
+        ROWS_BEHIND.set(max(0, head_id - self.last_id))
+        oldest_age = 0.0
+        cursor = max(self._boot_id, self.last_id - POLL_REWIND_IDS)
+        now = datetime.now()
+        while True:
+            rows = await asyncio.to_thread(self._fetch_after, cursor)
+            # 되감기로 다시 읽은(이미 전달한) 행은 지표에서 뺀다
+            fresh = self._dispatch(rows)
+            ROWS_POLLED.inc(len(fresh))
+            for row in fresh:
+                created_at = row.get("created_at")
+                if isinstance(created_at, datetime):
+                    oldest_age = max(oldest_age, (now - created_at).total_seconds())
+            if len(rows) < self.batch_size:
+                break
+            cursor = int(rows[-1]["notification_id"])
+        OLDEST_UNDELIVERED_AGE.set(round(oldest_age, 3))
+
+    def _fetch_head_id(self) -> int:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(notification_id), 0) AS head_id FROM notifications")
+            row = cur.fetchone() or {}
+        return int(row.get("head_id") or 0)
+
+    def _fetch_after(self, last_id: int) -> List[Row]:
+        """워터마크(notification_id) 이후의 알림을 id 순서대로 한 배치 가져온다."""
         sql = """
             SELECT notification_id, id, type, related_id, title, body, link_url, created_at, is_read
             FROM notifications
-            WHERE (%s IS NULL OR created_at > %s)
-            ORDER BY created_at ASC
-            LIMIT 500
+            WHERE notification_id > %s
+            ORDER BY notification_id ASC
+            LIMIT %s
         """
         with get_conn() as conn, conn.cursor() as cur:
-            cur.execute(sql, (self.last_ts, self.last_ts))
-            rows = cur.fetchall()
+            cur.execute(sql, (last_id, self.batch_size))
+            return cur.fetchall()
 
-        # 새로 생긴 알림을 각 구독자에게 브로드캐스트
+    def _dispatch(self, rows: List[Row], from_db: bool = True) -> List[Row]:
+        """
+        각 알림을 받는 유저의 큐에만 넣고, 이번에 처음 전달한 행을 돌려준다.
+        폴링 1회 비용은 O(rows + 매칭된 연결 수)로, 전체 연결 수와 무관하다.
+        """
+        fresh: List[Row] = []
         for row in rows:
-            for fn in list(self.subscribers):
+            if from_db:
+                self.last_id = max(self.last_id or 0, int(row["notification_id"]))
+            if not self._remember(row.get("notification_id")):
+                continue
+            fresh.append(row)
+            # 프로세스마다 알림 한 건당 정확히 한 번 이 지점을 지나므로 안 읽음 카운터도 여기서 올린다
+            unread_counter.incr(row.get("id"))
+            for queue in list(self.subscribers.get(str(row.get("id")), ())):
                 try:
-                    fn(row)
+                    queue.offer(row)
                 except Exception:
-                    # 개별 구독자 에러는 전체 브로드캐스트에 영향 주지 않음
+                    # 개별 연결 에러는 전체 전달에 영향 주지 않음
                     pass
-            self.last_ts = row["created_at"]
+        return fresh
+
+    def _remember(self, notification_id: Any) -> bool:
+        """처음 보는 알림이면 기록하고 True, 이미 전달한 알림이면 False."""
+        if notification_id is None:
+            return True
+        key = int(notification_id)
+        if key in self._delivered:
+            return False
+        self._delivered[key] = None
+        if len(self._delivered) > DELIVERED_ID_MEMORY:
+            self._delivered.popitem(last=False)
+        return True
+
+
+def _default_interval(transport: NotificationTransport) -> int:
+    # 다른 워커의 알림도 transport로 즉시 오면 폴링은 catch-up만 하면 되므로 더 느슨하게 돈다
+    fallback = "15" if transport.cross_process else "5"
+    return int(os.getenv("NOTIFY_POLL_INTERVAL", fallback))
 
 
 # 전역 싱글톤 폴러 인스턴스
-_poller = NotificationPoller()
+_transport = build_transport()
+_poller = NotificationPoller(interval_sec=_default_interval(_transport), transport=_transport)
+
+metrics.gauge(
+    "notification_stream_connections",
+    "Open SSE notification streams in this process.",
+).set_function(_poller.connection_count)
 
 async def start_poller() -> None:
     await _poller.start()
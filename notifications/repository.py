@@ -1,5 +1,5 @@
 # cookus-backend/notifications/repository.py
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from core.database import get_conn
 
@@ -23,7 +23,52 @@ def insert_notification(
         row = cur.fetchone()
         return int(row["id"])
 
-def list_notifications(user_id: str, since: Optional[datetime]) -> List[Dict[str, Any]]:
+def insert_notifications(rows: List[Dict[str, Any]], conn=None, chunk_size: int = 500) -> List[int]:
+    """여러 알림을 multi-row INSERT로 한 번에 저장하고 생성된 id 목록을 돌려준다.
+
+    단일 INSERT 문의 AUTO_INCREMENT 값은 연속이므로 LAST_INSERT_ID()부터 행 수만큼이 id다.
+    """
+    if not rows:
+        return []
+    owns_conn = conn is None
+    conn = conn or get_conn()
+    ids: List[int] = []
+    try:
+        with conn.cursor() as cur:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                values = ", ".join(["(%s, %s, %s, %s, %s, %s, NOW(), 0)"] * len(chunk))
+                params: List[Any] = []
+                for r in chunk:
+                    params.extend([
+                        r["user_id"],
+                        r.get("type") or "generic",
+                        r.get("related_id"),
+                        r["title"],
+                        r["body"],
+                        r.get("link_url"),
+                    ])
+                cur.execute(
+                    f"""
+                    INSERT INTO notifications (id, type, related_id, title, body, link_url, created_at, is_read)
+                    VALUES {values}
+                    """,
+                    tuple(params),
+                )
+                first_id = int(cur.lastrowid)
+                ids.extend(range(first_id, first_id + len(chunk)))
+    finally:
+        if owns_conn:
+            conn.close()
+    return ids
+
+def list_notifications(
+    user_id: str,
+    since: Optional[datetime],
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """최신순 알림 목록. before=(created_at, notification_id)이면 그 행 다음부터 이어서 준다."""
     sql = """
         SELECT notification_id, id, type, related_id, title, body, link_url, created_at, read_at, is_read
         FROM notifications
@@ -33,21 +78,66 @@ def list_notifications(user_id: str, since: Optional[datetime]) -> List[Dict[str
     if since:
         sql += " AND created_at >= %s"
         params.append(since)
-    sql += " ORDER BY created_at DESC LIMIT 100"
+    if before:
+        sql += " AND (created_at < %s OR (created_at = %s AND notification_id < %s))"
+        params.extend([before[0], before[0], before[1]])
+    sql += " ORDER BY created_at DESC, notification_id DESC LIMIT %s"
+    params.append(int(limit))
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(sql, tuple(params))
         return cur.fetchall()
 
-def mark_read(user_id: str, notification_id: int) -> None:
+def list_notifications_after(user_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+    """SSE 재연결(Last-Event-ID) 시 놓친 알림 중 가장 최근 limit건을 id 오름차순으로 돌려준다."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT notification_id, id, type, related_id, title, body, link_url, created_at, is_read
+            FROM notifications
+            WHERE id=%s AND notification_id > %s
+            ORDER BY notification_id DESC
+            LIMIT %s
+            """,
+            (user_id, after_id, limit),
+        )
+        return list(reversed(cur.fetchall() or []))
+
+def mark_read(user_id: str, notification_id: int) -> int:
+    """읽음 처리하고, 실제로 안 읽음 → 읽음으로 바뀐 행 수를 돌려준다."""
     with get_conn() as conn, conn.cursor() as cur:
         cur.execute(
             """
             UPDATE notifications
             SET is_read=1, read_at=NOW()
-            WHERE notification_id=%s AND id=%s
+            WHERE notification_id=%s AND id=%s AND is_read=0
             """,
             (notification_id, user_id),
         )
+        return cur.rowcount
+
+def mark_all_read(user_id: str, up_to_id: Optional[int] = None) -> int:
+    """안 읽은 알림을 전부(또는 up_to_id 이하만) 읽음 처리한다."""
+    sql = """
+        UPDATE notifications
+        SET is_read=1, read_at=NOW()
+        WHERE id=%s AND is_read=0
+    """
+    params: List[Any] = [user_id]
+    if up_to_id is not None:
+        sql += " AND notification_id <= %s"
+        params.append(up_to_id)
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, tuple(params))
+        return cur.rowcount
+
+def count_unread(user_id: str) -> int:
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT COUNT(*) AS cnt FROM notifications WHERE id=%s AND is_read=0",
+            (user_id,),
+        )
+        row = cur.fetchone() or {}
+        return int(row.get("cnt") or 0)
 
 def exists_today_supplement_notice(user_id: str, plan_id: int) -> bool:
     """같은 plan_id(영양제 복용 계획)에 대해 오늘 이미 알림을 보냈는지 확인"""
@@ -3,40 +3,94 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
 
 from core import get_current_user
+from core.pagination import decode_cursor, encode_cursor
 from core.security import token_service
-from notifications.repository import list_notifications, mark_read
-from notifications.poller import get_poller
+from notifications.repository import list_notifications, list_notifications_after, mark_all_read, mark_read
+from notifications.poller import StreamQueue, get_poller
+from notifications.unread import unread_counter
 
 router = APIRouter(prefix="/me", tags=["notifications"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
 @router.get("/notifications", response_model=List[Dict[str, Any]])
 def get_notifications_api(
+    response: Response,
     since: Optional[datetime] = Query(default=None),
+    cursor: Optional[str] = Query(default=None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(default=100, ge=1, le=100),
     user_id: str = Depends(get_current_user),
 ):
-    # 초기 진입 시 최근 알림 목록
-    return list_notifications(user_id, since)
+    # 초기 진입 시 최근 알림 목록. 다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 준다
+    try:
+        before = decode_cursor(cursor, 2)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    rows = list_notifications(user_id, since, tuple(before) if before else None, limit + 1)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["created_at"], last["notification_id"])
+    return rows
+
+@router.get("/notifications/unread-count")
+def get_unread_count_api(user_id: str = Depends(get_current_user)):
+    # 뱃지 갱신용: 프로세스 내 카운터에서 바로 응답 (주기적으로 DB와 재동기화)
+    return {"unread": unread_counter.get(user_id)}
 
 @router.post("/notifications/{notification_id}/read")
 def set_read_api(notification_id: int, user_id: str = Depends(get_current_user)):
     # 단건 읽음 처리
-    mark_read(user_id, notification_id)
+    changed = mark_read(user_id, notification_id)
+    if changed:
+        unread_counter.decr(user_id, changed)
     return {"ok": True}
 
+@router.post("/notifications/read-all")
+def set_all_read_api(
+    up_to_id: Optional[int] = Query(default=None, description="이 id 이하만 읽음 처리 (없으면 전부)"),
+    user_id: str = Depends(get_current_user),
+):
+    changed = mark_all_read(user_id, up_to_id)
+    if changed:
+        unread_counter.decr(user_id, changed)
+    return {"ok": True, "updated": changed}
+
 # -------------------------
 #     SSE 스트리밍
 # -------------------------
+STREAM_HEARTBEAT_SEC = float(os.getenv("NOTIFY_STREAM_HEARTBEAT", "15"))
+STREAM_REPLAY_LIMIT = int(os.getenv("NOTIFY_STREAM_REPLAY_LIMIT", "200"))
+STREAM_RETRY_MS = int(os.getenv("NOTIFY_STREAM_RETRY_MS", "5000"))
+
+
+def _sse_event(row: Dict[str, Any]) -> str:
+    return (
+        f"id: {row.get('notification_id')}\n"
+        "data: " + json.dumps(row, default=str, ensure_ascii=False) + "\n\n"
+    )
+
+
 @router.get("/notifications/stream")
-async def stream_notifications(access_token: Optional[str] = Query(default=None)):
+async def stream_notifications(
+    request: Request,
+    access_token: Optional[str] = Query(default=None),
+    last_event_id: Optional[int] = Query(default=None),
+):
     """
     EventSource는 Authorization 헤더를 못 보낸다 → 쿼리로 토큰을 받는다.
+
+    재연결 시 브라우저가 보내는 Last-Event-ID(또는 last_event_id 쿼리) 이후의 알림을
+    DB에서 먼저 재전송하므로, 클라이언트가 /me/notifications를 다시 받을 필요가 없다.
     """
     if not access_token:
         raise HTTPException(status_code=401, detail="missing access_token")
@@ -48,28 +102,51 @@ async def stream_notifications(access_token: Optional[str] = Query(default=None)
     except Exception:
         raise HTTPException(status_code=401, detail="invalid token")
 
-    queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
-    poller = get_poller()
+    resume_from = last_event_id
+    header_id = request.headers.get("last-event-id")
+    if resume_from is None and header_id and header_id.strip().isdigit():
+        resume_from = int(header_id.strip())
 
-    # 폴러가 새 알림을 발견하면 여기로 한 건씩 들어온다
-    def _subscriber(row: Dict[str, Any]) -> None:
-        if str(row.get("id")) == user_id:  # 내 알림만
-            try:
-                queue.put_nowait(row)
-            except Exception:
-                pass
+    queue = StreamQueue()
+    poller = get_poller()
 
-    poller.subscribe(_subscriber)  # 구독 시작
+    # 폴러/발행 경로가 내 알림을 발견하면 이 큐로 한 건씩 들어온다
+    # 재전송 조회보다 먼저 구독해야 그 사이에 들어온 알림을 놓치지 않는다
+    poller.subscribe(user_id, queue)  # 구독 시작
 
     async def event_generator():
         try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+
+            replayed: set = set()
+            if resume_from is not None:
+                missed = await asyncio.to_thread(
+                    list_notifications_after, user_id, resume_from, STREAM_REPLAY_LIMIT + 1
+                )
+                if len(missed) > STREAM_REPLAY_LIMIT:
+                    # 너무 많이 놓쳤으면 목록 API로 다시 받도록 알리고, 가장 최근 것만 재전송한다
+                    yield "event: resync\ndata: {}\n\n"
+                    missed = missed[-STREAM_REPLAY_LIMIT:]
+                for row in missed:
+                    replayed.add(row["notification_id"])
+                    yield _sse_event(row)
+
             while True:
-                row = await queue.get()  # 새 알림 대기
-                yield "data: " + json.dumps(row, default=str, ensure_ascii=False) + "\n\n"
+                try:
+                    row = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    # 프록시가 유휴 연결을 끊지 않도록 주석 프레임을 보낸다
+                    yield ": keepalive\n\n"
+                    continue
+                if queue.overflowed:
+                    break  # disconnect 정책: 클라이언트가 Last-Event-ID로 재개한다
+                if row.get("notification_id") in replayed:
+                    continue
+                yield _sse_event(row)
         except asyncio.CancelledError:
             pass
         finally:
-            poller.unsubscribe(_subscriber)  # 끊길 때 정리
+            poller.unsubscribe(user_id, queue)  # 끊길 때 정리
 
     headers = {
         "Cache-Control": "no-cache",
@@ -1,5 +1,23 @@
 # cookus-backend/notifications/service.py
-from notifications.repository import insert_notification
+from datetime import datetime
+from typing import Any, Dict, List
+
+from notifications.repository import insert_notification, insert_notifications
+from notifications.poller import get_poller
+from notifications.buffer import get_buffer
+
+def _published_row(notification_id: int, row: Dict[str, Any], created_at: datetime) -> Dict[str, Any]:
+    return {
+        "notification_id": notification_id,
+        "id": row["user_id"],
+        "type": row.get("type") or "generic",
+        "related_id": row.get("related_id"),
+        "title": row["title"],
+        "body": row["body"],
+        "link_url": row.get("link_url"),
+        "created_at": created_at,
+        "is_read": 0,
+    }
 
 def notify(
     user_id: str,
@@ -9,4 +27,48 @@ def notify(
     type: str = "generic",
     related_id: int | None = None,
 ) -> int:
-    return insert_notification(user_id, title, body, link_url, type, related_id)
+    notification_id = insert_notification(user_id, title, body, link_url, type, related_id)
+    # DB 폴링을 기다리지 않고 SSE 구독자에게 바로 보낸다 (폴러는 catch-up 용도로 남는다)
+    get_poller().publish(_published_row(notification_id, {
+        "user_id": user_id,
+        "type": type,
+        "related_id": related_id,
+        "title": title,
+        "body": body,
+        "link_url": link_url,
+    }, datetime.now()))
+    return notification_id
+
+def notify_many(rows: List[Dict[str, Any]], conn=None) -> List[int]:
+    """
+    여러 알림을 multi-row INSERT로 저장하고 SSE 구독자에게 보낸다.
+    rows는 user_id, title, body와 선택적으로 link_url, type, related_id를 가진 dict.
+    conn을 넘기면 호출자의 연결(autocommit)에서 INSERT한다.
+    """
+    ids = insert_notifications(rows, conn=conn)
+    created_at = datetime.now()
+    poller = get_poller()
+    for notification_id, row in zip(ids, rows):
+        poller.publish(_published_row(notification_id, row, created_at))
+    return ids
+
+def notify_buffered(
+    user_id: str,
+    title: str,
+    body: str,
+    link_url: str | None = None,
+    type: str = "generic",
+    related_id: int | None = None,
+) -> None:
+    """
+    notify()와 같지만 바로 INSERT하지 않고 NotificationBuffer에 모아 두었다가 한 번에 저장한다.
+    id가 필요 없는 fire-and-forget 알림(좋아요, 배지, 리마인더)에 쓴다.
+    """
+    get_buffer().add({
+        "user_id": user_id,
+        "title": title,
+        "body": body,
+        "link_url": link_url,
+        "type": type,
+        "related_id": related_id,
+    })
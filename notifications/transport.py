@@ -0,0 +1,145 @@
+# notifications/transport.py
+"""
+notify()로 방금 저장된 알림 row를 다른 워커 프로세스로 실어 나르는 전송 계층.
+
+- local: 같은 LocalBus에 붙은 전송끼리만 전달 (단일 프로세스 배포/테스트용)
+- redis: Redis pub/sub 채널로 전달 (redis 패키지가 설치되어 있어야 함)
+
+어떤 전송이든 DB 폴러가 여전히 catch-up 경로로 동작하므로, 전송 실패는 지연일 뿐 유실이 아니다.
+"""
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import redis
+except Exception:
+    redis = None
+
+Row = Dict[str, Any]
+Handler = Callable[[Row], None]
+
+
+class NotificationTransport:
+    """프로세스 간 알림 전달 인터페이스."""
+
+    #: 다른 프로세스까지 전달하는지 여부 (폴링 주기 기본값 결정에 사용)
+    cross_process = False
+
+    def start(self, handler: Handler) -> None:
+        """다른 프로세스에서 발행된 row를 handler로 넘기기 시작한다."""
+
+    def publish(self, row: Row) -> None:
+        """이 프로세스에서 저장한 row를 다른 프로세스로 보낸다."""
+
+    def stop(self) -> None:
+        pass
+
+
+class LocalBus:
+    """LocalTransport들이 공유하는 인메모리 버스."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._members: List["LocalTransport"] = []
+
+    def attach(self, member: "LocalTransport") -> None:
+        with self._lock:
+            if member not in self._members:
+                self._members.append(member)
+
+    def detach(self, member: "LocalTransport") -> None:
+        with self._lock:
+            if member in self._members:
+                self._members.remove(member)
+
+    def send(self, sender: "LocalTransport", row: Row) -> None:
+        with self._lock:
+            members = [m for m in self._members if m is not sender]
+        for member in members:
+            member.deliver(row)
+
+
+class LocalTransport(NotificationTransport):
+    """
+    같은 LocalBus를 공유하는 전송끼리만 전달한다.
+    테스트에서는 버스 하나에 폴러 여러 개를 붙여 워커 여러 개를 흉내낼 수 있다.
+    """
+
+    def __init__(self, bus: Optional[LocalBus] = None):
+        self.bus = bus or LocalBus()
+        self._handler: Optional[Handler] = None
+
+    def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self.bus.attach(self)
+
+    def publish(self, row: Row) -> None:
+        self.bus.send(self, row)
+
+    def deliver(self, row: Row) -> None:
+        if self._handler:
+            self._handler(dict(row))
+
+    def stop(self) -> None:
+        self.bus.detach(self)
+        self._handler = None
+
+
+class RedisTransport(NotificationTransport):
+    """Redis pub/sub 채널로 워커 간 알림을 전달한다."""
+
+    cross_process = True
+
+    def __init__(self, url: str, channel: str = "cookus:notifications"):
+        if redis is None:
+            raise RuntimeError("redis package is not installed")
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._origin = uuid.uuid4().hex
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, handler: Handler) -> None:
+        if self._thread:
+            return
+
+        def _on_message(message: Dict[str, Any]) -> None:
+            try:
+                payload = json.loads(message["data"])
+            except Exception:
+                return
+            # 내가 보낸 건 이미 로컬로 전달했으므로 건너뛴다
+            if payload.get("origin") == self._origin:
+                return
+            handler(payload.get("row") or {})
+
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: _on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, row: Row) -> None:
+        payload = {"origin": self._origin, "row": row}
+        self._client.publish(self.channel, json.dumps(payload, default=str, ensure_ascii=False))
+
+    def stop(self) -> None:
+        if self._thread:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+def build_transport() -> NotificationTransport:
+    """NOTIFY_TRANSPORT 환경변수(local|redis)에 맞는 전송을 만든다."""
+    kind = (os.getenv("NOTIFY_TRANSPORT") or "local").strip().lower()
+    if kind == "redis":
+        url = os.getenv("NOTIFY_REDIS_URL") or os.getenv("REDIS_URL") or "redis://localhost:6379/0"
+        try:
+            return RedisTransport(url, channel=os.getenv("NOTIFY_REDIS_CHANNEL", "cookus:notifications"))
+        except Exception as e:
+            print("[notifications.transport] redis unavailable, falling back to local:", e)
+    return LocalTransport()
@@ -0,0 +1,49 @@
+# notifications/unread.py
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from notifications.repository import count_unread
+
+UNREAD_TTL_SEC = float(os.getenv("NOTIFY_UNREAD_TTL", "60"))
+
+
+class UnreadCounter:
+    """
+    유저별 안 읽은 알림 수를 프로세스 메모리에 들고 있는 카운터.
+
+    - 처음 조회하거나 TTL이 지나면 DB COUNT로 다시 맞춘다 (다른 워커에서 읽음 처리한 경우 등)
+    - 그 사이에는 새 알림 전달(폴러)과 읽음 처리(mark_read)로 증감만 한다
+    """
+
+    def __init__(self, ttl_sec: float = UNREAD_TTL_SEC):
+        self.ttl = ttl_sec
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Tuple[int, float]] = {}
+
+    def get(self, user_id: str) -> int:
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counts.get(key)
+        if entry and now - entry[1] < self.ttl:
+            return entry[0]
+        count = count_unread(key)
+        with self._lock:
+            self._counts[key] = (count, now)
+        return count
+
+    def incr(self, user_id: str, amount: int = 1) -> None:
+        """캐시에 올라와 있는 유저만 갱신한다 (없으면 다음 get에서 DB로 읽는다)."""
+        key = str(user_id)
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry:
+                self._counts[key] = (max(0, entry[0] + amount), entry[1])
+
+    def decr(self, user_id: str, amount: int = 1) -> None:
+        self.incr(user_id, -amount)
+
+
+unread_counter = UnreadCounter()
@@ -0,0 +1,87 @@
+"""Per-user candidate pool cache for the recommendation workflow.
+
+The fridge read, keyword extraction and up to four LIKE scans over the recipe
+table depend only on the user's fridge content, so their result is cached
+under (user, fridge version, limit); the limit decides how far the LIKE
+fallbacks go. A fridge save bumps the version, which makes the old entry
+unreachable; the fridge change listener also drops it right away so it does
+not sit in memory until LRU eviction.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from core.metrics import metrics
+from fridge.events import FridgeChange, add_fridge_listener
+
+CANDIDATE_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMEND_CANDIDATE_CACHE_SIZE", "2000"))
+
+CACHE_REQUESTS = metrics.counter(
+    "recommend_candidate_cache_requests_total",
+    "Recommendation candidate pool cache lookups by result (hit/miss).",
+    ["result"],
+)
+
+
+@dataclass
+class CandidatePool:
+    fridge: pd.DataFrame
+    keywords: List[str]
+    candidates: List[Dict[str, Any]]
+
+
+class CandidateCache:
+    def __init__(self, max_entries: int = CANDIDATE_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, int], CandidatePool]" = OrderedDict()
+
+    def get_or_load(
+        self, user_id: str, version: int, limit: int, load: Callable[[], CandidatePool]
+    ) -> CandidatePool:
+        key = (str(user_id), int(version), int(limit))
+        with self._lock:
+            pool = self._entries.get(key)
+            if pool is not None:
+                self._entries.move_to_end(key)
+        if pool is not None:
+            CACHE_REQUESTS.inc(result="hit")
+            return pool
+        CACHE_REQUESTS.inc(result="miss")
+        pool = load()
+        with self._lock:
+            self._entries[key] = pool
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pool
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == str(user_id)]:
+                self._entries.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+candidate_cache = CandidateCache()
+
+metrics.gauge(
+    "recommend_candidate_cache_entries",
+    "Entries in the recommendation candidate pool cache.",
+).set_function(candidate_cache.size)
+
+
+def _on_fridge_change(change: FridgeChange) -> None:
+    candidate_cache.invalidate_user(change.user_id)
+
+
+add_fridge_listener(_on_fridge_change)
@@ -0,0 +1,106 @@
+"""recipe_ingredient: which canonical ingredient ids each recipe uses.
+
+Built from `recipe.ingredient_full` by resolving every token through the
+ingredient catalog, so candidate search can join on integer ids instead of
+running `ingredient_full LIKE '%kw%'` per fridge keyword. Tokens that do not
+resolve to an ingredient are skipped (and counted).
+
+Rebuild after loading recipes or growing the ingredient dictionary:
+
+    python -m recommendations.core.ingredient_index build [--chunk 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Dict, List, Optional
+
+from core import get_conn
+from core.schema import register_schema
+from ingredients.catalog import catalog
+
+from .utils import _extract_tokens_from_ingredients_text, _raw_token
+
+RECIPE_INGREDIENT_DDL = """
+CREATE TABLE IF NOT EXISTS recipe_ingredient (
+  recipe_id BIGINT NOT NULL,
+  ingredient_id INT UNSIGNED NOT NULL,
+  PRIMARY KEY (recipe_id, ingredient_id),
+  KEY idx_recipe_ingredient_ingredient (ingredient_id, recipe_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+register_schema("recipe_ingredient", RECIPE_INGREDIENT_DDL)
+
+
+def build_index(chunk_size: int = 500) -> Dict[str, int]:
+    """Rebuild recipe_ingredient in recipe_id order, one transaction per chunk of recipes."""
+    chunk_size = max(1, chunk_size)
+    catalog.reload()
+    stats = {"recipes": 0, "links": 0, "unresolved": 0}
+    last_id = 0
+    while True:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT recipe_id, ingredient_full FROM recipe
+                WHERE recipe_id > %s
+                ORDER BY recipe_id
+                LIMIT %s
+                """,
+                (last_id, chunk_size),
+            )
+            rows = cur.fetchall() or []
+            if not rows:
+                break
+            last_id = int(rows[-1]["recipe_id"])
+            stats["recipes"] += len(rows)
+
+            pairs: List[int] = []
+            for row in rows:
+                tokens = _extract_tokens_from_ingredients_text(row["ingredient_full"], clean=_raw_token)
+                ids = set()
+                for token in tokens:
+                    ingredient_id = catalog.resolve(token)
+                    if ingredient_id is None:
+                        stats["unresolved"] += 1
+                    else:
+                        ids.add(ingredient_id)
+                for ingredient_id in sorted(ids):
+                    pairs.extend([int(row["recipe_id"]), ingredient_id])
+            stats["links"] += len(pairs) // 2
+
+            recipe_ids = [int(r["recipe_id"]) for r in rows]
+            conn.begin()
+            try:
+                placeholders = ", ".join(["%s"] * len(recipe_ids))
+                cur.execute(f"DELETE FROM recipe_ingredient WHERE recipe_id IN ({placeholders})", tuple(recipe_ids))
+                if pairs:
+                    values = ", ".join(["(%s, %s)"] * (len(pairs) // 2))
+                    cur.execute(
+                        f"INSERT INTO recipe_ingredient (recipe_id, ingredient_id) VALUES {values}",
+                        tuple(pairs),
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        if len(rows) < chunk_size:
+            break
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m recommendations.core.ingredient_index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("build", help="rebuild recipe_ingredient from recipe.ingredient_full")
+    cmd.add_argument("--chunk", type=int, default=500, help="recipes per transaction")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        stats = build_index(args.chunk)
+        print(f"recipes={stats['recipes']} links={stats['links']} unresolved_tokens={stats['unresolved']}")
+
+
+if __name__ == "__main__":
+    main()
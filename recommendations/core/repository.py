@@ -8,6 +8,7 @@ from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 import pandas as pd
 
 from core import get_conn
+from core.schema import register_schema
 
 
 def pick_random_user_with_fridge() -> str:
@@ -50,7 +51,7 @@ def get_user_profile(user_id: str) -> Dict[str, Any]:
 
 def get_user_fridge_items(user_id: str) -> pd.DataFrame:
     sql = """
-    SELECT id AS user_id, ingredient_name AS item_name, quantity AS amount, stored_at AS saved_at
+    SELECT id AS user_id, ingredient_name AS item_name, unit, ingredient_id, quantity AS amount, stored_at AS saved_at
     FROM fridge_item
     WHERE id=%s
     ORDER BY stored_at DESC
@@ -109,6 +110,33 @@ def fetch_candidates_like(keywords: List[str], limit: int = 200, and_top: int =
         return cur.fetchall()
 
 
+def fetch_candidates_by_ingredients(
+    ingredient_ids: Iterable[int], limit: int = 300, min_match: int = 1
+) -> List[Dict[str, Any]]:
+    """Recipes sharing at least `min_match` ingredient ids with the fridge, most shared first."""
+    ids = sorted({int(i) for i in ingredient_ids})
+    if not ids:
+        return []
+    placeholders = ",".join(["%s"] * len(ids))
+    sql = f"""
+    SELECT r.recipe_id, r.recipe_nm_ko, r.cooking_time, r.level_nm, r.ingredient_full, r.step_text, r.ty_nm,
+           m.matched
+    FROM (
+        SELECT recipe_id, COUNT(*) AS matched
+        FROM recipe_ingredient
+        WHERE ingredient_id IN ({placeholders})
+        GROUP BY recipe_id
+        HAVING COUNT(*) >= %s
+        ORDER BY matched DESC, RAND()
+        LIMIT %s
+    ) m
+    JOIN recipe r ON r.recipe_id = m.recipe_id
+    """
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(sql, (*ids, int(min_match), int(limit)))
+        return cur.fetchall() or []
+
+
 def fetch_candidates_or_only(keywords: List[str], limit: int = 300) -> List[Dict[str, Any]]:
     keywords = [kw for kw in keywords if kw]
     if not keywords:
@@ -168,20 +196,25 @@ def random_recipes_excluding(excluded_ids: Sequence[int], limit: int) -> List[Di
         return cur.fetchall() or []
 
 
+RECOMMEND_RECIPE_DDL = """
+CREATE TABLE IF NOT EXISTS recommend_recipe (
+    recommend_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    id VARCHAR(64) NOT NULL,
+    recipe_nm_ko VARCHAR(255) NOT NULL,
+    ingredient_full JSON NOT NULL,
+    step_text MEDIUMTEXT NOT NULL,
+    recipe_id BIGINT,
+    recommend_date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+register_schema("recommend_recipe", RECOMMEND_RECIPE_DDL)
+
+
 def ensure_recommend_recipe_table() -> None:
-    sql = """
-    CREATE TABLE IF NOT EXISTS recommend_recipe (
-        recommend_id BIGINT AUTO_INCREMENT PRIMARY KEY,
-        id VARCHAR(64) NOT NULL,
-        recipe_nm_ko VARCHAR(255) NOT NULL,
-        ingredient_full JSON NOT NULL,
-        step_text MEDIUMTEXT NOT NULL,
-        recipe_id BIGINT,
-        recommend_date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-    """
+    """Create recommend_recipe outside the app (scripts); the app relies on core.schema.bootstrap_schema()."""
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(sql)
+        cur.execute(RECOMMEND_RECIPE_DDL)
 
 
 def insert_recommend_recipes(rows: List[Dict[str, Any]]) -> None:
@@ -224,6 +257,7 @@ __all__ = [
     "get_user_profile",
     "get_user_fridge_items",
     "fetch_candidates_like",
+    "fetch_candidates_by_ingredients",
     "fetch_candidates_or_only",
     "recent_recommend_recipe_ids",
     "random_recipes_excluding",
@@ -8,6 +8,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
+from ingredients.catalog import catalog
+
 
 def _norm(value: str) -> str:
     text = str(value)
@@ -98,13 +100,13 @@ def diversify_candidates(candidates: List[Dict[str, Any]], want: int = 12, max_p
     return output[:want]
 
 
-def _extract_tokens_from_ingredients_text(val: Any) -> List[str]:
+def _extract_tokens_from_ingredients_text(val: Any, clean=_norm) -> List[str]:
     if val is None:
         return []
     if isinstance(val, dict):
-        return [_norm(k) for k in val.keys() if _norm(k)]
+        return [clean(k) for k in val.keys() if clean(k)]
     if isinstance(val, list):
-        return [_norm(x) for x in val if _norm(x)]
+        return [clean(x) for x in val if clean(x)]
 
     text = str(val)
     if not text:
@@ -112,32 +114,72 @@ def _extract_tokens_from_ingredients_text(val: Any) -> List[str]:
 
     hits = re.findall(r"'([^']+)'", text)
     if hits:
-        return [_norm(hit) for hit in hits if _norm(hit)]
+        return [clean(hit) for hit in hits if clean(hit)]
 
     parts = [part.strip() for part in text.replace("\n", ",").split(",")]
-    return [_norm(part) for part in parts if _norm(part)]
+    return [clean(part) for part in parts if clean(part)]
+
+
+def _raw_token(value: Any) -> str:
+    # Keeps '(목살)' and amounts so the catalog can pick the most specific form
+    return str(value).strip()
+
+
+def fridge_ingredient_names(fridge_df: pd.DataFrame) -> Dict[int, str]:
+    """Canonical ingredient id -> the name the user saved it under; rows saved before ids existed are resolved by name."""
+    names: Dict[int, str] = {}
+    stored = fridge_df["ingredient_id"] if "ingredient_id" in fridge_df else [None] * len(fridge_df)
+    for name, ingredient_id in zip(fridge_df["item_name"], stored):
+        if ingredient_id is None or pd.isna(ingredient_id):
+            ingredient_id = catalog.resolve(str(name))
+        if ingredient_id is not None:
+            names.setdefault(int(ingredient_id), _norm(name))
+    return names
 
 
-def _substitute_with_fridge(token: str, fridge_tokens: set) -> str:
-    return token if token in fridge_tokens else token
+def fridge_ingredient_ids(fridge_df: pd.DataFrame) -> set:
+    """Canonical ingredient ids in the fridge."""
+    return set(fridge_ingredient_names(fridge_df))
+
+
+def in_fridge(token: str, fridge_ids, fridge_tokens: set) -> bool:
+    """Id comparison for tokens the catalog knows; plain string comparison for the rest."""
+    ingredient_id = catalog.resolve(token)
+    if ingredient_id is not None:
+        return ingredient_id in fridge_ids
+    return _norm(token) in fridge_tokens
+
+
+def _substitute_with_fridge(token: str, fridge_names: Dict[int, str]) -> Optional[str]:
+    """The fridge item `token` canonicalizes to ('대파' -> the user's '파'), or None."""
+    ingredient_id = catalog.resolve(token)
+    if ingredient_id is None:
+        return None
+    return fridge_names.get(ingredient_id)
 
 
 def _enforce_ingredients_full(
     original_ingredients_text: Any,
+    fridge_names: Dict[int, str],
     fridge_tokens: set,
     llm_ingredient_full: Dict[str, Any],
 ) -> Dict[str, Any]:
-    required = _extract_tokens_from_ingredients_text(original_ingredients_text)
+    required = _extract_tokens_from_ingredients_text(original_ingredients_text, clean=_raw_token)
     enforced: Dict[str, Any] = {}
     for token in required:
-        substitute = _substitute_with_fridge(token, fridge_tokens)
-        if substitute in fridge_tokens:
-            if substitute in llm_ingredient_full:
-                enforced[substitute] = llm_ingredient_full.get(substitute)
-            elif token in llm_ingredient_full:
-                enforced[substitute] = llm_ingredient_full.get(token)
-            else:
-                enforced[substitute] = ""
+        substitute = _substitute_with_fridge(token, fridge_names)
+        if substitute is None:
+            if _norm(token) not in fridge_tokens:
+                continue
+            substitute = _norm(token)
+        if substitute in enforced:
+            continue
+        for key in (substitute, token, _norm(token)):
+            if key in llm_ingredient_full:
+                enforced[substitute] = llm_ingredient_full.get(key)
+                break
+        else:
+            enforced[substitute] = ""
     return enforced
 
 
@@ -156,9 +198,11 @@ def enforce_ingredients_with_fridge(
     fridge_df: pd.DataFrame,
     llm_ingredient_full: Dict[str, Any],
 ) -> Dict[str, Any]:
+    fridge_names = fridge_ingredient_names(fridge_df)
     fridge_tokens = _fridge_token_set(fridge_df)
     enforced = _enforce_ingredients_full(
         candidate.get("ingredient_full") or {},
+        fridge_names,
         fridge_tokens,
         llm_ingredient_full or {},
     )
@@ -166,7 +210,9 @@ def enforce_ingredients_with_fridge(
         return enforced
 
     # fallback: keep only LLM ingredients that user actually has
-    filtered = {k: v for k, v in (llm_ingredient_full or {}).items() if _norm(k) in fridge_tokens}
+    filtered = {
+        k: v for k, v in (llm_ingredient_full or {}).items() if in_fridge(k, fridge_names, fridge_tokens)
+    }
     return filtered
 
 
@@ -184,4 +230,7 @@ __all__ = [
     "diversify_candidates",
     "enforce_ingredients_with_fridge",
     "fridge_token_set",
+    "fridge_ingredient_ids",
+    "fridge_ingredient_names",
+    "in_fridge",
 ]
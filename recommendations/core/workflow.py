@@ -7,15 +7,21 @@ from typing import Any, Dict, List, Optional, Sequence
 
 import pandas as pd
 
+from fridge.service import get_fridge_version
+
+from .cache import CandidatePool, candidate_cache
 from .llm import RecommendationLLM
 from . import repository
 from .utils import (
+    _extract_tokens_from_ingredients_text,
     _norm,
-    _tokens_from_ingredient_full,
+    _raw_token,
     diversify_candidates,
     ensure_diverse_top,
     enforce_ingredients_with_fridge,
+    fridge_ingredient_ids,
     fridge_token_set,
+    in_fridge,
     pick_keywords_from_fridge_all,
 )
 
@@ -24,27 +30,47 @@ class RecommendationWorkflow:
     def __init__(self, llm: Optional[RecommendationLLM] = None) -> None:
         self._llm = llm or RecommendationLLM()
 
-    def recommend_json(
-        self,
-        user_id: Optional[str],
-        limit: int = 3,
-        exclude_ids: Optional[Sequence[int]] = None,
-    ) -> Dict[str, Any]:
-        uid = user_id or repository.pick_random_user_with_fridge()
-        profile = repository.get_user_profile(uid)
+    @staticmethod
+    def _load_candidate_pool(uid: str, limit: int) -> CandidatePool:
         fridge = repository.get_user_fridge_items(uid)
 
         keywords = pick_keywords_from_fridge_all(fridge, max_n=30)
 
-        recent_exclude = repository.recent_recommend_recipe_ids(uid)
-
-        candidates = repository.fetch_candidates_like(keywords, limit=300, and_top=3)
+        # Integer-id join against recipe_ingredient first; LIKE scans only when it comes up short
+        candidates: List[Dict[str, Any]] = []
+        ingredient_ids = fridge_ingredient_ids(fridge)
+        for min_match in sorted({min(3, len(ingredient_ids)), 2, 1}, reverse=True):
+            if not ingredient_ids or min_match > len(ingredient_ids):
+                continue
+            candidates = repository.fetch_candidates_by_ingredients(ingredient_ids, limit=300, min_match=min_match)
+            if len(candidates) >= limit:
+                break
+        if len(candidates) < limit:
+            candidates = repository.fetch_candidates_like(keywords, limit=300, and_top=3)
         if len(candidates) < limit:
             candidates = repository.fetch_candidates_like(keywords, limit=300, and_top=2)
         if len(candidates) < limit:
             candidates = repository.fetch_candidates_like(keywords, limit=300, and_top=1)
         if len(candidates) < limit:
             candidates = repository.fetch_candidates_or_only(keywords, limit=300)
+        return CandidatePool(fridge=fridge, keywords=keywords, candidates=candidates)
+
+    def recommend_json(
+        self,
+        user_id: Optional[str],
+        limit: int = 3,
+        exclude_ids: Optional[Sequence[int]] = None,
+    ) -> Dict[str, Any]:
+        uid = user_id or repository.pick_random_user_with_fridge()
+        profile = repository.get_user_profile(uid)
+        cached = candidate_cache.get_or_load(
+            uid, get_fridge_version(uid), limit, lambda: self._load_candidate_pool(uid, limit)
+        )
+        fridge = cached.fridge
+        # Copies: later steps annotate candidates ("missing") and shuffle the pool
+        candidates = [dict(c) for c in cached.candidates]
+
+        recent_exclude = repository.recent_recommend_recipe_ids(uid)
 
         exclude_all = set(exclude_ids or []) | set(recent_exclude)
         if exclude_all:
@@ -98,16 +124,16 @@ class RecommendationWorkflow:
                     chosen_ids.add(recipe_id)
 
         fridge_tokens = fridge_token_set(fridge)
+        fridge_ids = fridge_ingredient_ids(fridge)
         for candidate in final_three:
-            tokens = _tokens_from_ingredient_full(candidate.get("ingredient_full"))
-            missing = [token for token in tokens if token and token not in fridge_tokens]
+            tokens = _extract_tokens_from_ingredients_text(candidate.get("ingredient_full"), clean=_raw_token)
+            missing = [_norm(token) for token in tokens if not in_fridge(token, fridge_ids, fridge_tokens)]
             candidate["missing"] = missing[:6]
 
         if not final_three:
             llm_text_result = "**추천 가능한 레시피 후보가 부족합니다.** (냉장고 재료를 추가해 주세요)"
             adapted_rows: List[Dict[str, Any]] = []
         else:
-            repository.ensure_recommend_recipe_table()
             adapted_rows = self._llm.adapt_recipes_json(uid, profile, fridge, final_three)
             id_to_candidate = {candidate.get("recipe_id"): candidate for candidate in final_three}
 
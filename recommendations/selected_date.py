@@ -0,0 +1,170 @@
+"""Typed `selected_recipe.selected_at` column and its backfill.
+
+`selected_recipe.selected_date` is free text written in three formats
+('YYYY-MM-DD HH:MM:SS', 'YYYY/MM/DD ...', 'YYYY.MM.DD ...'), so every read
+had to parse it with REGEXP/STR_TO_DATE and no index could be used.
+`selected_at` is the same instant as an indexed DATETIME; new rows write both
+columns and readers only use `selected_at`.
+
+The `selected_recipe_selected_at` schema step adds the column and backfills
+it during the startup bootstrap, before the `user_daily_cook_stats` step
+rebuilds the stats rollup from it. The same backfill can be re-run by hand
+(safe; only rows with a NULL selected_at are touched):
+
+    python -m recommendations.selected_date migrate [--chunk 1000] [--sleep 0.05]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import get_conn
+from core.schema import column_exists, register_schema
+
+log = logging.getLogger(__name__)
+
+SELECTED_AT_INDEX = "idx_selected_recipe_user_at"
+
+_DATE_RE = re.compile(
+    r"^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})"
+    r"(?:[ T](\d{1,2}):(\d{1,2})(?::(\d{1,2}))?)?"
+)
+
+
+def parse_selected_date(value: Any) -> Optional[datetime]:
+    """Parse a legacy selected_date value; None when it is empty or unreadable."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if not value:
+        return None
+    m = _DATE_RE.match(str(value))
+    if not m:
+        return None
+    parts = [int(p) if p else 0 for p in m.groups()]
+    try:
+        return datetime(*parts)
+    except ValueError:
+        return None
+
+
+def _add_selected_at_column(cur) -> bool:
+    if column_exists(cur, "selected_recipe", "selected_at"):
+        return False
+    cur.execute(
+        f"""
+        ALTER TABLE selected_recipe
+          ADD COLUMN selected_at DATETIME NULL,
+          ADD INDEX {SELECTED_AT_INDEX} (id, selected_at)
+        """
+    )
+    return True
+
+
+def ensure_selected_at_column() -> bool:
+    """Add selected_at and its (id, selected_at) index if missing; return True when it was added."""
+    with get_conn() as conn, conn.cursor() as cur:
+        return _add_selected_at_column(cur)
+
+
+def _backfill_chunk(cur, last_id: int, chunk_size: int, stats: Dict[str, int]) -> Optional[int]:
+    """Fill one chunk of NULL selected_at rows past `last_id`; return the last id scanned, None when done."""
+    cur.execute(
+        """
+        SELECT selected_id, selected_date
+        FROM selected_recipe
+        WHERE selected_id > %s AND selected_at IS NULL
+        ORDER BY selected_id
+        LIMIT %s
+        """,
+        (last_id, chunk_size),
+    )
+    rows = cur.fetchall() or []
+    if not rows:
+        return None
+    stats["scanned"] += len(rows)
+
+    parsed: List[Tuple[int, datetime]] = []
+    for r in rows:
+        at = parse_selected_date(r.get("selected_date"))
+        if at is None:
+            stats["unparsed"] += 1
+        else:
+            parsed.append((int(r["selected_id"]), at))
+    if parsed:
+        cases = " ".join(["WHEN %s THEN %s"] * len(parsed))
+        params: List[Any] = []
+        for selected_id, at in parsed:
+            params.extend([selected_id, at])
+        params.extend(selected_id for selected_id, _ in parsed)
+        placeholders = ", ".join(["%s"] * len(parsed))
+        cur.execute(
+            f"""
+            UPDATE selected_recipe
+            SET selected_at = CASE selected_id {cases} END
+            WHERE selected_id IN ({placeholders}) AND selected_at IS NULL
+            """,
+            tuple(params),
+        )
+        stats["updated"] += cur.rowcount
+    if len(rows) < chunk_size:
+        return None
+    return int(rows[-1]["selected_id"])
+
+
+def backfill_selected_at(chunk_size: int = 1000, sleep_sec: float = 0.0) -> Dict[str, int]:
+    """Fill selected_at from selected_date in selected_id order, chunk_size rows per UPDATE.
+
+    Rows whose text cannot be parsed are left NULL and counted as `unparsed`.
+    """
+    chunk_size = max(1, chunk_size)
+    stats = {"scanned": 0, "updated": 0, "unparsed": 0}
+    last_id: Optional[int] = 0
+    while last_id is not None:
+        with get_conn() as conn, conn.cursor() as cur:
+            last_id = _backfill_chunk(cur, last_id, chunk_size, stats)
+        if last_id is not None and sleep_sec > 0:
+            # Leave room for foreground traffic between chunks
+            time.sleep(sleep_sec)
+    return stats
+
+
+def _migrate_selected_at(cur) -> None:
+    """Schema step: the column and index, then the backfill, so readers never see a NULL selected_at
+    for rows with a readable selected_date."""
+    _add_selected_at_column(cur)
+    stats = {"scanned": 0, "updated": 0, "unparsed": 0}
+    last_id: Optional[int] = 0
+    while last_id is not None:
+        last_id = _backfill_chunk(cur, last_id, 1000, stats)
+    log.info("selected_at backfill: %s", stats)
+
+
+register_schema("selected_recipe_selected_at", _migrate_selected_at, version=2)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m recommendations.selected_date")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("migrate", help="add selected_recipe.selected_at and backfill it from selected_date")
+    cmd.add_argument("--chunk", type=int, default=1000, help="rows per UPDATE")
+    cmd.add_argument("--sleep", type=float, default=0.0, help="seconds to pause between chunks")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        if ensure_selected_at_column():
+            print("added selected_recipe.selected_at")
+        stats = backfill_selected_at(args.chunk, args.sleep)
+        print(
+            f"scanned={stats['scanned']} updated={stats['updated']} unparsed={stats['unparsed']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from typing import Any, Dict, List
 from fastapi import HTTPException
 
 from core import get_conn
+from stats.cache import invalidate_stats_day
+from stats.rollup import refresh_cook_day
 
 from .engine import engine
 
@@ -38,11 +40,12 @@ class RecommendationService:
 
             cur.execute(
                 """
-                INSERT INTO selected_recipe (id, recommend_id, recipe_id, selected_date)
-                VALUES (%s, %s, %s, NOW())
+                INSERT INTO selected_recipe (id, recommend_id, recipe_id, selected_date, selected_at)
+                VALUES (%s, %s, %s, NOW(), NOW())
                 """,
                 (user_id, recommend_id, recipe_id),
             )
+        self._selected_changed(user_id, date.today())
         return {"ok": True}
 
     def list_selected_recipes(self, user_id: str) -> Dict[str, Any]:
@@ -58,31 +61,13 @@ class RecommendationService:
                   r.cooking_time,
                   r.level_nm,
 
-                  CASE
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}/'
-                      THEN DATE(STR_TO_DATE(sr.selected_date, '%%Y/%%m/%%d %%H:%%i:%%s'))
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}-'
-                      THEN DATE(sr.selected_date)
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}[.]'
-                      THEN DATE(STR_TO_DATE(sr.selected_date, '%%Y.%%m.%%d %%H:%%i:%%s'))
-                    ELSE NULL
-                  END AS selected_date_only,
-
-                  CASE
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}/'
-                      THEN STR_TO_DATE(sr.selected_date, '%%Y/%%m/%%d %%H:%%i:%%s')
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}-'
-                      THEN sr.selected_date
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}[.]'
-                      THEN STR_TO_DATE(sr.selected_date, '%%Y.%%m.%%d %%H:%%i:%%s')
-                    ELSE NULL
-                  END AS sort_key
+                  DATE(sr.selected_at) AS selected_date_only
 
                 FROM selected_recipe sr
                 JOIN recommend_recipe rr ON sr.recommend_id = rr.recommend_id
                 LEFT JOIN recipe r ON rr.recipe_id = r.recipe_id
                 WHERE rr.id = %s AND sr.id = %s
-                ORDER BY sort_key DESC
+                ORDER BY sr.selected_at DESC, sr.selected_id DESC
                 """,
                 (user_id, user_id),
             )
@@ -110,14 +95,15 @@ class RecommendationService:
         with get_conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT 1
+                SELECT selected_at
                 FROM selected_recipe
                 WHERE selected_id=%s AND id=%s
                 LIMIT 1
                 """,
                 (selected_id, user_id),
             )
-            if not cur.fetchone():
+            row = cur.fetchone()
+            if not row:
                 raise HTTPException(status_code=404, detail="selected record not found")
 
             cur.execute(
@@ -129,6 +115,7 @@ class RecommendationService:
                 (selected_id, user_id),
             )
             conn.commit()
+        self._selected_changed(user_id, row.get("selected_at"))
 
     def update_selected_action(self, user_id: str, selected_id: int, action: int) -> Dict[str, Any]:
         if action not in (0, 1):
@@ -137,13 +124,14 @@ class RecommendationService:
         with get_conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT 1 FROM selected_recipe
+                SELECT selected_at FROM selected_recipe
                 WHERE selected_id=%s AND id=%s
                 LIMIT 1
                 """,
                 (selected_id, user_id),
             )
-            if not cur.fetchone():
+            row = cur.fetchone()
+            if not row:
                 raise HTTPException(status_code=404, detail="selected record not found")
 
             cur.execute(
@@ -151,6 +139,7 @@ class RecommendationService:
                 (int(action), selected_id, user_id),
             )
             conn.commit()
+        self._selected_changed(user_id, row.get("selected_at"))
         return {"ok": True, "selected_id": selected_id, "action": int(action)}
 
     def selected_status(self, user_id: str, recipe_id: int) -> Dict[str, Any]:
@@ -159,18 +148,11 @@ class RecommendationService:
                 """
                 SELECT
                   sr.selected_id,
-                  CASE
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}/'
-                      THEN DATE(STR_TO_DATE(sr.selected_date, '%%Y/%%m/%%d %%H:%%i:%%s'))
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}-'
-                      THEN DATE(sr.selected_date)
-                    WHEN sr.selected_date REGEXP '^[0-9]{4}[.]'
-                      THEN DATE(STR_TO_DATE(sr.selected_date, '%%Y.%%m.%%d %%H:%%i:%%s'))
-                    ELSE NULL
-                  END AS selected_date_only
+                  DATE(sr.selected_at) AS selected_date_only
                 FROM selected_recipe sr
                 JOIN recommend_recipe rr ON sr.recommend_id = rr.recommend_id
                 WHERE sr.id=%s AND rr.id=%s AND rr.recipe_id=%s
+                ORDER BY sr.selected_at DESC
                 LIMIT 1
                 """,
                 (user_id, user_id, recipe_id),
@@ -246,6 +228,12 @@ class RecommendationService:
             )
             return cur.fetchall() or []
 
+    @staticmethod
+    def _selected_changed(user_id: str, day: Any) -> None:
+        # selected_recipe가 바뀐 날의 통계 롤업을 다시 만들고, 캐시된 통계 응답을 무효화한다
+        refresh_cook_day(user_id, day)
+        invalidate_stats_day(user_id, day)
+
     @staticmethod
     def _to_iso_date(value: Any) -> Any:
         try:
@@ -0,0 +1,210 @@
+"""In-process response cache for `/me/stats/*`.
+
+Entries are keyed by (user, month, endpoint, week). The week part is only set
+for week-scoped payloads (progress, dashboard) and is empty otherwise.
+
+- Closed periods (everything the payload covers is before today) never change
+  on their own, so their entries have no TTL and only leave the cache by LRU
+  eviction or explicit invalidation.
+- Open periods are invalidated by the selected_recipe write paths
+  (`invalidate_stats_day`) and additionally expire after STATS_CACHE_OPEN_TTL
+  seconds, which bounds staleness from writes handled by other workers.
+- A goal change invalidates every entry of the user (`invalidate_stats_user`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from core.metrics import metrics
+
+STATS_CACHE_MAX_ENTRIES = int(os.getenv("STATS_CACHE_MAX_ENTRIES", "20000"))
+STATS_CACHE_OPEN_TTL = int(os.getenv("STATS_CACHE_OPEN_TTL", "300"))
+# Browser max-age for closed periods; still revalidated after that so a goal change shows up
+STATS_CACHE_CLOSED_MAX_AGE = int(os.getenv("STATS_CACHE_CLOSED_MAX_AGE", "3600"))
+
+# Payloads that depend on the selected week, not only the month
+WEEK_SCOPED_ENDPOINTS = {"progress", "dashboard"}
+
+CacheKey = Tuple[str, str, str, str]
+
+CACHE_REQUESTS = metrics.counter(
+    "stats_cache_requests_total",
+    "Stats cache lookups by endpoint and result (hit/miss).",
+    ["endpoint", "result"],
+)
+CACHE_EVICTIONS = metrics.counter("stats_cache_evictions_total", "Stats cache entries evicted by the LRU bound.")
+CACHE_INVALIDATIONS = metrics.counter(
+    "stats_cache_invalidations_total",
+    "Stats cache entries dropped by write-through invalidation.",
+)
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _week_start(d: date) -> date:
+    return d - timedelta(days=d.weekday())
+
+
+def _next_month(d: date) -> date:
+    first = _month_start(d)
+    return date(first.year + 1, 1, 1) if first.month == 12 else date(first.year, first.month + 1, 1)
+
+
+def make_etag(value: Any) -> str:
+    body = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    etag: str
+    closed: bool
+    expires_at: Optional[float]
+
+    @property
+    def cache_control(self) -> str:
+        if self.closed:
+            return f"private, max-age={STATS_CACHE_CLOSED_MAX_AGE}"
+        return "private, no-cache"
+
+
+class StatsCache:
+    """Size-bounded LRU of computed stats payloads."""
+
+    def __init__(self, max_entries: int = STATS_CACHE_MAX_ENTRIES, open_ttl: int = STATS_CACHE_OPEN_TTL):
+        self.max_entries = max(1, max_entries)
+        self.open_ttl = open_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._by_user: Dict[str, Set[CacheKey]] = {}
+        # Bumped on every invalidation so a compute that raced with a write is not stored
+        self._generation: Dict[str, int] = {}
+
+    @staticmethod
+    def key(user_id: str, endpoint: str, selected: date) -> CacheKey:
+        week = _week_start(selected).isoformat() if endpoint in WEEK_SCOPED_ENDPOINTS else ""
+        return (str(user_id), _month_start(selected).isoformat(), endpoint, week)
+
+    @staticmethod
+    def is_closed(endpoint: str, selected: date, today: Optional[date] = None) -> bool:
+        today = today or date.today()
+        last_day = _next_month(selected) - timedelta(days=1)
+        if endpoint in WEEK_SCOPED_ENDPOINTS:
+            last_day = max(last_day, _week_start(selected) + timedelta(days=6))
+        return last_day < today
+
+    def get_or_compute(self, user_id: str, endpoint: str, selected: date, compute: Callable[[], Any]) -> CacheEntry:
+        key = self.key(user_id, endpoint, selected)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.expires_at is None or entry.expires_at > now):
+                self._entries.move_to_end(key)
+                CACHE_REQUESTS.inc(endpoint=endpoint, result="hit")
+                return entry
+            generation = self._generation.get(key[0], 0)
+        CACHE_REQUESTS.inc(endpoint=endpoint, result="miss")
+
+        value = compute()
+        closed = self.is_closed(endpoint, selected)
+        entry = CacheEntry(
+            value=value,
+            etag=make_etag(value),
+            closed=closed,
+            expires_at=None if closed else now + self.open_ttl,
+        )
+        with self._lock:
+            if self._generation.get(key[0], 0) != generation:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+                CACHE_EVICTIONS.inc()
+        return entry
+
+    def invalidate_day(self, user_id: str, day: date) -> int:
+        """Drop the user's entries whose month or selected week contains `day`."""
+        month = _month_start(day).isoformat()
+        week = _week_start(day).isoformat()
+        with self._lock:
+            self._bump(str(user_id))
+            keys = [k for k in self._by_user.get(str(user_id), ()) if k[1] == month or k[3] == week]
+            return self._drop(keys)
+
+    def invalidate_user(self, user_id: str) -> int:
+        with self._lock:
+            self._bump(str(user_id))
+            return self._drop(list(self._by_user.get(str(user_id), ())))
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def hit_ratio(self) -> float:
+        hits = misses = 0.0
+        for endpoint, result in CACHE_REQUESTS.label_values():
+            value = CACHE_REQUESTS.value(endpoint=endpoint, result=result)
+            if result == "hit":
+                hits += value
+            else:
+                misses += value
+        total = hits + misses
+        return round(hits / total, 4) if total else 0.0
+
+    def _bump(self, user_id: str) -> None:
+        # caller holds the lock
+        self._generation[user_id] = self._generation.get(user_id, 0) + 1
+
+    def _drop(self, keys) -> int:
+        # caller holds the lock
+        for k in keys:
+            self._entries.pop(k, None)
+            self._forget(k)
+        if keys:
+            CACHE_INVALIDATIONS.inc(len(keys))
+        return len(keys)
+
+    def _forget(self, key: CacheKey) -> None:
+        keys = self._by_user.get(key[0])
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            self._by_user.pop(key[0], None)
+
+
+stats_cache = StatsCache()
+
+metrics.gauge("stats_cache_entries", "Entries held by the stats response cache.").set_function(stats_cache.size)
+metrics.gauge(
+    "stats_cache_hit_ratio",
+    "Share of stats cache lookups served from the cache since process start.",
+).set_function(stats_cache.hit_ratio)
+
+
+def invalidate_stats_day(user_id: str, day: Any) -> None:
+    """Write-through hook for selected_recipe changes on `day` (None drops every entry of the user)."""
+    if hasattr(day, "date"):
+        day = day.date()
+    if isinstance(day, date):
+        stats_cache.invalidate_day(user_id, day)
+    else:
+        stats_cache.invalidate_user(user_id)
+
+
+def invalidate_stats_user(user_id: str) -> None:
+    stats_cache.invalidate_user(user_id)
@@ -0,0 +1,270 @@
+"""Per-user daily cooking rollup (`user_daily_cook_stats`).
+
+One row per (user, day) with the cooked count, difficulty and category
+histograms and the cooking-time sum of that day's cooked entries. Stats and
+badge goal checks read these O(days) rows instead of joining the whole
+`selected_recipe` history against `recipe`.
+
+The selected_recipe write paths call `refresh_cook_day()` for the day they
+touched, which recomputes that single row from the raw entries. The
+`user_daily_cook_stats` schema step builds the whole table at bootstrap; it
+sorts after `selected_recipe_selected_at`, so selected_at is filled by then.
+It can be rebuilt by hand with:
+
+    python -m stats.rollup backfill [--user USER_ID]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from core import get_conn
+from core.schema import register_schema
+
+log = logging.getLogger(__name__)
+
+ROLLUP_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS user_daily_cook_stats (
+  user_id VARCHAR(255) NOT NULL,
+  cook_date DATE NOT NULL,
+  cooked_count INT NOT NULL DEFAULT 0,
+  level_hist JSON NOT NULL,
+  category_hist JSON NOT NULL,
+  minutes_sum DOUBLE NOT NULL DEFAULT 0,
+  minutes_count INT NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL,
+  PRIMARY KEY (user_id, cook_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+UPSERT_SQL = """
+INSERT INTO user_daily_cook_stats
+  (user_id, cook_date, cooked_count, level_hist, category_hist, minutes_sum, minutes_count, updated_at)
+VALUES {values}
+ON DUPLICATE KEY UPDATE
+  cooked_count = VALUES(cooked_count),
+  level_hist = VALUES(level_hist),
+  category_hist = VALUES(category_hist),
+  minutes_sum = VALUES(minutes_sum),
+  minutes_count = VALUES(minutes_count),
+  updated_at = VALUES(updated_at)
+"""
+
+# Raw cooked entries with the recipe columns the rollup keeps
+RAW_ENTRIES_SQL = """
+SELECT s.id AS user_id, s.selected_at, r.recipe_id, r.level_nm, r.ty_nm, r.cooking_time
+FROM selected_recipe s
+LEFT JOIN recipe r ON s.recipe_id = r.recipe_id
+WHERE s.action=1
+"""
+
+
+def _to_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def _to_minutes(value: Any) -> Optional[float]:
+    # cooking_time may be stored as string or int; try to coerce
+    try:
+        return float(value) if value is not None else None
+    except Exception:
+        return None
+
+
+@dataclass
+class DayStat:
+    """Cooked entries of one user on one day, pre-aggregated.
+
+    levels / categories only count entries whose recipe row exists (the old
+    JOIN-based queries dropped the others), with "" for a missing label.
+    """
+    cooked: int = 0
+    levels: Counter = field(default_factory=Counter)
+    categories: Counter = field(default_factory=Counter)
+    minutes_sum: float = 0.0
+    minutes_count: int = 0
+
+    def add_entry(self, row: Dict[str, Any]) -> None:
+        self.cooked += 1
+        if row.get("recipe_id") is None:
+            return
+        self.levels[row.get("level_nm") or ""] += 1
+        self.categories[row.get("ty_nm") or ""] += 1
+        minutes = _to_minutes(row.get("cooking_time"))
+        if minutes is not None:
+            self.minutes_sum += minutes
+            self.minutes_count += 1
+
+
+def aggregate_entries(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[date, DayStat]]:
+    """Group raw cooked entries into user_id -> day -> DayStat (entries without selected_at are skipped)."""
+    out: Dict[str, Dict[date, DayStat]] = {}
+    for r in rows:
+        day = _to_date(r.get("selected_at"))
+        if day is None:
+            continue
+        out.setdefault(str(r["user_id"]), {}).setdefault(day, DayStat()).add_entry(r)
+    return out
+
+
+def _hist(value: Any) -> Counter:
+    if not value:
+        return Counter()
+    if isinstance(value, (bytes, str)):
+        value = json.loads(value)
+    return Counter({k: int(v) for k, v in value.items()})
+
+
+def ensure_rollup_table() -> None:
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(ROLLUP_TABLE_DDL)
+
+
+def load_days(user_id: str, start: date, end_excl: date) -> Dict[date, DayStat]:
+    """Rollup rows of one user in [start, end_excl)."""
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT cook_date, cooked_count, level_hist, category_hist, minutes_sum, minutes_count
+            FROM user_daily_cook_stats
+            WHERE user_id=%s AND cook_date >= %s AND cook_date < %s
+            """,
+            (user_id, start, end_excl),
+        )
+        rows = cur.fetchall() or []
+    return {
+        _to_date(r["cook_date"]): DayStat(
+            cooked=int(r.get("cooked_count") or 0),
+            levels=_hist(r.get("level_hist")),
+            categories=_hist(r.get("category_hist")),
+            minutes_sum=float(r.get("minutes_sum") or 0),
+            minutes_count=int(r.get("minutes_count") or 0),
+        )
+        for r in rows
+    }
+
+
+def _write_days(cur, user_id: str, days: Dict[date, DayStat], chunk_size: int = 500) -> None:
+    items = [(day, d) for day, d in days.items() if d.cooked > 0]
+    now = datetime.now()
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        params: List[Any] = []
+        for day, d in chunk:
+            params.extend([
+                user_id,
+                day,
+                d.cooked,
+                json.dumps(dict(d.levels), ensure_ascii=False),
+                json.dumps(dict(d.categories), ensure_ascii=False),
+                d.minutes_sum,
+                d.minutes_count,
+                now,
+            ])
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(chunk))
+        cur.execute(UPSERT_SQL.format(values=values), tuple(params))
+
+
+def refresh_cook_day(user_id: str, day: Any) -> None:
+    """Recompute the rollup row of (user_id, day) from that day's raw entries.
+
+    Never raises: a failed refresh only leaves the row stale until the next
+    write on the same day or a backfill.
+    """
+    day = _to_date(day)
+    if not user_id or day is None:
+        return
+    try:
+        with get_conn() as conn, conn.cursor() as cur:
+            cur.execute(
+                RAW_ENTRIES_SQL + " AND s.id=%s AND s.selected_at >= %s AND s.selected_at < %s",
+                (user_id, day, day + timedelta(days=1)),
+            )
+            days = aggregate_entries(cur.fetchall() or []).get(str(user_id), {})
+            stat = days.get(day)
+            if stat is None or stat.cooked == 0:
+                cur.execute(
+                    "DELETE FROM user_daily_cook_stats WHERE user_id=%s AND cook_date=%s",
+                    (user_id, day),
+                )
+            else:
+                _write_days(cur, str(user_id), {day: stat})
+    except Exception:
+        log.exception("Failed to refresh user_daily_cook_stats for %s on %s", user_id, day)
+
+
+def _rebuild(cur, user_id: Optional[str] = None) -> int:
+    if user_id:
+        user_ids = [user_id]
+    else:
+        cur.execute(
+            """
+            SELECT DISTINCT id AS user_id FROM selected_recipe WHERE action=1
+            UNION
+            SELECT DISTINCT user_id FROM user_daily_cook_stats
+            """
+        )
+        user_ids = [str(r["user_id"]) for r in cur.fetchall() or []]
+
+    conn = cur.connection
+    for uid in user_ids:
+        cur.execute(RAW_ENTRIES_SQL + " AND s.id=%s", (uid,))
+        days = aggregate_entries(cur.fetchall() or []).get(uid, {})
+        # Swap the user's rows in one transaction so readers never see them half rebuilt
+        conn.begin()
+        try:
+            cur.execute("DELETE FROM user_daily_cook_stats WHERE user_id=%s", (uid,))
+            _write_days(cur, uid, days)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return len(user_ids)
+
+
+def backfill(user_id: Optional[str] = None) -> int:
+    """Rebuild the rollup for one user or for everyone; return the number of users rebuilt."""
+    ensure_rollup_table()
+    with get_conn() as conn, conn.cursor() as cur:
+        return _rebuild(cur, user_id)
+
+
+def _build_rollup_table(cur) -> None:
+    """Schema step: create the table and fill it, so stats are never read from an empty rollup."""
+    cur.execute(ROLLUP_TABLE_DDL)
+    count = _rebuild(cur)
+    log.info("user_daily_cook_stats rebuilt for %d user(s)", count)
+
+
+register_schema("user_daily_cook_stats", _build_rollup_table, version=2)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m stats.rollup")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("backfill", help="rebuild user_daily_cook_stats from selected_recipe")
+    cmd.add_argument("--user", help="only rebuild this user id")
+    args = parser.parse_args(argv)
+
+    if args.command == "backfill":
+        count = backfill(args.user)
+        print(f"rebuilt user_daily_cook_stats for {count} user(s)")
+
+
+if __name__ == "__main__":
+    main()
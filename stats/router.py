@@ -1,22 +1,18 @@
 from datetime import date
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from core import get_current_user
 
-from .service import stats_service
+from .cache import stats_cache
+from .service import ProgressStat, stats_service
 
 
 router = APIRouter(prefix="/me", tags=["stats"])
 
 
-@router.get("/stats/progress")
-def me_stats_progress(
-    selected_date: Optional[date] = Query(default=None),
-    current_user: str = Depends(get_current_user),
-) -> Dict[str, Any]:
-    p = stats_service.get_progress(current_user, selected_date)
+def _progress_payload(p: ProgressStat) -> Dict[str, Any]:
     return {
         "weeklyRate": p.weeklyRate,
         "cookedCount": p.cookedCount,
@@ -25,24 +21,96 @@ def me_stats_progress(
     }
 
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip() for t in header.split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _cached(
+    request: Request,
+    response: Response,
+    user_id: str,
+    endpoint: str,
+    selected_date: Optional[date],
+    compute: Callable[[date], Any],
+) -> Any:
+    """stats_cache를 거쳐 응답하고, ETag/Cache-Control을 붙여 재검증 시 304를 돌려준다."""
+    selected = selected_date or date.today()
+    entry = stats_cache.get_or_compute(user_id, endpoint, selected, lambda: compute(selected))
+    headers = {"ETag": entry.etag, "Cache-Control": entry.cache_control}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return entry.value
+
+
+@router.get("/stats/dashboard")
+def me_stats_dashboard(
+    request: Request,
+    response: Response,
+    selected_date: Optional[date] = Query(default=None),
+    current_user: str = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """대시보드 전체(주간 KPI, 난이도/카테고리 분포, 주차별 추이)를 한 번에 반환.
+
+    각 필드는 개별 /me/stats/* 엔드포인트와 같은 형식이다.
+    {
+      "progress": {...}, "levels": [...], "categories": [...],
+      "progressTrend": {...}, "levelWeekly": [...]
+    }
+    """
+    return _cached(
+        request, response, current_user, "dashboard", selected_date,
+        lambda d: stats_service.get_dashboard(current_user, d),
+    )
+
+
+@router.get("/stats/progress")
+def me_stats_progress(
+    request: Request,
+    response: Response,
+    selected_date: Optional[date] = Query(default=None),
+    current_user: str = Depends(get_current_user),
+) -> Dict[str, Any]:
+    return _cached(
+        request, response, current_user, "progress", selected_date,
+        lambda d: _progress_payload(stats_service.get_progress(current_user, d)),
+    )
+
+
 @router.get("/stats/recipe-logs-level")
 def me_stats_level(
+    request: Request,
+    response: Response,
     selected_date: Optional[date] = Query(default=None),
     current_user: str = Depends(get_current_user),
 ) -> List[Dict[str, Any]]:
-    return stats_service.get_level_distribution(current_user, selected_date)
+    return _cached(
+        request, response, current_user, "level", selected_date,
+        lambda d: stats_service.get_level_distribution(current_user, d),
+    )
 
 
 @router.get("/stats/recipe-logs-category")
 def me_stats_category(
+    request: Request,
+    response: Response,
     selected_date: Optional[date] = Query(default=None),
     current_user: str = Depends(get_current_user),
 ) -> List[Dict[str, Any]]:
-    return stats_service.get_category_distribution(current_user, selected_date)
+    return _cached(
+        request, response, current_user, "category", selected_date,
+        lambda d: stats_service.get_category_distribution(current_user, d),
+    )
 
 
 @router.get("/stats/progress-trend")
 def me_stats_progress_trend(
+    request: Request,
+    response: Response,
     selected_date: Optional[date] = Query(default=None),
     current_user: str = Depends(get_current_user),
 ) -> Dict[str, Any]:
@@ -54,14 +122,22 @@ def me_stats_progress_trend(
       "weeks": [ { "week": str, "rate": number, "cooked": number, "goal": number }, ... ]
     }
     """
-    return stats_service.get_progress_trend(current_user, selected_date)
+    return _cached(
+        request, response, current_user, "progress-trend", selected_date,
+        lambda d: stats_service.get_progress_trend(current_user, d),
+    )
 
 
 @router.get("/stats/recipe-logs-level-weekly")
 def me_stats_level_weekly(
+    request: Request,
+    response: Response,
     selected_date: Optional[date] = Query(default=None),
     current_user: str = Depends(get_current_user),
 ) -> List[Dict[str, Any]]:
     """월간 주차별 난이도 분포(상/하만 제공)."""
-    return stats_service.get_level_weekly(current_user, selected_date)
+    return _cached(
+        request, response, current_user, "level-weekly", selected_date,
+        lambda d: stats_service.get_level_weekly(current_user, d),
+    )
 
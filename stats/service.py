@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from collections import Counter
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from core import get_conn
 
+from .rollup import DayStat, load_days
+
 
 def _week_start(d: date) -> date:
     return d - timedelta(days=d.weekday())
@@ -39,6 +42,23 @@ def _difficulty_to_score(level_nm: Optional[str]) -> Optional[int]:
     return m.get(str(level_nm).strip().upper(), m.get(str(level_nm).strip(), None))
 
 
+def _month_weeks(month_start: date, month_end: date) -> List[Tuple[str, date, date]]:
+    """(label, segment_start, segment_end_exclusive) for each Mon-Sun week intersecting the month.
+
+    Segments are clipped to the month; labels are 1주차, 2주차 ... in order.
+    """
+    weeks: List[Tuple[str, date, date]] = []
+    cur_start = _week_start(month_start)
+    idx = 1
+    while cur_start <= month_end:
+        seg_start = max(cur_start, month_start)
+        seg_end_excl = min(cur_start + timedelta(days=7), month_end + timedelta(days=1))
+        weeks.append((f"{idx}주차", seg_start, seg_end_excl))
+        idx += 1
+        cur_start = cur_start + timedelta(days=7)
+    return weeks
+
+
 @dataclass
 class ProgressStat:
     weeklyRate: float
@@ -47,7 +67,109 @@ class ProgressStat:
     avgMinutes: Optional[float]
 
 
+@dataclass
+class StatsWindow:
+    """Everything the dashboard needs for one (user, selected date)."""
+    selected: date
+    goal: int
+    month_start: date
+    month_end: date
+    week_start: date
+    week_end: date
+    days: Dict[date, DayStat]
+
+    def range(self, start: date, end_excl: date) -> List[DayStat]:
+        return [d for day, d in self.days.items() if start <= day < end_excl]
+
+
+def _progress(w: StatsWindow) -> ProgressStat:
+    days = w.range(w.week_start, w.week_end + timedelta(days=1))
+    cooked = sum(d.cooked for d in days)
+
+    diff_sum = 0
+    diff_n = 0
+    minutes_sum = 0.0
+    minutes_n = 0
+    for d in days:
+        for level_nm, cnt in d.levels.items():
+            score = _difficulty_to_score(level_nm)
+            if score is not None:
+                diff_sum += score * cnt
+                diff_n += cnt
+        minutes_sum += d.minutes_sum
+        minutes_n += d.minutes_count
+
+    return ProgressStat(
+        weeklyRate=round((cooked / w.goal) * 100.0, 1) if w.goal > 0 else 0.0,
+        cookedCount=cooked,
+        avgDifficulty=round(diff_sum / diff_n, 2) if diff_n else None,
+        avgMinutes=round(minutes_sum / minutes_n, 1) if minutes_n else None,
+    )
+
+
+def _distribution(w: StatsWindow, attr: str) -> List[Dict[str, Any]]:
+    totals: Counter = Counter()
+    for d in w.range(w.month_start, w.month_end + timedelta(days=1)):
+        totals.update(getattr(d, attr))
+    # Normalize label to non-empty
+    merged: Dict[str, int] = {}
+    for label, cnt in totals.items():
+        key = label or "기타"
+        merged[key] = merged.get(key, 0) + int(cnt)
+    return [{"label": label, "count": cnt} for label, cnt in merged.items()]
+
+
+def _progress_trend(w: StatsWindow) -> Dict[str, Any]:
+    week_items: List[Dict[str, Any]] = []
+    month_total_cooked = 0
+    month_goal_sum = 0.0
+    for label, seg_start, seg_end_excl in _month_weeks(w.month_start, w.month_end):
+        seg_days = max(0, min(7, (seg_end_excl - seg_start).days))
+        cooked = sum(d.cooked for d in w.range(seg_start, seg_end_excl))
+        month_total_cooked += cooked
+
+        # Scale weekly goal by days in segment
+        scaled_goal = (w.goal * (seg_days / 7.0)) if seg_days > 0 else 0.0
+        month_goal_sum += scaled_goal
+
+        rate = round(((cooked / scaled_goal) * 100.0), 1) if scaled_goal > 0 else 0.0
+        week_items.append({
+            "week": label,
+            "rate": rate,
+            "cooked": cooked,
+            "goal": round(scaled_goal, 2),
+        })
+
+    # Monthly goal = sum of scaled weekly goals within the month
+    month_rate = round((month_total_cooked / month_goal_sum) * 100.0, 1) if month_goal_sum > 0 else 0.0
+    return {"monthRate": month_rate, "weeks": week_items}
+
+
+def _level_weekly(w: StatsWindow) -> List[Dict[str, Any]]:
+    rows_out: List[Dict[str, Any]] = []
+    for label, seg_start, seg_end_excl in _month_weeks(w.month_start, w.month_end):
+        hi = 0
+        lo = 0
+        for d in w.range(seg_start, seg_end_excl):
+            for level_nm, cnt in d.levels.items():
+                lvl = (level_nm or "").strip()
+                if lvl == "상" or lvl.upper() == "HIGH":
+                    hi += cnt
+                elif lvl == "하" or lvl.upper() == "LOW":
+                    lo += cnt
+                # deliberately ignore '중'
+        rows_out.append({"week": label, "상": hi, "하": lo, "total": hi + lo})
+    return rows_out
+
+
 class StatsService:
+    """Per-user dashboard stats.
+
+    Every endpoint is computed from one StatsWindow: the user's goal plus the
+    user_daily_cook_stats rows of the selected month (widened to cover the
+    selected week), fetched with a single query.
+    """
+
     def _fetch_user_goal(self, user_id: str) -> int:
         with get_conn() as conn, conn.cursor() as cur:
             cur.execute("SELECT goal FROM user_info WHERE id=%s", (user_id,))
@@ -59,6 +181,43 @@ class StatsService:
         end = start + timedelta(days=6)
         return start, end
 
+    def _window(self, user_id: str, selected: Optional[date] = None) -> StatsWindow:
+        selected = selected or date.today()
+        month_start, month_end = _month_range(selected)
+        week_start, week_end = self._week_bounds(selected)
+        goal = max(1, self._fetch_user_goal(user_id))
+        days = load_days(
+            user_id,
+            min(month_start, week_start),
+            max(month_end, week_end) + timedelta(days=1),
+        )
+        return StatsWindow(
+            selected=selected,
+            goal=goal,
+            month_start=month_start,
+            month_end=month_end,
+            week_start=week_start,
+            week_end=week_end,
+            days=days,
+        )
+
+    def get_dashboard(self, user_id: str, selected: Optional[date] = None) -> Dict[str, Any]:
+        """All dashboard cards and charts from one StatsWindow (two queries in total)."""
+        w = self._window(user_id, selected)
+        p = _progress(w)
+        return {
+            "progress": {
+                "weeklyRate": p.weeklyRate,
+                "cookedCount": p.cookedCount,
+                "avgDifficulty": p.avgDifficulty,
+                "avgMinutes": p.avgMinutes,
+            },
+            "levels": _distribution(w, "levels"),
+            "categories": _distribution(w, "categories"),
+            "progressTrend": _progress_trend(w),
+            "levelWeekly": _level_weekly(w),
+        }
+
     def get_progress(self, user_id: str, selected: Optional[date] = None) -> ProgressStat:
         """Return weekly KPI numbers for dashboard cards.
 
@@ -67,100 +226,18 @@ class StatsService:
         - avgDifficulty: average difficulty mapped to 1..3 over cooked recipes this week
         - avgMinutes: average cooking_time over cooked recipes this week
         """
-        selected = selected or date.today()
-        week_start, week_end = self._week_bounds(selected)
-        goal = max(1, self._fetch_user_goal(user_id))
-
-        with get_conn() as conn, conn.cursor() as cur:
-            # Count cooked this week
-            cur.execute(
-                """
-                SELECT COUNT(*) AS cnt
-                FROM selected_recipe
-                WHERE id=%s AND action=1 AND selected_date >= %s AND selected_date < %s
-                """,
-                (user_id, week_start, week_end + timedelta(days=1)),
-            )
-            cooked_row = cur.fetchone() or {"cnt": 0}
-            cooked = int(cooked_row.get("cnt") or 0)
-
-            # Join with recipe for difficulty & time averages
-            cur.execute(
-                """
-                SELECT r.level_nm, r.cooking_time
-                FROM selected_recipe s
-                JOIN recipe r ON s.recipe_id = r.recipe_id
-                WHERE s.id=%s AND s.action=1 AND s.selected_date >= %s AND s.selected_date < %s
-                """,
-                (user_id, week_start, week_end + timedelta(days=1)),
-            )
-            rows = cur.fetchall() or []
-
-        diffs: List[int] = []
-        times: List[float] = []
-        for r in rows:
-            score = _difficulty_to_score(r.get("level_nm"))
-            if score is not None:
-                diffs.append(score)
-            t = r.get("cooking_time")
-            # cooking_time may be stored as string or int; try to coerce
-            try:
-                if t is not None:
-                    times.append(float(t))
-            except Exception:
-                pass
-
-        weekly_rate = round((cooked / goal) * 100.0, 1) if goal > 0 else 0.0
-        avg_diff = round(sum(diffs) / len(diffs), 2) if diffs else None
-        avg_min = round(sum(times) / len(times), 1) if times else None
-
-        return ProgressStat(
-            weeklyRate=weekly_rate,
-            cookedCount=cooked,
-            avgDifficulty=avg_diff,
-            avgMinutes=avg_min,
-        )
+        return _progress(self._window(user_id, selected))
 
     def get_level_distribution(self, user_id: str, selected: Optional[date] = None) -> List[Dict[str, Any]]:
         """Return monthly distribution by difficulty level_nm.
 
         Output: [{ label: level_nm, count: int }, ...]
         """
-        selected = selected or date.today()
-        month_start, month_end = _month_range(selected)
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT r.level_nm AS label, COUNT(*) AS count
-                FROM selected_recipe s
-                JOIN recipe r ON s.recipe_id = r.recipe_id
-                WHERE s.id=%s AND s.action=1 AND s.selected_date >= %s AND s.selected_date < %s
-                GROUP BY r.level_nm
-                """,
-                (user_id, month_start, month_end + timedelta(days=1)),
-            )
-            rows = cur.fetchall() or []
-        # Normalize label to non-empty
-        return [{"label": (r.get("label") or "기타"), "count": int(r.get("count") or 0)} for r in rows]
+        return _distribution(self._window(user_id, selected), "levels")
 
     def get_category_distribution(self, user_id: str, selected: Optional[date] = None) -> List[Dict[str, Any]]:
         """Return monthly distribution by recipe category (ty_nm)."""
-        selected = selected or date.today()
-        month_start, month_end = _month_range(selected)
-        with get_conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT r.ty_nm AS label, COUNT(*) AS count
-                FROM selected_recipe s
-                JOIN recipe r ON s.recipe_id = r.recipe_id
-                WHERE s.id=%s AND s.action=1 AND s.selected_date >= %s AND s.selected_date < %s
-                GROUP BY r.ty_nm
-                """,
-                (user_id, month_start, month_end + timedelta(days=1)),
-            )
-            rows = cur.fetchall() or []
-        return [{"label": (r.get("label") or "기타"), "count": int(r.get("count") or 0)} for r in rows]
-
+        return _distribution(self._window(user_id, selected), "categories")
 
     def get_progress_trend(self, user_id: str, selected: Optional[date] = None) -> Dict[str, Any]:
         """Return monthly weekly trend of achievement rate.
@@ -168,63 +245,7 @@ class StatsService:
         - For each week in the month, compute cooked count and rate = cooked/goal*100.
         - monthRate is the average of weekly rates over the month (rounded to 1 decimal).
         """
-        selected = selected or date.today()
-        month_start, month_end = _month_range(selected)
-
-        # Build week ranges that cover the month (Mon-Sun windows intersecting the month)
-        weeks: List[Tuple[date, date]] = []
-        cur_start = _week_start(month_start)
-        while cur_start <= month_end:
-            cur_end = cur_start + timedelta(days=6)
-            # Only include weeks that intersect the month
-            if cur_end >= month_start and cur_start <= month_end:
-                weeks.append((cur_start, cur_end))
-            cur_start = cur_start + timedelta(days=7)
-
-        goal = max(1, self._fetch_user_goal(user_id))
-        week_items: List[Dict[str, Any]] = []
-
-        month_total_cooked = 0
-        month_goal_sum = 0.0
-
-        with get_conn() as conn, conn.cursor() as cur:
-            for idx, (ws, we) in enumerate(weeks, start=1):
-                # Label by week order within the month: 1주차, 2주차 ...
-                label = f"{idx}주차"
-                # Segment for this week that lies within the month
-                seg_start = max(ws, month_start)
-                seg_end_excl = min(we + timedelta(days=1), month_end + timedelta(days=1))
-                seg_days = (seg_end_excl - seg_start).days
-                seg_days = max(0, min(7, seg_days))
-
-                # Cooked count only within the segment
-                cur.execute(
-                    """
-                    SELECT COUNT(*) AS cnt
-                    FROM selected_recipe
-                    WHERE id=%s AND action=1 AND selected_date >= %s AND selected_date < %s
-                    """,
-                    (user_id, seg_start, seg_end_excl),
-                )
-                row = cur.fetchone() or {"cnt": 0}
-                cooked = int(row.get("cnt") or 0)
-                month_total_cooked += cooked
-
-                # Scale weekly goal by days in segment
-                scaled_goal = (goal * (seg_days / 7.0)) if seg_days > 0 else 0.0
-                month_goal_sum += scaled_goal
-
-                rate = round(((cooked / scaled_goal) * 100.0), 1) if scaled_goal > 0 else 0.0
-                week_items.append({
-                    "week": label,
-                    "rate": rate,
-                    "cooked": cooked,
-                    "goal": round(scaled_goal, 2),
-                })
-
-        # Monthly goal = sum of scaled weekly goals within the month
-        month_rate = round((month_total_cooked / month_goal_sum) * 100.0, 1) if month_goal_sum > 0 else 0.0
-        return {"monthRate": month_rate, "weeks": week_items}
+        return _progress_trend(self._window(user_id, selected))
 
     def get_level_weekly(self, user_id: str, selected: Optional[date] = None) -> List[Dict[str, Any]]:
         """Return monthly weekly distribution by difficulty.
@@ -232,52 +253,7 @@ class StatsService:
         Only '상' and '하' are returned (no '중').
         Output rows: { week, 상, 하, total }
         """
-        selected = selected or date.today()
-        month_start, month_end = _month_range(selected)
-
-        weeks: List[Tuple[date, date]] = []
-        cur_start = _week_start(month_start)
-        while cur_start <= month_end:
-            cur_end = cur_start + timedelta(days=6)
-            if cur_end >= month_start and cur_start <= month_end:
-                weeks.append((cur_start, cur_end))
-            cur_start = cur_start + timedelta(days=7)
-
-        rows_out: List[Dict[str, Any]] = []
-        with get_conn() as conn, conn.cursor() as cur:
-            for idx, (ws, we) in enumerate(weeks, start=1):
-                label = f"{idx}주차"
-                
-                # Count only in-month segment for each week
-                seg_start = max(ws, month_start)
-                seg_end_excl = min(we + timedelta(days=1), month_end + timedelta(days=1))
-                
-                cur.execute(
-                    """
-                    SELECT r.level_nm AS level, COUNT(*) AS cnt
-                    FROM selected_recipe s
-                    JOIN recipe r ON s.recipe_id = r.recipe_id
-                    WHERE s.id=%s AND s.action=1 AND s.selected_date >= %s AND s.selected_date < %s
-                    GROUP BY r.level_nm
-                    """,
-                    (user_id, seg_start, seg_end_excl),
-                )
-                rows = cur.fetchall() or []
-                hi = 0
-                lo = 0
-                for r in rows:
-                    lvl = (r.get("level") or "").strip()
-                    cnt = int(r.get("cnt") or 0)
-                    if lvl == "상" or lvl.upper() == "HIGH":
-                        hi += cnt
-                    elif lvl == "하" or lvl.upper() == "LOW":
-                        lo += cnt
-                    # deliberately ignore '중'
-                total = hi + lo
-                rows_out.append({"week": label, "상": hi, "하": lo, "total": total})
-
-        return rows_out
+        return _level_weekly(self._window(user_id, selected))
 
 
 stats_service = StatsService()
-
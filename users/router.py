@@ -4,6 +4,7 @@ from fastapi import APIRouter, Body, Depends, Response
 
 from auth.service import auth_service
 from core import get_current_user
+from stats.cache import invalidate_stats_user
 
 from .models import MeUpdateIn
 from .service import user_service
@@ -34,7 +35,11 @@ def update_me(payload: MeUpdateIn, current_user: str = Depends(get_current_user)
     if payload.cooking_level is not None:
         fields["cooking_level"] = payload.cooking_level
 
-    return user_service.update_profile(current_user, fields)
+    result = user_service.update_profile(current_user, fields)
+    if "goal" in fields:
+        # 목표가 바뀌면 지난 달 달성률까지 달라지므로 캐시된 통계를 모두 버린다
+        invalidate_stats_user(current_user)
+    return result
 
 
 @router.delete("/delete")